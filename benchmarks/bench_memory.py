@@ -0,0 +1,179 @@
+# bench_memory.py
+"""
+比较百万级文件列表的内存占用：打包流程原先保存的路径字符串列表加清单条目列表
+（[包内路径, 大小, mtime_ns, inode]），与紧凑的 PathStore（目录共享、文件名和元数据存放在数组中）。
+分别测量收集文件列表、由其构建文件树、以及逐个产出 (文件路径, 包内路径) 三个阶段的耗时，
+以及 tracemalloc 统计的常驻内存、峰值内存和每个文件的字节数。
+
+文件路径默认在内存中按合成项目的目录结构生成，不需要在磁盘上创建文件，也可以用 --tree 指定真实目录。
+
+用法（在仓库根目录执行）：
+
+    python3 benchmarks/bench_memory.py --files 1000000
+    python3 benchmarks/bench_memory.py --tree /path/to/project --output memory.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+sys.path.insert(0, HERE)
+
+from file_tree import FileTree  # noqa: E402
+from packager import gather_files  # noqa: E402
+from path_store import PathStore  # noqa: E402
+from synthetic_repo import FILE_SUFFIXES, EXTENSIONS, EXCLUDE_RULES  # noqa: E402
+
+RESULTS_VERSION = 1
+FakeStat = namedtuple('FakeStat', 'st_size st_mtime_ns st_ino')
+
+
+def synthetic_files(root, files, depth, fanout):
+    """按合成项目的目录结构在内存中生成 (文件路径, stat) 列表，文件平均分布在各级目录中。"""
+    dirs = [root]
+    level = [root]
+    for _ in range(depth):
+        level = [os.path.join(parent, f"d{i}") for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    result = []
+    for i in range(files):
+        path = os.path.join(dirs[i % len(dirs)], f"module_{i:07d}{FILE_SUFFIXES[i % len(FILE_SUFFIXES)]}")
+        result.append((path, FakeStat(4096 + i % 8192, 1_700_000_000_000_000_000 + i, 10_000_000 + i)))
+    return result
+
+
+def build_lists(project_path, files):
+    """原先的做法：文件路径列表加清单条目列表，每个文件都用 relpath 计算包内路径。"""
+    paths = []
+    entries = []
+    for path, st in files:
+        paths.append(path)
+        entries.append([os.path.relpath(path, start=project_path), st.st_size, st.st_mtime_ns, st.st_ino])
+    return paths, entries
+
+
+def build_store(project_path, files):
+    store = PathStore(project_path)
+    for path, st in files:
+        store.add(path, st)
+    return store
+
+
+def iter_lists(project_path, state):
+    """原先交给写入器的方式：逐个取出文件路径，再用 relpath 计算包内路径。"""
+    count = 0
+    for path in state[0]:
+        os.path.relpath(path, start=project_path)
+        count += 1
+    return count
+
+
+def iter_store(project_path, store):
+    return sum(1 for _ in store.pairs())
+
+
+def measure(name, func, count, memory=True):
+    """
+    执行 func 并计时；统计内存时再在 tracemalloc 下执行一次（tracemalloc 会拖慢执行，不计入耗时）。
+
+    :param name: 阶段名称
+    :param func: 无参函数，返回的对象在统计常驻内存时保持存活
+    :param count: 文件数，用于计算每个文件的字节数
+    :param memory: 是否统计内存
+    :return: (阶段结果, func 最后一次的返回值)
+    """
+    gc.collect()
+    start = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - start
+    current = peak = 0
+    if memory:
+        del value
+        gc.collect()
+        tracemalloc.start()
+        value = func()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "stage": name,
+        "seconds": seconds,
+        "files": count,
+        "files_per_s": count / seconds if seconds else 0.0,
+        "retained_bytes": current,
+        "peak_bytes": peak,
+        "bytes_per_file": current / count if count else 0.0,
+    }, value
+
+
+def run_stages(project_path, files):
+    """依次测量两种表示的收集、建树和遍历阶段，后两个阶段使用收集阶段的结果。"""
+    count = len(files)
+    results = []
+    for label, build, tree_of, iterate in (
+            ("lists", build_lists, lambda state: FileTree.from_entries(state[1]), iter_lists),
+            ("path_store", build_store, FileTree.from_store, iter_store)):
+        result, state = measure(f"{label}.collect", lambda: build(project_path, files), count)
+        results.append(result)
+        result, _ = measure(f"{label}.file_tree", lambda: tree_of(state), count)
+        results.append(result)
+        # 遍历不保留任何对象，只计时
+        result, _ = measure(f"{label}.iterate", lambda: iterate(project_path, state), count, memory=False)
+        results.append(result)
+        del state
+    return results
+
+
+def print_results(results):
+    mb = 1024 * 1024
+    print(f"{'阶段':<20}{'耗时':>10}{'文件/秒':>12}{'常驻内存':>12}{'峰值内存':>12}{'字节/文件':>10}")
+    for r in results:
+        print(f"{r['stage']:<22}{r['seconds']:>8.3f}s{r['files_per_s']:>13.0f}"
+              f"{r['retained_bytes'] / mb:>12.1f}M{r['peak_bytes'] / mb:>12.1f}M{r['bytes_per_file']:>12.0f}")
+    # 原先的文件树与条目列表共用大小的 int 对象，单看建树阶段会低估原先的占用，因此比较两者之和
+    totals = {label: sum(r["retained_bytes"] for r in results
+                         if r["stage"] in (f"{label}.collect", f"{label}.file_tree"))
+              for label in ("lists", "path_store")}
+    print(f"\n文件列表加文件树的常驻内存: {totals['lists'] / mb:.1f}M -> {totals['path_store'] / mb:.1f}M"
+          f"（{totals['path_store'] / totals['lists']:.0%}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=1000000, help='在内存中生成的文件数')
+    parser.add_argument('--depth', type=int, default=4, help='目录深度')
+    parser.add_argument('--fanout', type=int, default=6, help='每个目录下的子目录数')
+    parser.add_argument('--root', default=os.path.join(os.sep, 'home', 'user', 'projects', 'bench'),
+                        help='生成的文件路径所在的项目目录（不会访问磁盘）')
+    parser.add_argument('--tree', help='改为遍历真实的项目目录（使用合成项目的扩展名和排除规则）')
+    parser.add_argument('--output', help='保存结果的 JSON 文件')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.tree:
+        project_path = args.tree
+        files = list(gather_files(project_path, EXTENSIONS, EXCLUDE_RULES, with_stat=True))
+    else:
+        project_path = args.root
+        files = synthetic_files(project_path, args.files, args.depth, args.fanout)
+    print(f"准备文件列表: {len(files)} 个文件（{time.perf_counter() - start:.1f}s）")
+
+    results = run_stages(project_path, files)
+    print_results(results)
+    if args.output:
+        report = {"version": RESULTS_VERSION, "project_path": project_path, "files": len(files), "results": results}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+# bench_packaging.py
+"""
+在合成项目上分阶段测量打包流程：目录遍历 (gather_files)、元数据收集 (file_entry)、
+压缩 (package_files) 和文件树渲染 (print_tree 的替代实现)，输出每个阶段的耗时、文件/秒和 MB/秒，
+并可将结果保存为 JSON，与之前的结果比较以发现性能回退。全程离线运行，不依赖第三方库。
+
+用法（在仓库根目录执行）：
+
+    python3 benchmarks/bench_packaging.py --files 100000 --size-dist source --output results.json
+    python3 benchmarks/bench_packaging.py --files 100000 --compare results.json --tolerance 0.15
+
+合成项目默认生成在系统临时目录下，参数不变时重复运行会直接复用。
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+sys.path.insert(0, HERE)
+
+from file_tree import FileTree, iter_tree_lines  # noqa: E402
+from manifest import file_entry  # noqa: E402
+from packager import gather_files, package_files  # noqa: E402
+from synthetic_repo import generate, SIZE_DISTRIBUTIONS, EXTENSIONS, EXCLUDE_RULES  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+def measure(name, func, repeat, files=None, num_bytes=None):
+    """
+    重复执行 func，取最快的一次。
+
+    :param name: 阶段名称
+    :param func: 无参函数，返回 (文件数, 字节数, 附加信息) 或 None
+    :param repeat: 重复次数
+    :param files: 阶段处理的文件数，为空时使用 func 的返回值
+    :param num_bytes: 阶段处理的字节数，为空时使用 func 的返回值
+    :return: 阶段结果字典
+    """
+    best = None
+    extra = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        returned = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+            if returned:
+                files = returned[0] if files is None else files
+                num_bytes = returned[1] if num_bytes is None else num_bytes
+                extra = returned[2] if len(returned) > 2 else {}
+    result = {
+        "stage": name,
+        "seconds": best,
+        "files": files or 0,
+        "bytes": num_bytes or 0,
+        "files_per_s": (files or 0) / best if best else 0.0,
+        "mb_per_s": (num_bytes or 0) / best / (1024 * 1024) if best else 0.0,
+    }
+    result.update(extra)
+    return result
+
+
+def run_stages(tree, args):
+    """依次测量各个阶段，后一阶段使用前一阶段的结果作为输入。"""
+    state = {}
+    results = []
+
+    def walk():
+        state["files"] = list(gather_files(tree, EXTENSIONS, EXCLUDE_RULES, walk_workers=args.walk_workers))
+        return len(state["files"]), 0
+
+    def metadata():
+        state["entries"] = [file_entry(file, tree) for file in state["files"]]
+        return len(state["entries"]), sum(entry[1] for entry in state["entries"])
+
+    def pack():
+        output_path = os.path.join(args.output_dir, 'bench' + '.' + args.format)
+        stats = {}
+        package_files(tree, state["files"], args.output_dir, workers=args.compress_workers, output_path=output_path,
+                      archive_format=args.format, stats=stats, dedupe=not args.no_dedupe)
+        archive_bytes = os.path.getsize(output_path)
+        os.remove(output_path)
+        return None, None, {"archive_bytes": archive_bytes, "dedup_files": stats.get("dedup_files", 0)}
+
+    def render_tree():
+        file_tree = FileTree.from_entries(state["entries"])
+        lines = sum(1 for _ in iter_tree_lines(file_tree))
+        return len(file_tree), 0, {"lines": lines}
+
+    results.append(measure("gather_files", walk, args.repeat))
+    results.append(measure("file_entry", metadata, args.repeat))
+    total_bytes = results[-1]["bytes"]
+    results.append(measure(f"package_files[{args.format}]", pack, args.repeat,
+                           files=len(state["files"]), num_bytes=total_bytes))
+    results.append(measure("file_tree", render_tree, args.repeat))
+    return results
+
+
+def environment():
+    """记录运行环境，便于判断两次结果是否可比。"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                                text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def print_results(results):
+    print(f"{'阶段':<24}{'耗时':>10}{'文件数':>10}{'文件/秒':>12}{'MB/秒':>10}")
+    for r in results:
+        print(f"{r['stage']:<26}{r['seconds']:>8.3f}s{r['files']:>12}{r['files_per_s']:>13.0f}{r['mb_per_s']:>11.1f}")
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    与之前保存的结果比较，返回变慢超过 tolerance 的阶段列表。
+
+    :param results: 本次的阶段结果
+    :param baseline_path: 之前保存的 JSON 文件
+    :param tolerance: 允许的变慢比例，如 0.1 表示 10%
+    :return: 回退的阶段名称列表
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r["stage"]: r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\n与 {baseline_path} 比较（允许变慢 {tolerance:.0%}）：")
+    for r in results:
+        old = baseline.get(r["stage"])
+        if not old:
+            continue
+        ratio = r["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  <-- 回退"
+            regressions.append(r["stage"])
+        print(f"  {r['stage']:<24} {old['seconds']:8.3f}s -> {r['seconds']:8.3f}s  ({ratio:.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=10000, help='合成项目的文件数（1000 到 1000000）')
+    parser.add_argument('--depth', type=int, default=4, help='目录深度')
+    parser.add_argument('--fanout', type=int, default=6, help='每个目录下的子目录数')
+    parser.add_argument('--size-dist', choices=sorted(SIZE_DISTRIBUTIONS), default='source', help='文件大小分布')
+    parser.add_argument('--exclude-ratio', type=float, default=0.05, help='被排除目录的比例')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.05, help='重复文件的比例')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--tree', help='合成项目所在目录，默认为临时目录下按参数区分的子目录')
+    parser.add_argument('--format', default='tar.gz', help='压缩格式')
+    parser.add_argument('--compress-workers', type=int, default=1, help='压缩线程数')
+    parser.add_argument('--walk-workers', type=int, default=1, help='遍历线程数')
+    parser.add_argument('--no-dedupe', action='store_true', help='关闭重复文件去重')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段重复的次数，取最快的一次')
+    parser.add_argument('--output', help='保存结果的 JSON 文件')
+    parser.add_argument('--compare', help='与之前保存的 JSON 结果比较')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='比较时允许的变慢比例')
+    args = parser.parse_args()
+
+    params = {"files": args.files, "depth": args.depth, "fanout": args.fanout, "size_dist": args.size_dist,
+              "exclude_ratio": args.exclude_ratio, "duplicate_ratio": args.duplicate_ratio, "seed": args.seed}
+    tree = args.tree or os.path.join(tempfile.gettempdir(), 'packer-bench-%(files)d-%(size_dist)s-%(seed)d' % params)
+    print(f"准备合成项目: {tree}")
+    start = time.perf_counter()
+    info = generate(tree, **params)
+    print(f"  {info['files']} 个文件，{info['dirs']} 个目录，{info['bytes'] / (1024 * 1024):.1f} MB"
+          f"（{time.perf_counter() - start:.1f}s）")
+
+    with tempfile.TemporaryDirectory(prefix='packer-bench-out-') as output_dir:
+        args.output_dir = output_dir
+        results = run_stages(tree, args)
+    print_results(results)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "environment": environment(),
+        "tree": info,
+        "options": {"format": args.format, "compress_workers": args.compress_workers,
+                    "walk_workers": args.walk_workers, "dedupe": not args.no_dedupe, "repeat": args.repeat},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n性能回退: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# bench_walker.py
+"""
+对比旧的 os.walk 遍历与基于 os.scandir 的并行遍历器。
+
+用法（在仓库根目录执行）：
+
+    python3 benchmarks/bench_walker.py --files 500000 --excludes 300
+
+合成项目由 synthetic_repo 生成（空文件），默认放在系统临时目录下，参数不变时重复运行会直接复用。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+sys.path.insert(0, HERE)
+
+from rules import RuleSet  # noqa: E402
+from synthetic_repo import generate, layout_dirs, EXTENSIONS  # noqa: E402
+from walker import scan_files  # noqa: E402
+
+
+def legacy_gather_files(project_path, extensions, exclude_dirs):
+    """原先基于 os.walk 与列表线性查找的实现，作为基准。"""
+    exclude_dirs_full = [os.path.join(project_path, exclude_dir) for exclude_dir in exclude_dirs]
+    files_to_package = []
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) not in exclude_dirs_full]
+        for file in files:
+            if any(file.lower().endswith(ext) for ext in extensions):
+                files_to_package.append(os.path.join(root, file))
+    return files_to_package
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    count = len(list(func()))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.3f}s  {count:>9} 个文件  {count / elapsed:12.0f} 文件/秒")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=500000, help='合成项目的文件数')
+    parser.add_argument('--excludes', type=int, default=300, help='排除目录条目数')
+    parser.add_argument('--depth', type=int, default=4, help='目录深度')
+    parser.add_argument('--fanout', type=int, default=6, help='每个目录下的子目录数')
+    parser.add_argument('--tree', help='合成项目所在目录，默认为临时目录下按文件数区分的子目录')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='并行遍历的线程数')
+    args = parser.parse_args()
+
+    tree = args.tree or os.path.join(tempfile.gettempdir(), f'packer-bench-walk-{args.files}')
+    params = {"files": args.files, "depth": args.depth, "fanout": args.fanout, "size_dist": 'empty',
+              "exclude_ratio": 0.0, "duplicate_ratio": 0.0}
+    print(f"准备合成项目: {tree} ({args.files} 个文件)")
+    generate(tree, **params)
+    all_dirs = layout_dirs(args.depth, args.fanout, exclude_ratio=0.0)[1:]
+
+    # 一小部分排除项命中真实的深层目录，其余为不存在的路径，模拟大量排除配置
+    hits = all_dirs[-max(1, args.excludes // 10):]
+    excludes = hits + ['missing/dir_%d' % i for i in range(args.excludes - len(hits))]
+
+    baseline = timed('os.walk (旧实现)', lambda: legacy_gather_files(tree, EXTENSIONS, excludes))
+    for workers in args.workers:
+        elapsed = timed(f'scandir workers={workers}', lambda: scan_files(tree, RuleSet(EXTENSIONS, excludes, ()), workers=workers))
+        print(f"{'':<24} 加速比 {baseline / elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# synthetic_repo.py
+"""
+合成项目生成器，供基准测试使用。
+
+目录深度、每级子目录数、文件大小分布、被排除目录的比例和重复文件的比例均可配置，
+同样的参数和随机种子总是生成同样的目录树。生成完成后会在根目录写入标记文件，
+参数不变时重复调用直接复用已有的目录树。
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+
+# 会被基准测试的排除规则剪掉的目录名
+EXCLUDED_DIR_NAMES = ['node_modules', 'build', '.venv']
+EXCLUDE_RULES = ['**/' + name for name in EXCLUDED_DIR_NAMES]
+# 打包的扩展名；.bin 和 .txt 文件会被扩展名过滤掉
+EXTENSIONS = ['.py', '.md', '.json']
+FILE_SUFFIXES = ['.py', '.py', '.py', '.md', '.json', '.txt', '.bin']
+
+# 文件大小分布：(中位数字节数, 对数正态分布的 sigma, 大文件比例, 大文件最小/最大字节数)
+SIZE_DISTRIBUTIONS = {
+    'empty': (0, 0.0, 0.0, 0, 0),
+    'tiny': (300, 0.5, 0.0, 0, 0),
+    'source': (4 * 1024, 1.0, 0.0, 0, 0),
+    'mixed': (4 * 1024, 1.0, 0.001, 1024 * 1024, 16 * 1024 * 1024),
+}
+
+_MARKER = '.synthetic_repo'  # 不带打包的扩展名，不会被打包
+_WORDS = (b"def class return import from self None True False for in if else elif while "
+          b"value result config path files data index name size items append yield lambda ").split()
+
+
+def _corpus(seed, size=1024 * 1024):
+    """生成一段类似源码、可以压缩的文本，文件内容从中截取。"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = b"    " * rng.randint(0, 3) + b" ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 10))) + b"\n"
+        lines.append(line)
+        total += len(line)
+    return b"".join(lines)
+
+
+def _file_size(rng, distribution):
+    median, sigma, large_ratio, large_min, large_max = distribution
+    if large_ratio and rng.random() < large_ratio:
+        return rng.randint(large_min, large_max)
+    if not median:
+        return 0
+    return int(rng.lognormvariate(0, sigma) * median) if sigma else median
+
+
+def _layout(depth, fanout, exclude_ratio, rng):
+    """按深度和每级子目录数生成目录列表（相对路径），部分目录以被排除的名称命名。"""
+    dirs = ['']
+    level = ['']
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            names = set()
+            for i in range(fanout):
+                name = f"d{i}"
+                if rng.random() < exclude_ratio:
+                    excluded = rng.choice(EXCLUDED_DIR_NAMES)
+                    if excluded not in names:
+                        name = excluded
+                names.add(name)
+                path = os.path.join(parent, name)
+                dirs.append(path)
+                next_level.append(path)
+        level = next_level
+    return dirs
+
+
+def layout_dirs(depth=4, fanout=6, exclude_ratio=0.05, seed=0):
+    """
+    返回 generate 使用相同参数时生成的全部目录（相对路径，第一项为根目录 ''），不访问磁盘。
+
+    :param depth: 目录深度
+    :param fanout: 每个目录下的子目录数
+    :param exclude_ratio: 以被排除的名称命名的目录比例
+    :param seed: 随机种子
+    """
+    return _layout(depth, fanout, exclude_ratio, random.Random(seed))
+
+
+def generate(root, files=10000, depth=4, fanout=6, size_dist='source', exclude_ratio=0.05,
+             duplicate_ratio=0.05, seed=0):
+    """
+    生成合成项目。
+
+    :param root: 合成项目的根目录
+    :param files: 文件总数（1k 到 1M）
+    :param depth: 目录深度
+    :param fanout: 每个目录下的子目录数
+    :param size_dist: 文件大小分布，见 SIZE_DISTRIBUTIONS
+    :param exclude_ratio: 以 node_modules、build 等名称命名的目录比例（会被 EXCLUDE_RULES 排除）
+    :param duplicate_ratio: 内容与之前某个文件完全相同的文件比例
+    :param seed: 随机种子
+    :return: 目录树的统计信息字典（参数、文件数和总字节数）
+    """
+    params = {"files": files, "depth": depth, "fanout": fanout, "size_dist": size_dist,
+              "exclude_ratio": exclude_ratio, "duplicate_ratio": duplicate_ratio, "seed": seed}
+    marker = os.path.join(root, _MARKER)
+    try:
+        with open(marker, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info["params"] == params:
+            return info
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if os.path.exists(marker):
+        shutil.rmtree(root)  # 参数不同的旧合成项目
+    elif os.path.isdir(root) and os.listdir(root):
+        raise ValueError(f"目录不为空且不是合成项目，拒绝覆盖: {root}")
+    os.makedirs(root, exist_ok=True)
+    rng = random.Random(seed)
+    corpus = _corpus(seed)
+    distribution = SIZE_DISTRIBUTIONS[size_dist]
+    dirs = _layout(depth, fanout, exclude_ratio, rng)
+    for d in dirs[1:]:
+        os.makedirs(os.path.join(root, d), exist_ok=True)
+
+    per_dir, extra = divmod(files, len(dirs))
+    pool = []  # 已生成的文件内容，供重复文件使用
+    total_bytes = 0
+    for index, d in enumerate(dirs):
+        for i in range(per_dir + (1 if index < extra else 0)):
+            if pool and rng.random() < duplicate_ratio:
+                data = rng.choice(pool)
+            else:
+                size = _file_size(rng, distribution)
+                if size <= len(corpus):
+                    start = rng.randrange(0, len(corpus) - size + 1)
+                    data = corpus[start:start + size]
+                else:
+                    data = (corpus * (size // len(corpus) + 1))[:size]
+                if len(pool) < 1000 and size <= 64 * 1024:
+                    pool.append(data)
+            name = f"f{i}{FILE_SUFFIXES[i % len(FILE_SUFFIXES)]}"
+            with open(os.path.join(root, d, name), 'wb') as f:
+                f.write(data)
+            total_bytes += len(data)
+
+    info = {"params": params, "dirs": len(dirs), "files": files, "bytes": total_bytes,
+            "id": hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:12]}
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    return info
@@ -0,0 +1,575 @@
+# backends.py
+
+import gzip
+import hashlib
+import io
+import lzma
+import mmap
+import os
+import stat
+import tarfile
+import time
+import zipfile
+import zlib
+from contextlib import contextmanager
+
+from cancellation import check_cancelled
+from parallel_gzip import ParallelGzipWriter, DEFAULT_BLOCK_SIZE, resolve_workers
+
+try:  # Python 3.14 起标准库提供 zstd
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+DEFAULT_FORMAT = 'tar.gz'
+AUTO_FORMAT = 'auto'
+DEFAULT_AUTO_MIN_MBPS = 20  # auto 模式下可接受的最低压缩速度 (MB/s)
+
+_AUTO_SAMPLE_BYTES = 8 * 1024 * 1024
+_AUTO_SAMPLE_FILE_BYTES = 256 * 1024
+_ZIP_MEMBER_OVERHEAD = 100  # zip 每个成员的本地头与中央目录大致开销
+
+
+SMALL_FILE_SIZE = 1024 * 1024  # 不超过此大小的文件一次 readinto 读入复用的缓冲区
+MMAP_FILE_SIZE = 64 * 1024 * 1024  # 不小于此大小的文件通过 mmap 读取
+COPY_CHUNK_SIZE = 1024 * 1024  # tarfile 复制文件内容时每次读取的字节数
+BINARY_SNIFF_BYTES = 8000  # 判断二进制文件时检查的字节数，与 git 一致
+
+
+@contextmanager
+def _open_output(output):
+    """打开输出路径；传入的已是文件对象时原样返回，由调用方关闭。"""
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'wb') as file:
+            yield file
+    else:
+        yield output
+
+
+def resolve_level(backend, level):
+    """
+    返回实际使用的压缩级别：None 时为该格式的默认级别，超出该格式的有效范围时取最接近的有效值。
+
+    同一个级别会用于 auto 模式比较的每一种格式（如对 zstd 有效的 19 超出了 gzip 和 xz 的范围），因此按格式收窄。
+
+    :param backend: 压缩格式对象
+    :param level: 压缩级别
+    :return: 压缩级别，不压缩的格式为 None
+    """
+    if level is None or backend.levels is None:
+        return backend.default_level
+    low, high = backend.levels
+    return min(max(level, low), high)
+
+
+def check_level(backend, level):
+    """
+    检查压缩级别是否在格式的有效范围内，用于明确指定了格式的命令行参数和配置。
+
+    :raises ValueError: 级别超出范围
+    """
+    if level is None or backend.levels is None:
+        return
+    low, high = backend.levels
+    if not low <= level <= high:
+        raise ValueError(f"{backend.name} 的压缩级别应在 {low} 到 {high} 之间: {level}")
+
+
+def deterministic_mtime():
+    """确定性模式下写入压缩包的时间戳：遵循 SOURCE_DATE_EPOCH 约定，未设置时为 0。"""
+    return int(os.environ.get('SOURCE_DATE_EPOCH', 0))
+
+
+def normalize_tarinfo(tarinfo, mtime):
+    """
+    去掉成员中与打包环境有关的元数据：时间戳、属主和权限。
+
+    :param tarinfo: 要修改的 TarInfo
+    :param mtime: 统一写入的时间戳
+    """
+    tarinfo.mtime = mtime
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = ''
+    if tarinfo.issym():
+        tarinfo.mode = 0o777
+    else:
+        # 只保留是否可执行，其余权限位统一
+        tarinfo.mode = 0o755 if tarinfo.mode & 0o111 else 0o644
+
+
+def file_sha256(path):
+    """计算文件内容的 sha256 摘要（十六进制）。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_binary(sample):
+    """与 git 相同的启发式：文件开头的数据中含有 NUL 字节即视为二进制文件。"""
+    return b'\0' in sample
+
+
+class _BufferReader:
+    """以 memoryview 切片的形式提供内存中的文件内容，不复制数据。"""
+    def __init__(self, view):
+        self.view = view
+        self.pos = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size < 0 else min(self.pos + size, len(self.view))
+        data = self.view[self.pos:end]
+        self.pos = end
+        return data
+
+
+class _MemberReader:
+    """
+    在 tarfile 读取文件内容的同时计算哈希，避免为去重再读一遍文件；
+    每读一块检查一次取消请求，大文件也能及时中止。
+    """
+    def __init__(self, fileobj, cancel=None, hashing=True):
+        self.fileobj = fileobj
+        self.cancel = cancel
+        self.digest = hashlib.sha256() if hashing else None
+
+    def read(self, size=-1):
+        check_cancelled(self.cancel)
+        data = self.fileobj.read(size)
+        if self.digest is not None:
+            self.digest.update(data)
+        return data
+
+
+def _sample(data):
+    """读取文件开头用于判断是否为二进制文件的数据。"""
+    if isinstance(data, memoryview):
+        return bytes(data[:BINARY_SNIFF_BYTES])
+    sample = data.read(BINARY_SNIFF_BYTES)
+    data.seek(0)
+    return sample
+
+
+def _digest(data):
+    """计算文件全部内容的哈希。"""
+    if isinstance(data, memoryview):
+        return hashlib.sha256(data).digest()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: data.read(COPY_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    data.seek(0)
+    return digest.digest()
+
+
+def _member_names(item, project_path):
+    """
+    返回 (文件路径, 包内路径)。
+
+    :param item: 文件路径，或已算好包内路径的 (文件路径, 包内路径)（如 PathStore.pairs 的产出）
+    :param project_path: 项目目录的路径
+    """
+    if isinstance(item, tuple):
+        return item
+    return item, os.path.relpath(item, start=project_path)
+
+
+class TarMemberWriter:
+    """
+    向 tar 写入文件，并按内容去重。
+
+    每个文件在写入时顺带计算哈希；只有当新文件的大小与已写入的某个文件相同时，
+    才需要先读取一遍计算哈希，命中时写为硬链接，内容只压缩一次。
+
+    读取方式按文件大小区分：小文件一次 readinto 读入复用的缓冲区，超大文件使用 mmap，
+    其余文件以 COPY_CHUNK_SIZE 大块读取，避免 tarfile 默认的 16KB 小块复制。
+    """
+    def __init__(self, project_path, dedupe, progress=None, cancel=None, max_file_size=None, skip_binary=False,
+                 deterministic=False):
+        """
+        :param project_path: 项目目录的路径
+        :param dedupe: 是否按内容去重
+        :param progress: 可选的 ProgressReporter
+        :param cancel: 可选的 threading.Event，用于取消打包
+        :param max_file_size: 文件大小上限（字节），超过的文件不打包，None 表示不限制
+        :param skip_binary: 是否跳过二进制文件
+        :param deterministic: 统一成员的时间戳、属主和权限，相同的文件得到相同的压缩包
+        """
+        self.project_path = project_path
+        self.dedupe = dedupe
+        self.progress = progress
+        self.cancel = cancel
+        self.max_file_size = max_file_size
+        self.skip_binary = skip_binary
+        self.mtime = deterministic_mtime() if deterministic else None
+        self.sizes = set()
+        self.digests = {}  # (大小, 哈希) -> 第一份文件的包内路径
+        self.dedup_files = 0
+        self.dedup_saved_bytes = 0
+        self.skipped_large = []  # 超过大小上限而未打包的文件
+        self.skipped_binary = []  # 被识别为二进制而未打包的文件
+        self.skipped_special = []  # tar 无法表示而未打包的文件（如 socket）
+        self._buffer = memoryview(bytearray(SMALL_FILE_SIZE))
+
+    def add_all(self, tar, files, extra_members=()):
+        tar.copybufsize = COPY_CHUNK_SIZE
+        for item in files:
+            check_cancelled(self.cancel)
+            file, arcname = _member_names(item, self.project_path)
+            if self.progress:
+                self.progress.start_file(arcname)
+            size = self.add(tar, file, arcname)
+            if self.progress:
+                self.progress.file_done(size)
+        for arcname, data in extra_members:
+            info = tarfile.TarInfo(arcname)
+            info.size = len(data)
+            info.mtime = int(time.time()) if self.mtime is None else self.mtime
+            tar.addfile(info, io.BytesIO(data))
+
+    @contextmanager
+    def _open_data(self, file, size):
+        """
+        打开文件内容：小文件和 mmap 映射的大文件产出 memoryview，其余文件产出 BufferedReader。
+
+        tarfile 复制内容时把读取不足当作文件被截断，而无缓冲的 FileIO 在 NFS、FUSE 上可能返回不足的数据，
+        BufferedReader 的 read 会一直读到请求的字节数或文件末尾；大块读取时直接读入结果，不经过缓冲区。
+
+        :param file: 文件路径
+        :param size: gettarinfo 得到的文件大小
+        """
+        with open(file, 'rb', buffering=0) as f:
+            if size <= SMALL_FILE_SIZE:
+                view = self._buffer[:size]
+                done = 0
+                while done < size:
+                    count = f.readinto(view[done:])
+                    if not count:
+                        raise OSError(f"文件在读取过程中被截断: {file}")
+                    done += count
+                try:
+                    yield view
+                finally:
+                    view.release()
+                return
+            mapped = None
+            if size >= MMAP_FILE_SIZE:
+                try:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    mapped = None  # 不支持 mmap 的文件系统退回到分块读取
+            if mapped is None:
+                yield io.BufferedReader(f, buffer_size=COPY_CHUNK_SIZE)
+                return
+            view = memoryview(mapped)[:size]
+            try:
+                if hasattr(mapped, 'madvise'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                yield view
+            finally:
+                view.release()
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # 异常回溯仍引用着切片时，映射在对象回收时释放
+
+    def add(self, tar, file, arcname):
+        """写入单个文件，返回读取的字节数（未打包的文件返回 0）。"""
+        tarinfo = tar.gettarinfo(file, arcname=arcname)
+        if tarinfo is None:
+            # socket 等 tar 无法表示的文件类型，与 tar.add 一样跳过
+            self.skipped_special.append(arcname)
+            return 0
+        if self.mtime is not None:
+            normalize_tarinfo(tarinfo, self.mtime)
+        else:
+            # 浮点 mtime 会让 tarfile 为每个成员额外生成一个 pax 扩展头，小文件多时开销明显
+            tarinfo.mtime = int(tarinfo.mtime)
+        if not tarinfo.isreg():
+            tar.addfile(tarinfo)
+            return 0
+        size = tarinfo.size
+        if self.max_file_size is not None and size > self.max_file_size:
+            self.skipped_large.append(arcname)
+            return 0
+        if size == 0:
+            tar.addfile(tarinfo)
+            return 0
+
+        with self._open_data(file, size) as data:
+            if self.skip_binary and is_binary(_sample(data)):
+                self.skipped_binary.append(arcname)
+                return 0
+            key = None
+            if self.dedupe and size in self.sizes:
+                key = (size, _digest(data))
+                original = self.digests.get(key)
+                if original is not None:
+                    tarinfo.type = tarfile.LNKTYPE
+                    tarinfo.linkname = original
+                    tarinfo.size = 0
+                    tar.addfile(tarinfo)
+                    self.dedup_files += 1
+                    self.dedup_saved_bytes += size
+                    return size
+            reader = _BufferReader(data) if isinstance(data, memoryview) else data
+            if self.cancel is not None or (self.dedupe and key is None):
+                reader = _MemberReader(reader, self.cancel, hashing=self.dedupe and key is None)
+            tar.addfile(tarinfo, reader)
+        if self.dedupe:
+            if key is None:
+                key = (size, reader.digest.digest())
+            self.sizes.add(size)
+            self.digests.setdefault(key, arcname)
+        return size
+
+
+class ZipMemberWriter:
+    """
+    向 zip 写入文件。每个成员单独压缩，可随机解压单个文件；zip 不支持硬链接，因此不做去重。
+    """
+    def __init__(self, project_path, dedupe, progress=None, cancel=None, max_file_size=None, skip_binary=False,
+                 deterministic=False):
+        self.project_path = project_path
+        self.progress = progress
+        self.cancel = cancel
+        self.max_file_size = max_file_size
+        self.skip_binary = skip_binary
+        self.deterministic = deterministic
+        self.dedup_files = 0
+        self.dedup_saved_bytes = 0
+        self.skipped_large = []
+        self.skipped_binary = []
+        self.skipped_special = []  # 不是普通文件而未打包的文件（如 socket、FIFO）
+
+    def _skip(self, file, arcname):
+        """跳过不是普通文件的成员，并按大小上限和二进制检测判断文件是否不打包。"""
+        st = os.stat(file)
+        if not stat.S_ISREG(st.st_mode):
+            self.skipped_special.append(arcname)
+            return True
+        if self.max_file_size is not None and st.st_size > self.max_file_size:
+            self.skipped_large.append(arcname)
+            return True
+        if self.skip_binary:
+            with open(file, 'rb') as f:
+                if is_binary(f.read(BINARY_SNIFF_BYTES)):
+                    self.skipped_binary.append(arcname)
+                    return True
+        return False
+
+    def add_all(self, archive, files, extra_members=()):
+        for item in files:
+            check_cancelled(self.cancel)
+            file, arcname = _member_names(item, self.project_path)
+            if self.progress:
+                self.progress.start_file(arcname)
+            if self._skip(file, arcname):
+                size = 0
+            elif self.deterministic:
+                size = self._write_normalized(archive, file, arcname)
+            else:
+                archive.write(file, arcname=arcname)
+                size = archive.getinfo(arcname.replace(os.sep, '/')).file_size
+            if self.progress:
+                self.progress.file_done(size)
+        for arcname, data in extra_members:
+            if self.deterministic:
+                zinfo = self._normalized_info(arcname, 0o644)
+                archive.writestr(zinfo, data, compress_type=archive.compression, compresslevel=archive.compresslevel)
+            else:
+                archive.writestr(arcname, data)
+
+    @staticmethod
+    def _normalized_info(arcname, mode):
+        # zip 的时间戳不能早于 1980 年，统一使用最早的可表示时间
+        zinfo = zipfile.ZipInfo(arcname.replace(os.sep, '/'), date_time=(1980, 1, 1, 0, 0, 0))
+        zinfo.create_system = 3  # 统一按 Unix 记录权限，与打包所在的平台无关
+        zinfo.external_attr = (0o100000 | mode) << 16
+        return zinfo
+
+    def _write_normalized(self, archive, file, arcname):
+        """以统一的时间戳和权限写入文件，内容分块流式压缩，返回读取的字节数。"""
+        st = os.stat(file)
+        zinfo = self._normalized_info(arcname, 0o755 if st.st_mode & 0o111 else 0o644)
+        zinfo.compress_type = archive.compression
+        zinfo._compresslevel = archive.compresslevel  # 与 writestr 的做法相同
+        # 预先给出大小，ZipFile.open 据此决定是否使用 zip64，与 writestr 写出的字节相同
+        zinfo.file_size = st.st_size
+        size = 0
+        with open(file, 'rb') as f, archive.open(zinfo, 'w') as dst:
+            for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+                check_cancelled(self.cancel)
+                dst.write(chunk)
+                size += len(chunk)
+        return size
+
+
+class TarBackend:
+    """
+    基于 tarfile 的压缩格式。
+
+    :param name: 格式名，同时作为文件后缀
+    :param mode: tarfile.open 的写入模式
+    :param level_arg: tarfile.open 中压缩级别参数的名称，不压缩时为 None
+    :param default_level: 默认压缩级别
+    :param levels: 有效的压缩级别范围 (最小, 最大)，不压缩时为 None
+    :param compress: 用于 auto 模式估算压缩率的函数 (data, level) -> bytes
+    """
+    writer_class = TarMemberWriter
+
+    def __init__(self, name, mode, level_arg, default_level, levels, compress):
+        self.name = name
+        self.suffix = '.' + name
+        self.mode = mode
+        self.level_arg = level_arg
+        self.default_level = default_level
+        self.levels = levels
+        self.compress = compress
+
+    @contextmanager
+    def open(self, output_path, level=None, workers=1, block_size=DEFAULT_BLOCK_SIZE, deterministic=False):
+        """
+        打开压缩包用于写入。
+
+        :param output_path: 压缩包路径，或可写的二进制文件对象（只需 write 和 tell，见 sinks.CountingWriter）
+        :param level: 压缩级别，None 表示使用默认级别，超出范围时取最接近的有效值
+        :param workers: 压缩线程数，仅 tar.gz 支持多线程
+        :param block_size: 多线程压缩时每个压缩块的大小（字节）
+        :param deterministic: gzip 头中的时间戳固定为 0，且不记录文件名
+        """
+        level = resolve_level(self, level)
+        if self.name == 'tar.gz' and workers != 1:
+            # 多线程压缩：tar 流写入并行 gzip 写入器，由其分块压缩
+            mtime = 0 if deterministic else None
+            with ParallelGzipWriter(output_path, workers=workers, block_size=block_size, level=level,
+                                    mtime=mtime) as gz:
+                with tarfile.open(fileobj=gz, mode="w") as tar:
+                    yield tar
+            return
+        if self.name == 'tar.gz' and deterministic:
+            # tarfile 自带的 gzip 流总是写入当前时间，改用可以指定 mtime 的 GzipFile
+            with _open_output(output_path) as raw, \
+                    gzip.GzipFile(filename='', mode='wb', compresslevel=level, fileobj=raw, mtime=0) as gz:
+                with tarfile.open(fileobj=gz, mode="w") as tar:
+                    yield tar
+            return
+        kwargs = {self.level_arg: level} if self.level_arg else {}
+        if isinstance(output_path, (str, os.PathLike)):
+            kwargs["name"] = output_path
+        else:
+            # 文件对象可以是管道或 socket：压缩层只顺序写入，tarfile 只通过 tell 获取位置
+            kwargs["fileobj"] = output_path
+        with tarfile.open(mode=self.mode, **kwargs) as tar:
+            yield tar
+
+    def estimate(self, samples, level=None):
+        """估算样本压缩后的大小。"""
+        level = resolve_level(self, level)
+        return len(self.compress(b''.join(samples), level))
+
+
+class ZipBackend:
+    """zip 格式，每个成员单独 deflate 压缩。"""
+    writer_class = ZipMemberWriter
+    name = 'zip'
+    suffix = '.zip'
+    default_level = 6
+    levels = (0, 9)
+
+    @contextmanager
+    def open(self, output_path, level=None, workers=1, block_size=DEFAULT_BLOCK_SIZE, deterministic=False):
+        # 输出为无法 seek 的文件对象时，zipfile 会在每个成员后写入数据描述符
+        level = resolve_level(self, level)
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as archive:
+            yield archive
+
+    def estimate(self, samples, level=None):
+        level = resolve_level(self, level)
+        return sum(len(zlib.compress(sample, level)) + _ZIP_MEMBER_OVERHEAD for sample in samples)
+
+
+BACKENDS = {}
+
+
+def register_backend(backend):
+    """注册压缩格式，之后可以在 config.json 的 format 中使用其名称。"""
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+register_backend(TarBackend('tar.gz', 'w:gz', 'compresslevel', 6, (0, 9),
+                            lambda data, level: zlib.compress(data, level)))
+register_backend(TarBackend('tar.xz', 'w:xz', 'preset', 6, (0, 9), lambda data, level: lzma.compress(data, preset=level)))
+register_backend(TarBackend('tar', 'w', None, None, None, lambda data, level: data))
+register_backend(ZipBackend())
+if zstd is not None:
+    register_backend(TarBackend('tar.zst', 'w:zst', 'level', 3, zstd.CompressionParameter.compression_level.bounds(),
+                                lambda data, level: zstd.compress(data, level=level)))
+
+# 兼容常用的别名
+_ALIASES = {'gz': 'tar.gz', 'gzip': 'tar.gz', 'tgz': 'tar.gz', 'xz': 'tar.xz', 'lzma': 'tar.xz',
+            'zst': 'tar.zst', 'zstd': 'tar.zst'}
+
+
+def get_backend(name):
+    """
+    根据格式名获取压缩格式。
+
+    :param name: 格式名或别名，如 "tar.gz"、"xz"、"zip"
+    :return: 压缩格式对象
+    """
+    name = _ALIASES.get(name, name)
+    if name not in BACKENDS:
+        if name == 'tar.zst':
+            raise ValueError("当前 Python 不支持 zstd 压缩（需要 Python 3.14 及以上）")
+        raise ValueError(f"不支持的压缩格式: {name}")
+    return BACKENDS[name]
+
+
+def _read_samples(files):
+    """从文件列表中等间隔抽取样本，每个文件最多读取一段，样本总量有上限。"""
+    if not files:
+        return []
+    count = max(1, min(len(files), _AUTO_SAMPLE_BYTES // _AUTO_SAMPLE_FILE_BYTES))
+    step = len(files) / count
+    samples = []
+    for i in range(count):
+        try:
+            with open(files[int(i * step)], 'rb') as f:
+                samples.append(f.read(_AUTO_SAMPLE_FILE_BYTES))
+        except OSError:
+            continue
+    return samples
+
+
+def choose_backend(files, min_mbps=DEFAULT_AUTO_MIN_MBPS, workers=1, level=None):
+    """
+    auto 模式：用每种格式压缩项目的抽样数据，选出速度不低于 min_mbps 时压缩率最高的格式。
+
+    所有格式都达不到目标速度时，选择最快的一种。
+
+    :param files: 要打包的文件路径列表
+    :param min_mbps: 可接受的最低压缩速度 (MB/s)，越大越偏向速度，越小越偏向压缩率
+    :param workers: 压缩线程数，tar.gz 的速度会按线程数折算
+    :param level: 压缩级别，None 表示各格式的默认级别
+    :return: (压缩格式对象, 各格式的测量结果列表)
+    """
+    samples = _read_samples(files)
+    raw = sum(len(sample) for sample in samples) or 1
+    results = []
+    for backend in BACKENDS.values():
+        start = time.perf_counter()
+        size = backend.estimate(samples, level)
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        mbps = raw / elapsed / (1024 * 1024)
+        if backend.name == 'tar.gz' and workers != 1:
+            mbps *= resolve_workers(workers)
+        results.append({"format": backend.name, "ratio": size / raw, "mbps": mbps})
+
+    fast_enough = [r for r in results if r["mbps"] >= min_mbps]
+    if fast_enough:
+        best = min(fast_enough, key=lambda r: r["ratio"])
+    else:
+        best = max(results, key=lambda r: r["mbps"])
+    return BACKENDS[best["format"]], results
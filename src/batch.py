@@ -0,0 +1,127 @@
+# batch.py
+
+import fnmatch
+import os
+import queue
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from manifest import load_manifest, packed_entries
+from packager import run_packaging, packaging_options, format_size
+
+
+def select_projects(projects, patterns=None):
+    """
+    按通配模式筛选项目，模式可以匹配项目的完整路径或目录名。
+
+    :param projects: config.json 中的项目列表
+    :param patterns: 通配模式列表，为空时返回全部项目
+    :return: 筛选后的项目列表
+    """
+    if not patterns:
+        return list(projects)
+    selected = []
+    for project in projects:
+        path = project["project_path"]
+        name = os.path.basename(os.path.normpath(path))
+        if any(fnmatch.fnmatch(path, p) or fnmatch.fnmatch(name, p) for p in patterns):
+            selected.append(project)
+    return selected
+
+
+def pack_project(project, output_dir=None):
+    """
+    在工作进程中打包单个项目，并根据清单统计文件数和字节数。
+
+    :param project: 项目配置字典
+    :param output_dir: 保存压缩包的目录
+    :return: 打包结果字典
+    """
+    start = time.perf_counter()
+    result_queue = queue.Queue()
+    options = packaging_options(project)
+    options["tree_lines"] = 0  # 只取结果消息的第一行，不需要文件树
+    run_packaging(project["project_path"], project.get("file_extensions", []), project.get("exclude_dirs", []),
+                  result_queue, output_dir=output_dir, unique_name=True, **options)
+    message, output_path = result_queue.get()
+    result = {
+        "project_path": project["project_path"],
+        "output_path": output_path,
+        "message": message.split("\n")[0],
+        "seconds": time.perf_counter() - start,
+        "files": 0,
+        "raw_bytes": 0,
+        "archive_bytes": 0,
+    }
+    manifest = load_manifest(output_path) if output_path else None
+    if manifest:
+        files = packed_entries(manifest)
+        result["files"] = len(files)
+        result["raw_bytes"] = sum(entry[1] for entry in files)
+        result["archive_bytes"] = os.path.getsize(output_path)
+    return result
+
+
+def run_batch(projects, max_workers=None, output_dir=None, on_result=None):
+    """
+    用进程池同时打包多个项目。每个压缩包的文件名带有项目路径的短哈希，同名项目不会互相覆盖。
+
+    :param projects: 项目配置列表
+    :param max_workers: 同时打包的项目数上限，默认为 CPU 核心数
+    :param output_dir: 保存压缩包的目录，默认为系统临时目录
+    :param on_result: 每个项目完成时的回调，参数为结果字典
+    :return: 与 projects 顺序一致的结果列表
+    """
+    results = [None] * len(projects)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(pack_project, project, output_dir): i for i, project in enumerate(projects)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"project_path": projects[i]["project_path"], "output_path": None,
+                          "message": f"打包过程中出现错误: {e}", "seconds": 0.0,
+                          "files": 0, "raw_bytes": 0, "archive_bytes": 0}
+            results[i] = result
+            if on_result:
+                on_result(result)
+    return results
+
+
+def _display_width(text):
+    """中文等全角字符按两个字符宽度计算，保证表格对齐。"""
+    return sum(2 if unicodedata.east_asian_width(c) in ('W', 'F') else 1 for c in text)
+
+
+def _pad(text, width):
+    return text + " " * (width - _display_width(text))
+
+
+def format_summary(results, elapsed=None):
+    """
+    将批量打包结果格式化为表格。
+
+    :param results: run_batch 返回的结果列表
+    :param elapsed: 批量打包的总耗时（秒），为空时使用最慢项目的耗时
+    :return: 表格字符串
+    """
+    headers = ("项目", "耗时", "文件数", "原始大小", "压缩包大小", "结果")
+    rows = []
+    for r in results:
+        status = os.path.basename(r["output_path"]) if r["output_path"] else r["message"]
+        rows.append((r["project_path"], f"{r['seconds']:.2f}s", str(r["files"]),
+                     format_size(r["raw_bytes"]), format_size(r["archive_bytes"]), status))
+    total_seconds = elapsed if elapsed is not None else max((r["seconds"] for r in results), default=0.0)
+    rows.append(("合计", f"{total_seconds:.2f}s", str(sum(r["files"] for r in results)),
+                 format_size(sum(r["raw_bytes"] for r in results)),
+                 format_size(sum(r["archive_bytes"] for r in results)),
+                 f"成功 {sum(1 for r in results if r['output_path'])}/{len(results)}"))
+
+    widths = [max(_display_width(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+    lines = ["  ".join(_pad(cell, width) for cell, width in zip(headers, widths)).rstrip()]
+    lines.append("  ".join("-" * width for width in widths))
+    for row in rows:
+        lines.append("  ".join(_pad(cell, width) for cell, width in zip(row, widths)).rstrip())
+    return "\n".join(lines)
@@ -0,0 +1,14 @@
+# cancellation.py
+
+class PackagingCancelled(Exception):
+    """打包被用户取消。"""
+
+
+def check_cancelled(cancel):
+    """
+    在遍历、读取和压缩的各个检查点调用，已请求取消时抛出 PackagingCancelled。
+
+    :param cancel: threading.Event 或 None（不可取消）
+    """
+    if cancel is not None and cancel.is_set():
+        raise PackagingCancelled("打包已取消")
@@ -0,0 +1,398 @@
+# cli.py
+"""
+源码打包工具的命令行入口，不依赖 PyQt5，可在无显示环境（如 CI 容器）中使用。
+
+在 src 目录下执行：
+
+    python3 -m cli list
+    python3 -m cli pack /path/to/project
+    python3 -m cli pack /path/to/project --ext .py .md --exclude build "**/node_modules" --format tar.xz
+    python3 -m cli pack /path/to/project --to - | ssh host 'tar -xzf - -C /srv/project'
+    python3 -m cli pack /path/to/project --to http://artifacts.local/upload/project.tar.gz
+    python3 -m cli preview /path/to/project --format tar.xz
+    python3 -m cli watch /path/to/project --debounce 2
+    python3 -m cli batch --jobs 4 --filter "*service*"
+    python3 -m cli volumes /path/to/project --max-size 2048 --jobs 4
+    python3 -m cli delta /path/to/project --base /tmp/project.tar.gz
+    python3 -m cli apply /tmp/project.tar.gz /tmp/project.delta-xxxx.tar.gz --target /tmp/restored
+
+压缩包路径输出到 stdout（--to - 时 stdout 为压缩包本身），进度和日志输出到 stderr。
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import time
+
+from backends import get_backend, check_level, AUTO_FORMAT, DEFAULT_FORMAT
+from config import read_config, resource_path, DEFAULT_CONFIG_PATH
+from packager import run_packaging, packaging_options
+from profiling import PROFILE_TOOLS
+from progress import format_event
+from sinks import STDOUT
+from watcher import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+
+
+SINK_HELP = '压缩包不写入磁盘，直接输出到: -（标准输出）、tcp://主机:端口 或 http(s)://...（分块上传）'
+
+
+def log(message):
+    """日志统一输出到 stderr，stdout 只用于输出结果，便于脚本处理。"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def log_progress(event):
+    """将进度事件输出到 stderr。"""
+    text = format_event(event)
+    if text:
+        log(text)
+
+
+def find_project(projects, project_path):
+    """在配置中查找项目，找不到时返回只包含路径的新配置。"""
+    normalized = os.path.normpath(os.path.abspath(project_path))
+    for project in projects:
+        if os.path.normpath(os.path.abspath(project["project_path"])) == normalized:
+            return dict(project)
+    return {"project_path": project_path, "file_extensions": [], "exclude_dirs": []}
+
+
+def apply_overrides(project, args):
+    """用命令行参数覆盖项目配置中的对应项。"""
+    if args.ext:
+        project["file_extensions"] = [ext if ext.startswith('.') or any(c in ext for c in '*?[') else f'.{ext}'
+                                      for ext in args.ext]
+    if args.exclude is not None:
+        project["exclude_dirs"] = args.exclude
+    overrides = {
+        "format": args.format,
+        "compression_level": args.level,
+        "compress_workers": args.workers,
+        "walk_workers": args.walk_workers,
+    }
+    project.update({key: value for key, value in overrides.items() if value is not None})
+    if args.no_reuse:
+        project["reuse_unchanged"] = False
+    if args.max_file_size is not None:
+        project["max_file_size_mb"] = args.max_file_size
+    if args.skip_binary:
+        project["skip_binary"] = True
+    if args.deterministic:
+        project["deterministic"] = True
+    if args.scan_index:
+        project["scan_index"] = True
+    if args.gitignore:
+        project["use_gitignore"] = True
+    if args.profile or args.profile_tool:
+        project["profile"] = True
+    if args.profile_tool:
+        project["profile_tools"] = args.profile_tool
+    return project
+
+
+def load_projects(args):
+    """读取配置中的项目；未指定配置且默认配置不存在时不生成默认配置。"""
+    config_path = args.config or resource_path(DEFAULT_CONFIG_PATH)
+    if not os.path.exists(config_path):
+        if args.config:
+            raise SystemExit(f"错误: 配置文件不存在: {config_path}")
+        return []
+    return read_config(config_path)
+
+
+def load_project(args):
+    projects = load_projects(args)
+    project = apply_overrides(find_project(projects, args.project_path), args)
+    if not project["file_extensions"]:
+        raise SystemExit("错误: 项目不在配置中，请通过 --ext 指定要打包的文件扩展名")
+    archive_format = project.get("format", DEFAULT_FORMAT)
+    if archive_format != AUTO_FORMAT:
+        # auto 模式下每种格式各自收窄到有效范围；明确指定格式时，超出范围的级别在开始打包前报错
+        try:
+            check_level(get_backend(archive_format), project.get("compression_level"))
+        except ValueError as e:
+            raise SystemExit(f"错误: {e}")
+    return project
+
+
+def cmd_list(args):
+    for project in load_projects(args):
+        print(project["project_path"])
+        log(f"    扩展名: {' '.join(project.get('file_extensions', []))}")
+        log(f"    排除: {' '.join(project.get('exclude_dirs', []))}")
+    return 0
+
+
+def pack_project(project, args, file_source=None):
+    """在当前线程中打包一个项目，输出结果消息（不含文件树），返回压缩包路径，失败时返回 None。"""
+    result_queue = queue.Queue()
+    options = packaging_options(project)
+    options["tree_lines"] = 0  # 结果消息中的文件树不输出，完整的树由 --tree 从清单生成
+    if args.to:
+        options["sink"] = args.to
+    run_packaging(project["project_path"], project["file_extensions"], project["exclude_dirs"], result_queue,
+                  output_dir=args.output_dir, progress=None if args.quiet else log_progress, file_source=file_source,
+                  **options)
+    message, output_path = result_queue.get()
+    log(message.split("打包的文件列表:")[0].rstrip())
+    return output_path
+
+
+def check_sink_args(args):
+    if args.to == STDOUT and sys.stdout.isatty():
+        raise SystemExit("错误: 标准输出是终端，请将压缩包重定向到文件或管道")
+
+
+def cmd_pack(args):
+    check_sink_args(args)
+    if args.to and args.tree:
+        raise SystemExit("错误: --tree 需要读取磁盘上的清单，不能与 --to 同时使用")
+    project = load_project(args)
+    log(f"开始打包: {project['project_path']}")
+    start = time.perf_counter()
+    output_path = pack_project(project, args)
+    if not output_path:
+        return 1
+    if args.tree:
+        # 由清单逐行输出完整的文件树，不经过结果消息中的截断预览
+        from file_tree import FileTree, write_tree
+        from manifest import load_manifest, packed_entries
+
+        log("打包的文件列表:")
+        write_tree(FileTree.from_entries(packed_entries(load_manifest(output_path))), sys.stderr)
+    log(f"耗时 {time.perf_counter() - start:.2f}s")
+    if args.to != STDOUT:
+        print(output_path)
+    return 0
+
+
+def cmd_watch(args):
+    from watcher import ProjectWatcher
+
+    check_sink_args(args)
+    project = load_project(args)
+    changes = queue.Queue()
+    watcher = ProjectWatcher(project["project_path"], project["file_extensions"], project["exclude_dirs"],
+                             ignore_files=packaging_options(project)["ignore_files"], on_change=changes.put,
+                             debounce=args.debounce, poll_interval=args.poll_interval, use_inotify=not args.poll)
+    with watcher:
+        watcher.wait_ready()
+        if watcher.error is not None:
+            raise SystemExit(f"错误: 无法建立文件索引: {watcher.error}")
+        if watcher.fallback_reason:
+            log(f"inotify 不可用（{watcher.fallback_reason}），改为每 {args.poll_interval:g}s 轮询一次")
+        log(f"开始监视: {project['project_path']}（{watcher.mode}，{len(watcher)} 个文件），按 Ctrl+C 退出")
+        while True:
+            start = time.perf_counter()
+            output_path = pack_project(project, args, file_source=watcher.files)
+            log(f"耗时 {time.perf_counter() - start:.2f}s")
+            if output_path and args.to != STDOUT:
+                print(output_path, flush=True)
+            changed = changes.get()
+            # 合并打包期间积累的变化，只重新打包一次
+            while not changes.empty():
+                changed += changes.get_nowait()
+            log(f"{len(changed)} 个文件发生变化，重新打包: {', '.join(changed[:3])}{' 等' if len(changed) > 3 else ''}")
+
+
+def cmd_preview(args):
+    from preview import preview_project, format_preview
+
+    project = load_project(args)
+    options = packaging_options(project)
+    log(f"预估打包: {project['project_path']}")
+    preview = preview_project(
+        project["project_path"], project["file_extensions"], project["exclude_dirs"],
+        archive_format=options["archive_format"], level=options["level"], walk_workers=options["walk_workers"],
+        ignore_files=options["ignore_files"], max_file_size=options["max_file_size"],
+        skip_binary=options["skip_binary"], top_n=args.top
+    )
+    print(format_preview(preview, args.top))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(preview, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+def cmd_volumes(args):
+    import tempfile
+    from packager import format_size
+    from volumes import package_volumes
+
+    project = load_project(args)
+    options = packaging_options(project)
+    log(f"开始分卷打包: {project['project_path']}（每卷不超过 {format_size(args.max_size * 1024 * 1024)}）")
+    start = time.perf_counter()
+
+    def on_volume(volume):
+        log(f"[完成] {volume['file']}: {volume['files']} 个文件，{format_size(volume['bytes'])} -> "
+            f"{format_size(volume['archive_bytes'])} ({volume['seconds']:.2f}s)")
+
+    index_file, index = package_volumes(
+        project["project_path"], project["file_extensions"], project["exclude_dirs"],
+        args.output_dir or tempfile.gettempdir(), int(args.max_size * 1024 * 1024),
+        archive_format=options["archive_format"], level=options["level"], max_workers=args.jobs,
+        workers=options["workers"], block_size=options["block_size"], walk_workers=options["walk_workers"],
+        ignore_files=options["ignore_files"], dedupe=options["dedupe"], max_file_size=options["max_file_size"],
+        skip_binary=options["skip_binary"], deterministic=options["deterministic"],
+        auto_min_mbps=options["auto_min_mbps"], on_volume=on_volume
+    )
+    if index_file is None:
+        log("没有文件需要打包。")
+        return 1
+    volumes = index["volumes"]
+    log(f"共 {len(volumes)} 卷，{sum(v['files'] for v in volumes)} 个文件，"
+        f"{format_size(sum(v['archive_bytes'] for v in volumes))}，耗时 {time.perf_counter() - start:.2f}s")
+    if index.get("skipped"):
+        log(f"未打包 {len(index['skipped'])} 个文件（超过大小上限、二进制文件或不支持的文件类型）")
+    log(f"分卷索引: {index_file}")
+    output_dir = os.path.dirname(index_file)
+    for volume in volumes:
+        print(os.path.join(output_dir, volume["file"]))
+    print(index_file)
+    return 0
+
+
+def cmd_delta(args):
+    from delta import package_delta, DeltaChainError
+
+    project = load_project(args)
+    options = packaging_options(project)
+    log(f"开始生成增量包: {project['project_path']}")
+    try:
+        # 未指定格式时沿用基准压缩包的格式
+        output_path, changes = package_delta(
+            project["project_path"], project["file_extensions"], project["exclude_dirs"], args.base,
+            args.output_dir or os.path.dirname(os.path.abspath(args.base)),
+            workers=options["workers"], block_size=options["block_size"],
+            walk_workers=options["walk_workers"], ignore_files=options["ignore_files"],
+            archive_format=project.get("format"), level=options["level"]
+        )
+    except (ValueError, DeltaChainError) as e:
+        raise SystemExit(f"错误: {e}")
+    log(f"新增 {len(changes['added'])} 个，修改 {len(changes['modified'])} 个，删除 {len(changes['deleted'])} 个文件")
+    if output_path is None:
+        log("没有变化，无需生成增量包。")
+        return 0
+    print(output_path)
+    return 0
+
+
+def cmd_apply(args):
+    from delta import apply_deltas
+
+    log(f"应用 {len(args.deltas)} 个增量包到: {args.target}")
+    print(apply_deltas(args.base, args.deltas, args.target))
+    return 0
+
+
+def cmd_batch(args):
+    from batch import select_projects, run_batch, format_summary
+
+    projects = select_projects(load_projects(args), args.filter)
+    if not projects:
+        log("没有匹配的项目。")
+        return 1
+    log(f"开始批量打包 {len(projects)} 个项目，并发数 {args.jobs or os.cpu_count()}")
+    start = time.perf_counter()
+
+    def on_result(result):
+        status = "完成" if result["output_path"] else "失败"
+        log(f"[{status}] {result['project_path']} ({result['seconds']:.2f}s) {result['message']}")
+
+    results = run_batch(projects, max_workers=args.jobs, output_dir=args.output_dir, on_result=on_result)
+    log(format_summary(results, elapsed=time.perf_counter() - start))
+    for result in results:
+        if result["output_path"]:
+            print(result["output_path"])
+    return 0 if all(result["output_path"] for result in results) else 1
+
+
+def add_project_arguments(parser):
+    parser.add_argument('project_path', help='项目目录；若在配置中已存在，则以配置为基础')
+    parser.add_argument('--ext', nargs='+', help='要打包的文件扩展名或通配模式，覆盖配置')
+    parser.add_argument('--exclude', nargs='*', help='要排除的子目录或 .gitignore 风格规则，覆盖配置')
+    parser.add_argument('--format', help='压缩格式: tar.gz、tar.xz、tar.zst、zip、tar 或 auto')
+    parser.add_argument('--level', type=int, help='压缩级别')
+    parser.add_argument('--workers', type=int, help='压缩线程数，0 表示使用全部 CPU 核心')
+    parser.add_argument('--walk-workers', type=int, help='并行扫描目录的线程数')
+    parser.add_argument('--output-dir', help='保存压缩包的目录，默认为系统临时目录')
+    parser.add_argument('--no-reuse', action='store_true', help='即使文件未变化也重新打包')
+    parser.add_argument('--max-file-size', type=float, help='文件大小上限 (MB)，超过的文件不打包')
+    parser.add_argument('--skip-binary', action='store_true', help='跳过二进制文件')
+    parser.add_argument('--deterministic', action='store_true', help='生成可复现的压缩包，并写入 sha256 摘要文件')
+    parser.add_argument('--scan-index', action='store_true', help='使用持久化的目录索引，跳过未变化的目录')
+    parser.add_argument('--gitignore', action='store_true', help='同时按各级目录中的 .gitignore 排除文件')
+    parser.add_argument('--profile', action='store_true', help='统计各阶段耗时，写入压缩包旁的 .profile.json')
+    parser.add_argument('--profile-tool', nargs='+', choices=PROFILE_TOOLS,
+                        help='同时启用的分析工具（隐含 --profile）')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python3 -m cli', description='源码打包工具（命令行）')
+    parser.add_argument('--config', help='配置文件路径，默认为 src/config.json')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help='列出配置中的项目').set_defaults(func=cmd_list)
+
+    pack = subparsers.add_parser('pack', help='打包一个项目')
+    add_project_arguments(pack)
+    pack.add_argument('--tree', action='store_true', help='在日志中输出打包的文件树')
+    pack.add_argument('--quiet', '-q', action='store_true', help='不输出打包进度')
+    pack.add_argument('--to', help=SINK_HELP)
+    pack.set_defaults(func=cmd_pack)
+
+    watch = subparsers.add_parser('watch', help='监视项目，文件变化后自动重新打包')
+    add_project_arguments(watch)
+    watch.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE, help='最后一次变化后等待多少秒再打包')
+    watch.add_argument('--poll', action='store_true', help='不使用 inotify，定期扫描目录')
+    watch.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL, help='轮询的间隔（秒）')
+    watch.add_argument('--quiet', '-q', action='store_true', help='不输出打包进度')
+    watch.add_argument('--to', help=SINK_HELP)
+    watch.set_defaults(func=cmd_watch)
+
+    preview = subparsers.add_parser('preview', help='不压缩，预估文件数和压缩包大小')
+    add_project_arguments(preview)
+    preview.add_argument('--top', type=int, default=10, help='列出的最大扩展名和目录数')
+    preview.add_argument('--json', help='同时将预估结果保存为 JSON 文件')
+    preview.set_defaults(func=cmd_preview)
+
+    volumes = subparsers.add_parser('volumes', help='分卷打包：按大小切分为可单独解压的多个压缩包并同时压缩')
+    add_project_arguments(volumes)
+    volumes.add_argument('--max-size', type=float, required=True, help='每卷的大小上限 (MB)')
+    volumes.add_argument('--jobs', '-j', type=int, help='同时压缩的卷数，默认为 CPU 核心数')
+    volumes.set_defaults(func=cmd_volumes)
+
+    delta = subparsers.add_parser('delta', help='相对上一次打包生成增量包')
+    add_project_arguments(delta)
+    delta.add_argument('--base', required=True, help='基准压缩包或其清单文件')
+    delta.set_defaults(func=cmd_delta)
+
+    batch = subparsers.add_parser('batch', help='用进程池同时打包配置中的多个项目')
+    batch.add_argument('--filter', nargs='+', help='只打包路径或目录名匹配这些通配模式的项目')
+    batch.add_argument('--jobs', '-j', type=int, help='同时打包的项目数，默认为 CPU 核心数')
+    batch.add_argument('--output-dir', help='保存压缩包的目录，默认为系统临时目录')
+    batch.set_defaults(func=cmd_batch)
+
+    apply = subparsers.add_parser('apply', help='由基准压缩包和增量包重建文件树')
+    apply.add_argument('base', help='基准压缩包')
+    apply.add_argument('deltas', nargs='+', help='按生成顺序排列的增量包')
+    apply.add_argument('--target', required=True, help='重建文件树的目标目录')
+    apply.set_defaults(func=cmd_apply)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        # 写了一半的压缩包只存在于临时文件中，已在中断时删除
+        log("已取消。")
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,19 @@
 import os
 import json
+import threading
+from contextlib import contextmanager
+
+try:  # 文件锁：POSIX 使用 fcntl，Windows 使用 msvcrt
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
 
 DEFAULT_CONFIG_PATH = 'config.json'
+LOCK_SUFFIX = '.lock'
 
 def resource_path(relative_path):
     """获取打包后资源文件的路径"""
@@ -20,81 +32,191 @@ def get_default_config():
     }
     return default_config
 
-def read_config():
-    config_path = resource_path(DEFAULT_CONFIG_PATH)
-    if not os.path.exists(config_path):
-        # 生成默认配置
-        default_config = get_default_config()
-        with open(config_path, 'w', encoding='utf-8') as file:
-            json.dump(default_config, file, indent=4)
-        return default_config["projects"]
+def _copy_project(project):
+    """复制项目配置，调用方修改返回值不会影响缓存（配置中的值只有字符串、数字和列表）"""
+    return {key: list(value) if isinstance(value, list) else value for key, value in project.items()}
 
-    with open(config_path, 'r', encoding='utf-8') as file:
-        config = json.load(file)
-        return config.get("projects", [])
+@contextmanager
+def _file_lock(lock_path):
+    """跨进程的排他锁，同时运行的多个实例依次写入配置文件"""
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
 
-def save_config(project):
-    config_path = resource_path(DEFAULT_CONFIG_PATH)
-    if not os.path.exists(config_path):
-        existing_config = {"projects": []}
-    else:
-        with open(config_path, 'r', encoding='utf-8') as file:
-            existing_config = json.load(file)
-    
-    projects = existing_config.get("projects", [])
-    
-    # 检查是否已有相同路径的配置，若有则更新
-    for i, proj in enumerate(projects):
-        if proj["project_path"] == project["project_path"]:
-            projects[i] = project
-            break
-    else:
-        projects.append(project)
-    
-    with open(config_path, 'w', encoding='utf-8') as file:
-        json.dump({"projects": projects}, file, indent=4)
+class ConfigStore:
+    """
+    config.json 的内存缓存。
 
-def delete_config(project_path):
-    config_path = resource_path(DEFAULT_CONFIG_PATH)
-    if not os.path.exists(config_path):
-        return
+    解析后的配置按 project_path 建立索引，查找、更新和删除单个项目都不需要遍历项目列表；
+    每次访问只 stat 一次配置文件，文件的 mtime、大小或 inode 变化（如被另一个实例改写）时才重新解析。
+    写入时持有文件锁，先在锁内重新加载以合并其他实例的修改，再写入临时文件并原子地重命名为 config.json，
+    其他进程不会读到写了一半的配置。
+    """
+    def __init__(self, config_path):
+        """
+        :param config_path: 配置文件路径
+        """
+        self.config_path = config_path
+        self.lock_path = config_path + LOCK_SUFFIX
+        self._config = {"projects": []}
+        self._index = {}  # project_path -> 在 projects 中的下标
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.config_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _set_config(self, config, signature):
+        projects = config.setdefault("projects", [])
+        self._config = config
+        self._index = {project["project_path"]: i for i, project in enumerate(projects)}
+        self._signature = signature
+
+    def _refresh(self):
+        """文件变化时重新解析；文件不存在时返回 False"""
+        signature = self._stat_signature()
+        if signature is None:
+            self._set_config({"projects": []}, None)
+            return False
+        if signature != self._signature:
+            with open(self.config_path, 'r', encoding='utf-8') as file:
+                self._set_config(json.load(file), signature)
+        return True
+
+    def _write(self, config):
+        """写入临时文件后原子地替换配置文件，调用方需持有文件锁"""
+        temp_path = f"{self.config_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(config, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.config_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._set_config(config, self._stat_signature())
+
+    @contextmanager
+    def _update(self):
+        """在文件锁内读取最新的配置，修改后原子地写回"""
+        with self._lock, _file_lock(self.lock_path):
+            self._refresh()
+            config = dict(self._config)
+            config["projects"] = list(self._config["projects"])
+            yield config
+            self._write(config)
+
+    def exists(self):
+        return self._stat_signature() is not None
+
+    def ensure_exists(self):
+        """配置文件不存在时写入默认配置"""
+        with self._lock, _file_lock(self.lock_path):
+            if not self._refresh():
+                self._write(get_default_config())
+
+    def projects(self):
+        """返回所有项目配置的副本列表"""
+        with self._lock:
+            self._refresh()
+            return [_copy_project(project) for project in self._config["projects"]]
 
-    with open(config_path, 'r', encoding='utf-8') as file:
-        existing_config = json.load(file)
-    
-    projects = existing_config.get("projects", [])
-    projects = [proj for proj in projects if proj["project_path"] != project_path]
+    def get(self, project_path):
+        """按路径查找项目配置，找不到时返回 None"""
+        with self._lock:
+            self._refresh()
+            i = self._index.get(project_path)
+            return _copy_project(self._config["projects"][i]) if i is not None else None
 
-    with open(config_path, 'w', encoding='utf-8') as file:
-        json.dump({"projects": projects}, file, indent=4)
+    def config(self):
+        """返回完整配置的副本"""
+        with self._lock:
+            self._refresh()
+            config = dict(self._config)
+            config["projects"] = [_copy_project(project) for project in self._config["projects"]]
+            return config
+
+    def save(self, project):
+        """新增或更新一个项目的配置（按 project_path 匹配）"""
+        with self._update() as config:
+            i = self._index.get(project["project_path"])
+            if i is None:
+                config["projects"].append(_copy_project(project))
+            else:
+                config["projects"][i] = _copy_project(project)
+
+    def delete(self, project_path):
+        """删除一个项目的配置，不存在时不修改文件"""
+        if not self.exists():
+            return
+        with self._update() as config:
+            i = self._index.get(project_path)
+            if i is not None:
+                del config["projects"][i]
+
+    def replace(self, config):
+        """用新的配置整体替换（导入配置时）"""
+        with self._lock, _file_lock(self.lock_path):
+            self._write(config)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(config_path=None):
+    """返回配置文件对应的 ConfigStore，同一路径共享一个缓存"""
+    config_path = os.path.abspath(config_path or resource_path(DEFAULT_CONFIG_PATH))
+    with _stores_lock:
+        store = _stores.get(config_path)
+        if store is None:
+            store = _stores[config_path] = ConfigStore(config_path)
+        return store
+
+def read_config(config_path=None):
+    store = get_store(config_path)
+    # 生成默认配置
+    store.ensure_exists()
+    return store.projects()
+
+def save_config(project):
+    get_store().save(project)
+
+def delete_config(project_path):
+    get_store().delete(project_path)
 
 def export_config(export_path):
-    # Load current configuration
-    config_path = resource_path(DEFAULT_CONFIG_PATH)
-    if not os.path.exists(config_path):
-        config_data = get_default_config()
-    else:
-        with open(config_path, 'r') as config_file:
-            config_data = config_file.read()
-
-    # Write to the specified export path
-    with open(export_path, 'w') as export_file:
-        export_file.write(config_data)
+    store = get_store()
+    config_data = store.config() if store.exists() else get_default_config()
+    with open(export_path, 'w', encoding='utf-8') as export_file:
+        json.dump(config_data, export_file, indent=4)
 
 def import_config(import_path):
     with open(import_path, 'r', encoding='utf-8') as file:
         imported_config = json.load(file)
-    
-    config_path = resource_path(DEFAULT_CONFIG_PATH)
-    with open(config_path, 'w', encoding='utf-8') as file:
-        json.dump(imported_config, file, indent=4)
 
-    return imported_config.get("projects", [])
+    store = get_store()
+    store.replace(imported_config)
+    return store.projects()
 
 def show_current_config(logger):
-    config_path = resource_path(DEFAULT_CONFIG_PATH)
-    if not os.path.exists(config_path):
+    store = get_store()
+    if not store.exists():
         logger.write("配置文件不存在\n")
-    with open(config_path, 'r', encoding='utf-8') as file:
-        config = json.load(file)
-        logger.write(f"当前配置：\n{json.dumps(config, indent=4)}\n")
+        return
+    logger.write(f"当前配置：\n{json.dumps(store.config(), indent=4)}\n")
@@ -0,0 +1,210 @@
+# delta.py
+
+import json
+import os
+import shutil
+import tarfile
+
+from backends import get_backend, check_level, AUTO_FORMAT, DEFAULT_FORMAT
+from manifest import file_entry, compute_fingerprint, load_manifest, write_manifest, MANIFEST_VERSION
+from packager import gather_files, package_files
+from parallel_gzip import DEFAULT_BLOCK_SIZE
+from rules import IGNORE_FILES
+from walker import DEFAULT_WALK_WORKERS
+
+# 增量包中记录删除列表和指纹链的成员
+DELTA_INFO_NAME = '.packer-delta.json'
+
+
+class DeltaChainError(Exception):
+    pass
+
+
+def delta_path(project_path, output_dir, fingerprint, suffix='.tar.gz'):
+    """返回增量包的输出路径，文件名中带有新状态的指纹前缀以免覆盖。"""
+    project_name = os.path.basename(os.path.normpath(project_path))
+    return os.path.join(output_dir, f"{project_name}.delta-{fingerprint[:12]}{suffix}")
+
+
+def _load_base_manifest(base):
+    """base 可以是压缩包路径（读取其旁边的清单）或清单文件本身的路径。"""
+    if base.endswith('.json'):
+        with open(base, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        # 与 load_manifest 相同，只接受当前版本的清单
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise DeltaChainError(f"不支持的清单版本 {manifest.get('version')}: {base}")
+        return manifest
+    manifest = load_manifest(base)
+    if manifest is None:
+        raise DeltaChainError(f"找不到基准压缩包的清单: {base}")
+    return manifest
+
+
+def _delta_backend(archive_format, base_manifest):
+    """
+    选择增量包的压缩格式：未指定或为 auto 时沿用基准压缩包的格式。
+
+    apply_deltas 用 tarfile 读取增量包，因此只支持 tar 系列的格式。
+    """
+    if archive_format in (None, AUTO_FORMAT):
+        archive_format = base_manifest.get("settings", {}).get("format", DEFAULT_FORMAT)
+    backend = get_backend(archive_format)
+    if backend.name == 'zip':
+        raise ValueError("增量包只支持 tar 系列的压缩格式（tar.gz、tar.xz、tar.zst、tar）")
+    return backend
+
+
+def package_delta(project_path, extensions, exclude_dirs, base, output_dir,
+                  workers=1, block_size=DEFAULT_BLOCK_SIZE,
+                  walk_workers=DEFAULT_WALK_WORKERS, ignore_files=IGNORE_FILES,
+                  archive_format=None, level=None):
+    """
+    相对上一次打包的清单，只打包新增和修改的文件，并记录被删除的文件。
+
+    增量包旁同样会写入清单，记录应用增量后的完整文件状态，可作为下一次增量的基准。
+
+    :param project_path: 项目目录的路径
+    :param extensions: 要打包的文件扩展名列表
+    :param exclude_dirs: 要排除的目录列表
+    :param base: 基准压缩包（或其清单文件）的路径
+    :param output_dir: 保存增量包的目录
+    :param workers: 压缩线程数，1 为单线程，0 表示使用全部 CPU 核心
+    :param block_size: 多线程压缩时每个压缩块的大小（字节）
+    :param walk_workers: 并行扫描目录的线程数
+    :param ignore_files: 遍历时读取的忽略文件名列表
+    :param archive_format: 压缩格式名，None 或 "auto" 表示沿用基准压缩包的格式；不支持 zip
+    :param level: 压缩级别，None 表示使用该格式的默认级别
+    :return: (增量包路径, {"added": [...], "modified": [...], "deleted": [...]})，没有变化时路径为 None
+    """
+    base_manifest = _load_base_manifest(base)
+    backend = _delta_backend(archive_format, base_manifest)
+    check_level(backend, level)
+    settings = dict(base_manifest.get("settings", {}))
+    settings.update({
+        "project_path": os.path.abspath(project_path),
+        "extensions": list(extensions),
+        "exclude_dirs": list(exclude_dirs),
+        "ignore_files": list(ignore_files),
+        "format": backend.name,
+        "level": level,
+    })
+    base_files = {entry[0]: entry for entry in base_manifest.get("files", [])}
+
+    files = list(gather_files(project_path, extensions, exclude_dirs, walk_workers=walk_workers, ignore_files=ignore_files))
+    entries = [file_entry(file, project_path) for file in files]
+
+    changes = {"added": [], "modified": [], "deleted": []}
+    changed_files = []
+    for file, entry in zip(files, entries):
+        previous = base_files.pop(entry[0], None)
+        if previous is None:
+            changes["added"].append(entry[0])
+        elif previous[1:] != entry[1:]:
+            changes["modified"].append(entry[0])
+        else:
+            continue
+        changed_files.append(file)
+    changes["deleted"] = sorted(base_files)
+
+    if not changed_files and not changes["deleted"]:
+        return None, changes
+
+    fingerprint = compute_fingerprint(entries, settings)
+    info = {
+        "base_fingerprint": base_manifest["fingerprint"],
+        "fingerprint": fingerprint,
+        "deleted": [path.replace(os.sep, '/') for path in changes["deleted"]],
+    }
+    output_path = package_files(
+        project_path, changed_files, output_dir, workers=workers, block_size=block_size,
+        archive_format=backend.name, level=level,
+        output_path=delta_path(project_path, output_dir, fingerprint, backend.suffix),
+        extra_members=[(DELTA_INFO_NAME, json.dumps(info, ensure_ascii=False).encode('utf-8'))]
+    )
+    write_manifest(output_path, project_path, entries, settings)
+    return output_path, changes
+
+
+def _safe_target(target_dir, member_path):
+    path = os.path.realpath(os.path.join(target_dir, member_path))
+    root = os.path.realpath(target_dir)
+    if os.path.commonpath([root, path]) != root:
+        raise DeltaChainError(f"增量包中的路径越界: {member_path}")
+    return path
+
+
+def _extract(tar, target_dir, members):
+    if hasattr(tarfile, 'data_filter'):
+        tar.extractall(target_dir, members=members, filter='data')
+    else:
+        for member in members:
+            _safe_target(target_dir, member.name)
+        tar.extractall(target_dir, members=members)
+
+
+def _unlink_existing(target_dir, members):
+    """
+    删除增量包将要覆盖的已有文件。
+
+    基准压缩包中去重的文件解压后互为硬链接，tarfile 会原地写入已有的文件，
+    不先删除就会同时改掉其他内容原本相同的文件。
+    """
+    for member in members:
+        if member.isdir():
+            continue
+        _safe_target(target_dir, member.name)
+        path = os.path.join(target_dir, member.name)
+        if os.path.lexists(path) and (os.path.islink(path) or not os.path.isdir(path)):
+            os.remove(path)
+
+
+def read_delta_info(delta_archive):
+    """读取增量包中的删除列表和指纹链信息。"""
+    with tarfile.open(delta_archive, 'r:*') as tar:
+        try:
+            member = tar.getmember(DELTA_INFO_NAME)
+        except KeyError:
+            raise DeltaChainError(f"不是增量包: {delta_archive}")
+        return json.load(tar.extractfile(member))
+
+
+def apply_deltas(base_archive, deltas, target_dir):
+    """
+    将基准压缩包解压到目标目录，再按顺序应用一串增量包，重建完整的文件树。
+
+    如果基准压缩包旁有清单，会校验增量链的指纹是否首尾相接。
+
+    :param base_archive: 基准压缩包路径
+    :param deltas: 按生成顺序排列的增量包路径列表
+    :param target_dir: 重建文件树的目标目录
+    :return: 目标目录路径
+    """
+    base_manifest = load_manifest(base_archive)
+    expected = base_manifest["fingerprint"] if base_manifest else None
+
+    # 先校验整条增量链，避免应用到一半才发现断链
+    infos = []
+    for delta in deltas:
+        info = read_delta_info(delta)
+        if expected is not None and info["base_fingerprint"] != expected:
+            raise DeltaChainError(f"增量包 {delta} 与前一个压缩包的指纹不匹配")
+        expected = info["fingerprint"]
+        infos.append(info)
+
+    os.makedirs(target_dir, exist_ok=True)
+    with tarfile.open(base_archive, 'r:*') as tar:
+        _extract(tar, target_dir, tar.getmembers())
+
+    for delta, info in zip(deltas, infos):
+        for path in info["deleted"]:
+            full_path = _safe_target(target_dir, path)
+            if os.path.isdir(full_path) and not os.path.islink(full_path):
+                shutil.rmtree(full_path)
+            elif os.path.lexists(full_path):
+                os.remove(full_path)
+        with tarfile.open(delta, 'r:*') as tar:
+            members = [m for m in tar.getmembers() if m.name != DELTA_INFO_NAME]
+            _unlink_existing(target_dir, members)
+            _extract(tar, target_dir, members)
+    return target_dir
@@ -0,0 +1,180 @@
+# file_tree.py
+
+import os
+from itertools import islice
+
+
+class TreeNode:
+    """
+    文件树的节点。目录的 children 为 {名称: 节点} 字典，文件的 children 为 None；
+    目录的 file_count 和 size 为整棵子树的合计，在插入文件时累加。
+    """
+    __slots__ = ('name', 'parent', 'children', 'size', 'file_count', 'row', '_sorted')
+
+    def __init__(self, name, parent=None, is_dir=False):
+        self.name = name
+        self.parent = parent
+        self.children = {} if is_dir else None
+        self.size = 0
+        self.file_count = 0
+        self.row = 0  # 在父目录排序后的位置，供 Qt 模型计算父索引
+        self._sorted = None
+
+    @property
+    def is_dir(self):
+        return self.children is not None
+
+    def sorted_children(self):
+        """返回按名称排序的子节点列表，结果会被缓存。"""
+        if self._sorted is None:
+            self._sorted = [self.children[name] for name in sorted(self.children)]
+            for row, child in enumerate(self._sorted):
+                child.row = row
+        return self._sorted
+
+
+class FileTree:
+    """
+    打包文件的目录树，逐个插入文件，不使用递归，树的深度不受递归层数限制。
+    """
+    def __init__(self):
+        self.root = TreeNode('', is_dir=True)
+        self._dirs = {'': self.root}  # 目录相对路径 -> 节点，同一目录下的文件无需逐级查找
+
+    def __len__(self):
+        return self.root.file_count
+
+    def _dir_node(self, dir_path):
+        # 先向上找到已存在的最近上级目录，再逐级向下创建缺失的目录
+        missing = []
+        while dir_path not in self._dirs:
+            dir_path, _, name = dir_path.rpartition('/')
+            missing.append(name)
+        node = self._dirs[dir_path]
+        for name in reversed(missing):
+            dir_path = f"{dir_path}/{name}" if dir_path else name
+            parent = node
+            node = parent.children[name] = TreeNode(name, parent, is_dir=True)
+            parent._sorted = None
+            self._dirs[dir_path] = node
+        return node
+
+    def add(self, rel_path, size=0):
+        """
+        插入一个文件，并将大小累加到各级上级目录。
+
+        :param rel_path: 文件相对于项目根目录的路径
+        :param size: 文件大小（字节）
+        """
+        if os.sep != '/':
+            rel_path = rel_path.replace(os.sep, '/')
+        dir_path, _, name = rel_path.rpartition('/')
+        self._add_leaf(self._dirs.get(dir_path) or self._dir_node(dir_path), name, size)
+
+    def _add_leaf(self, node, name, size):
+        if name in node.children:
+            return
+        leaf = node.children[name] = TreeNode(name, node)
+        leaf.size = size
+        node._sorted = None
+        while node is not None:
+            node.file_count += 1
+            node.size += size
+            node = node.parent
+
+    @classmethod
+    def from_entries(cls, entries):
+        """
+        由清单条目构建文件树。
+
+        :param entries: manifest.file_entry 返回的条目列表
+        :return: FileTree
+        """
+        tree = cls()
+        for entry in entries:
+            tree.add(entry[0], entry[1])
+        return tree
+
+    @classmethod
+    def from_store(cls, store, skipped=()):
+        """
+        由 PathStore 构建文件树。文件按所在目录直接插入，每个目录只查找一次，不为每个文件拼接和拆分路径。
+
+        :param store: path_store.PathStore
+        :param skipped: 不放入文件树的包内路径（如未打包的文件）
+        :return: FileTree
+        """
+        tree = cls()
+        skipped = set(skipped)
+        nodes = {0: tree.root}  # DirNode.id -> TreeNode
+        for dir_node, name, size in store.iter_names():
+            if skipped and dir_node.rel_prefix + name in skipped:
+                continue
+            node = nodes.get(dir_node.id)
+            if node is None:
+                node = nodes[dir_node.id] = tree._dir_node(dir_node.rel_path.replace(os.sep, '/'))
+            tree._add_leaf(node, name, size)
+        return tree
+
+    @classmethod
+    def from_paths(cls, files, project_path):
+        """
+        由文件路径构建文件树（不统计大小）。
+
+        :param files: 文件路径列表
+        :param project_path: 项目目录的路径
+        :return: FileTree
+        """
+        tree = cls()
+        for file in files:
+            tree.add(os.path.relpath(file, start=project_path))
+        return tree
+
+
+def iter_tree_lines(tree):
+    """
+    以树形结构逐行产出文件树，使用显式栈遍历，不会构建完整的字符串。
+
+    :param tree: FileTree
+    :return: 逐行产出文本的生成器
+    """
+    stack = [(iter(tree.root.sorted_children()), len(tree.root.children), '')]
+    while stack:
+        children, remaining, prefix = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            continue
+        remaining -= 1
+        stack[-1] = (children, remaining, prefix)
+        last = remaining == 0
+        yield prefix + ('└── ' if last else '├── ') + node.name
+        if node.is_dir:
+            stack.append((iter(node.sorted_children()), len(node.children), prefix + ('    ' if last else '│   ')))
+
+
+def write_tree(tree, fileobj):
+    """
+    将文件树逐行写入文本文件对象。
+
+    :param tree: FileTree
+    :param fileobj: 可写的文本文件对象
+    """
+    for line in iter_tree_lines(tree):
+        fileobj.write(line + '\n')
+
+
+def tree_preview(tree, limit=None):
+    """
+    返回文件树的前 limit 行，超出部分以一行说明代替。
+
+    :param tree: FileTree
+    :param limit: 最多显示的行数，None 表示完整的文件树
+    :return: 文件树字符串
+    """
+    if limit is None:
+        return '\n'.join(iter_tree_lines(tree))
+    lines = list(islice(iter_tree_lines(tree), limit + 1))
+    if len(lines) > limit:
+        lines[limit:] = [f"...（仅显示前 {limit} 行，共 {len(tree)} 个文件）"]
+    return '\n'.join(lines)
@@ -0,0 +1,118 @@
+# file_tree_view.py
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTreeView, QHeaderView
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+
+from file_tree import FileTree
+from manifest import load_manifest, packed_entries
+from packager import format_size
+
+FETCH_BATCH = 500  # 每次展开时最多加载的子节点数，超大目录分批加载
+
+
+class FileTreeModel(QAbstractItemModel):
+    """
+    FileTree 的 Qt 数据模型。
+
+    子节点只在目录被展开时才排序并加载（canFetchMore / fetchMore），
+    未展开的目录不会产生任何行，几十万个文件的树也能立即显示。
+    """
+    HEADERS = ("名称", "文件数", "大小")
+
+    def __init__(self, tree, parent=None):
+        """
+        :param tree: 要显示的 FileTree
+        :param parent: 父对象
+        """
+        super().__init__(parent)
+        self.tree = tree
+        self._loaded = {}  # id(目录节点) -> 已加载的子节点数
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self.tree.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self._node(parent).sorted_children()[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.tree.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return self._loaded.get(id(self._node(parent)), 0)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        return node.is_dir and bool(node.children)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node.is_dir and self._loaded.get(id(node), 0) < len(node.children)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        loaded = self._loaded.get(id(node), 0)
+        count = min(FETCH_BATCH, len(node.sorted_children()) - loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent, loaded, loaded + count - 1)
+        self._loaded[id(node)] = loaded + count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return node.name
+            if index.column() == 1:
+                return str(node.file_count) if node.is_dir else ""
+            return format_size(node.size)
+        if role == Qt.TextAlignmentRole and index.column() > 0:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+
+def show_file_tree_dialog(parent, output_path):
+    """
+    根据压缩包的清单显示打包的文件树。
+
+    :param parent: 父窗口
+    :param output_path: 压缩包路径
+    """
+    manifest = load_manifest(output_path)
+    tree = FileTree.from_entries(packed_entries(manifest) if manifest else [])
+
+    dialog = QDialog(parent)
+    dialog.setWindowTitle(f"打包的文件列表（共 {len(tree)} 个文件，{format_size(tree.root.size)}）")
+    dialog.resize(700, 500)
+    layout = QVBoxLayout(dialog)
+
+    view = QTreeView()
+    # 所有行高度相同，视图只需绘制可见区域
+    view.setUniformRowHeights(True)
+    model = FileTreeModel(tree, view)
+    model.fetchMore(QModelIndex())
+    view.setModel(model)
+    view.header().setSectionResizeMode(0, QHeaderView.Stretch)
+    view.header().setStretchLastSection(False)
+    layout.addWidget(view)
+
+    dialog.exec_()
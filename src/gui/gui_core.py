@@ -3,7 +3,7 @@ import sys
 import subprocess  # 用于打开文件浏览器
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox,
-    QLineEdit, QTextEdit, QFrame, QScrollArea, QGridLayout, QGroupBox
+    QLineEdit, QTextEdit, QFrame, QScrollArea, QGridLayout, QGroupBox, QCheckBox
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QCursor, QFontMetrics, QDragEnterEvent, QDropEvent
@@ -18,6 +18,7 @@ from gui_functions.event_handlers import (
     browse_project_path_handler,
     add_exclude_dir_handler,
     package_code_handler,
+    toggle_watch_handler,
     delete_current_config_handler,
     reload_current_config_handler,
     export_current_config_handler,
@@ -25,6 +26,7 @@ from gui_functions.event_handlers import (
     show_current_config_handler
 )
 from gui_functions.open_directory import open_directory
+from gui_functions.watch_handling import stop_watch
 
 class SourceCodePackerGUI(QWidget):
     def __init__(self):
@@ -44,6 +46,7 @@ class SourceCodePackerGUI(QWidget):
         # 读取配置
         self.projects = read_config()
         self.project_paths = [project["project_path"] for project in self.projects]
+        self.projects_by_path = {project["project_path"]: project for project in self.projects}
 
         # 默认选择第一个项目
         self.selected_project = self.projects[0] if self.projects else None
@@ -145,6 +148,15 @@ class SourceCodePackerGUI(QWidget):
         open_folder_button.clicked.connect(lambda: self.open_folder())
         config_buttons_layout.addWidget(open_folder_button, alignment=Qt.AlignRight)
 
+        # 监视项目：维护文件索引，打包时不再遍历目录；勾选“自动打包”后文件变化时自动重新打包
+        self.watcher = None
+        self.watch_checkbox = QCheckBox("监视项目")
+        self.watch_checkbox.toggled.connect(lambda checked: toggle_watch_handler(self, checked))
+        config_buttons_layout.addWidget(self.watch_checkbox)
+
+        self.auto_repack_checkbox = QCheckBox("自动打包")
+        config_buttons_layout.addWidget(self.auto_repack_checkbox)
+
         # 添加打包按钮
         package_button = create_styled_button("打包源码", "green")
         package_button.clicked.connect(lambda: package_code_handler(self))
@@ -196,6 +208,17 @@ class SourceCodePackerGUI(QWidget):
         clear_log_button.clicked.connect(self.logger.clear)
         bottom_buttons_layout.addWidget(clear_log_button, alignment=Qt.AlignLeft)
 
+        # 取消正在进行的打包，打包开始时才可用
+        self.cancel_event = None
+        self.cancel_button = create_styled_button("取消打包")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_packaging)
+        bottom_buttons_layout.addWidget(self.cancel_button, alignment=Qt.AlignLeft)
+
+        # 打包进度（已处理文件数、吞吐量、预计剩余时间）
+        self.progress_label = QLabel("")
+        bottom_buttons_layout.addWidget(self.progress_label, 1)
+
         exit_button = create_styled_button("退出程序", "red")
         exit_button.clicked.connect(self.close)
         bottom_buttons_layout.addWidget(exit_button, alignment=Qt.AlignRight)
@@ -210,6 +233,18 @@ class SourceCodePackerGUI(QWidget):
         # 将窗口居中显示
         center_window(self)
 
+    def cancel_packaging(self):
+        """请求取消当前的打包任务，打包线程会在下一个检查点停止。"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.setEnabled(False)
+            self.logger.write("正在取消打包...")
+
+    def closeEvent(self, event):
+        """关闭窗口时停止监视线程"""
+        stop_watch(self)
+        super().closeEvent(event)
+
     def dragEnterEvent(self, event: QDragEnterEvent):
         """处理拖入事件"""
         if event.mimeData().hasUrls():
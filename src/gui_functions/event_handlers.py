@@ -6,17 +6,27 @@ from PyQt5.QtWidgets import QMessageBox, QFileDialog
 from .extension_handlers import add_extension, initialize_extensions
 from .exclude_handlers import add_exclude_dir as add_exclude_dir_to_gui
 from .packaging_handling import on_package_button_click
+from .watch_handling import start_watch, stop_watch
 from config import save_config, delete_config, read_config, export_config, import_config, show_current_config
 
+def set_projects(gui, projects):
+    """更新界面使用的项目列表，并按路径建立索引"""
+    gui.projects = projects
+    gui.project_paths = [project["project_path"] for project in projects]
+    gui.projects_by_path = {project["project_path"]: project for project in projects}
+
+
 def load_project_config_handler(gui):
     """根据选择的项目加载配置"""
+    # 切换项目后原来的文件索引不再适用
+    gui.watch_checkbox.setChecked(False)
     gui.clear_current_config()  # 清空当前显示的配置
     selected_path = gui.project_path_combo.currentText()
-    for project in gui.projects:
-        if project["project_path"] == selected_path:
-            gui.selected_project = project
-            gui.load_project_details()  # 加载新的项目详情
-            return  # 找到匹配的项目后立即返回
+    project = gui.projects_by_path.get(selected_path)
+    if project is not None:
+        gui.selected_project = project
+        gui.load_project_details()  # 加载新的项目详情
+        return
 
     # 如果未找到项目配置，则设置为临时状态
     gui.selected_project = {
@@ -61,13 +71,13 @@ def add_exclude_dir_handler(gui):
     if not gui.selected_project:
         gui.temp_exclude_dirs = [d.strip() for d in gui.exclude_dirs_entry.text().split(";") if d.strip()]
 
-def package_code_handler(gui):
-    """处理打包按钮的点击事件"""
+def current_project(gui):
+    """返回当前界面上的项目配置，未选择项目或没有扩展名时提示错误并返回 None"""
     project_path = gui.project_path_combo.currentText().strip()
 
     if not project_path:
         QMessageBox.critical(gui, "错误", "请先选择或配置一个项目路径")
-        return
+        return None
     
     project = {
         "project_path": project_path,
@@ -80,9 +90,27 @@ def package_code_handler(gui):
 
     if not project["file_extensions"]:
         QMessageBox.critical(gui, "错误", "请先添加至少一个文件扩展名")
-        return
+        return None
+    return project
+
+
+def package_code_handler(gui):
+    """处理打包按钮的点击事件"""
+    project = current_project(gui)
+    if project is not None:
+        on_package_button_click(gui, project, gui.logger)
 
-    on_package_button_click(gui, project, gui.logger)
+
+def toggle_watch_handler(gui, enabled):
+    """勾选“监视项目”时为当前项目建立文件索引，取消勾选时停止监视"""
+    if not enabled:
+        stop_watch(gui)
+        return
+    project = current_project(gui)
+    if project is None:
+        gui.watch_checkbox.setChecked(False)
+        return
+    start_watch(gui, project)
 
 
 def save_current_config_handler(gui):
@@ -110,8 +138,7 @@ def save_current_config_handler(gui):
     QMessageBox.information(gui, "提示", f"配置已保存到: {project_path}")
 
     # 更新配置列表
-    gui.projects = read_config()
-    gui.project_paths = [project["project_path"] for project in gui.projects]
+    set_projects(gui, read_config())
     gui.project_path_combo.clear()
     gui.project_path_combo.addItems(gui.project_paths)
     gui.project_path_combo.setCurrentText(project_path)  # 重新选择保存的项目
@@ -130,8 +157,7 @@ def delete_current_config_handler(gui):
     QMessageBox.information(gui, "提示", f"配置已从 {project_path} 中删除")
 
     # 更新配置
-    gui.projects = read_config()
-    gui.project_paths = [project["project_path"] for project in gui.projects]
+    set_projects(gui, read_config())
     gui.project_path_combo.clear()
     gui.project_path_combo.addItems(gui.project_paths)
     if gui.project_paths:
@@ -150,19 +176,16 @@ def reload_current_config_handler(gui):
         return
 
     # 重新读取最新的配置
-    projects = read_config()
-    gui.projects = projects
-    gui.project_paths = [project["project_path"] for project in gui.projects]
+    set_projects(gui, read_config())
     gui.project_path_combo.clear()
     gui.project_path_combo.addItems(gui.project_paths)
 
     # 检查该路径是否在最新的配置中
-    for project in projects:
-        if project["project_path"] == project_path:
-            gui.clear_current_config()
-            gui.selected_project = project
-            gui.load_project_details()  # 加载新的项目详情
-            break
+    project = gui.projects_by_path.get(project_path)
+    if project is not None:
+        gui.clear_current_config()
+        gui.selected_project = project
+        gui.load_project_details()  # 加载新的项目详情
     else:
         gui.selected_project = None
         QMessageBox.critical(gui, "错误", "项目路径未在配置中找到，请先保存配置")
@@ -188,9 +211,7 @@ def import_config_handler(gui):
         return  # 用户取消了文件选择
 
     try:
-        projects = import_config(import_path)
-        gui.projects = projects
-        gui.project_paths = [project["project_path"] for project in projects]
+        set_projects(gui, import_config(import_path))
         gui.project_path_combo.clear()
         gui.project_path_combo.addItems(gui.project_paths)
 
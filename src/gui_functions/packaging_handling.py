@@ -6,13 +6,18 @@ from PyQt5.QtWidgets import QMessageBox, QDialog, QLabel, QPushButton, QVBoxLayo
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFontMetrics
 from .open_directory import open_directory
+from gui.file_tree_view import show_file_tree_dialog
 from .validate_exclude_dir import validate_exclude_dir, InvalidSubdirectoryException
-from packager import run_packaging
+from packager import run_packaging, packaging_options
+from progress import format_event, WALK_STARTED, WALK_FINISHED
+from rules import is_pattern
 import platform
 
-def on_package_button_click(root, project, logger):
+def on_package_button_click(root, project, logger, auto=False):
     """
     处理打包按钮的点击事件。
+
+    :param auto: 由监视模式自动触发，完成后只写日志，不弹出对话框
     """
     if not project["project_path"]:
         QMessageBox.critical(root, "错误", "未选择有效的项目路径。")
@@ -29,26 +34,69 @@ def on_package_button_click(root, project, logger):
     valid_exclude_dirs = []
     try:
         for sub_dir in project.get("exclude_dirs", []):
-            validate_exclude_dir(sub_dir, updated_project_path)
+            # 通配/忽略规则（如 "**/node_modules"）不对应具体目录，无需校验
+            if not is_pattern(sub_dir):
+                validate_exclude_dir(sub_dir, updated_project_path)
             valid_exclude_dirs.append(sub_dir)
     except InvalidSubdirectoryException as e:
         QMessageBox.critical(root, "错误", str(e))
         return  # 如果有任何一个目录无效，停止打包操作
 
-    logger.clear()
+    if not auto:
+        logger.clear()
     logger.write("开始打包...\n")
 
+    options = packaging_options(project)
+    # 监视中的项目直接使用内存中的文件索引，无需重新遍历目录
+    watcher = getattr(root, "watcher", None)
+    file_source = None
+    if watcher is not None and watcher.matches(updated_project_path, valid_extensions, valid_exclude_dirs,
+                                               options["ignore_files"]):
+        file_source = watcher.files
+
     result_queue = queue.Queue()
+    # 进度事件由打包线程放入队列，在主线程的定时器中处理
+    progress_queue = queue.Queue()
+    # 点击“取消打包”后设置，打包线程在遍历、读取和压缩的检查点响应
+    cancel_event = threading.Event()
+    root.cancel_event = cancel_event
+    main_cancel_button = getattr(root, "cancel_button", None)
+    if main_cancel_button is not None:
+        main_cancel_button.setEnabled(True)
 
     # 启动一个新线程来执行打包过程
-    threading.Thread(target=run_packaging, args=(updated_project_path, valid_extensions, valid_exclude_dirs, result_queue)).start()
+    threading.Thread(
+        target=run_packaging,
+        args=(updated_project_path, valid_extensions, valid_exclude_dirs, result_queue),
+        kwargs=dict(options, progress=progress_queue.put, cancel=cancel_event, file_source=file_source)
+    ).start()
+
+    def show_progress():
+        latest = None
+        while True:
+            try:
+                event = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event["event"] in (WALK_STARTED, WALK_FINISHED):
+                logger.write(format_event(event))
+            latest = event
+        progress_label = getattr(root, "progress_label", None)
+        if latest is not None and progress_label is not None:
+            progress_label.setText(format_event(latest) or "")
 
     def check_result():
+        show_progress()
         try:
             # 检查队列是否有消息
             result_message, output_path = result_queue.get_nowait()
+            if root.cancel_event is cancel_event:
+                root.cancel_event = None
+                if main_cancel_button is not None:
+                    main_cancel_button.setEnabled(False)
             logger.write(result_message + "\n")
-            if output_path:
+            # 上传到 upload_url 时本地没有压缩包可以打开，只写日志
+            if output_path and not auto and not options["sink"]:
                 # 弹出确认对话框
                 confirmation_dialog = QDialog(root)
                 confirmation_dialog.setWindowTitle("打包完成")
@@ -64,6 +112,9 @@ def on_package_button_click(root, project, logger):
                 open_button.clicked.connect(lambda: open_and_select_file(output_path))
                 open_button.clicked.connect(confirmation_dialog.accept)
 
+                tree_button = QPushButton("文件树")
+                tree_button.clicked.connect(lambda: show_file_tree_dialog(confirmation_dialog, output_path))
+
                 cancel_button = QPushButton("取消")
                 cancel_button.clicked.connect(confirmation_dialog.reject)
 
@@ -71,10 +122,13 @@ def on_package_button_click(root, project, logger):
                 font_metrics = QFontMetrics(open_button.font())
                 open_button_width = font_metrics.horizontalAdvance(open_button.text()) + 50  # 添加一些内边距
                 cancel_button_width = font_metrics.horizontalAdvance(cancel_button.text()) + 50  # 添加一些内边距
+                tree_button_width = font_metrics.horizontalAdvance(tree_button.text()) + 50  # 添加一些内边距
                 open_button.setFixedWidth(open_button_width)
                 cancel_button.setFixedWidth(cancel_button_width)
+                tree_button.setFixedWidth(tree_button_width)
 
                 button_layout.addWidget(open_button)
+                button_layout.addWidget(tree_button)
                 button_layout.addWidget(cancel_button)
 
                 layout.addWidget(button_frame)
@@ -0,0 +1,78 @@
+# watch_handling.py
+import queue
+from PyQt5.QtCore import QTimer
+from packager import packaging_options
+from watcher import ProjectWatcher
+from .packaging_handling import on_package_button_click
+
+WATCH_CHECK_INTERVAL_MS = 500  # 主线程检查文件变化的间隔
+
+
+def start_watch(root, project):
+    """
+    开始监视项目：在后台建立文件索引，之后的打包直接使用索引中的文件列表。
+    监视线程把变化放入队列，由主线程的定时器取出，开启“自动打包”时重新打包。
+    """
+    stop_watch(root)
+    changes = queue.Queue()
+    watcher = ProjectWatcher(
+        project["project_path"].strip(),
+        [ext.strip() for ext in project.get("file_extensions", [])],
+        project.get("exclude_dirs", []),
+        ignore_files=packaging_options(project)["ignore_files"],
+        on_change=changes.put
+    ).start()
+    root.watcher = watcher
+    root.watch_project = project
+    root.watch_changes = changes
+    root.watch_pending = []
+    root.watch_announced = False
+    root.logger.write(f"开始监视: {project['project_path']}")
+
+    timer = QTimer(root)
+    timer.timeout.connect(lambda: check_watch(root))
+    timer.start(WATCH_CHECK_INTERVAL_MS)
+    root.watch_timer = timer
+
+
+def stop_watch(root):
+    """停止监视并丢弃索引。"""
+    timer = getattr(root, "watch_timer", None)
+    if timer is not None:
+        timer.stop()
+        root.watch_timer = None
+    watcher = getattr(root, "watcher", None)
+    if watcher is not None:
+        watcher.stop()
+        root.watcher = None
+        root.logger.write(f"停止监视: {watcher.project_path}")
+
+
+def check_watch(root):
+    watcher = root.watcher
+    if watcher is None:
+        return
+    if not root.watch_announced and watcher.wait_ready(0):
+        root.watch_announced = True
+        if watcher.error is not None:
+            root.logger.write(f"无法建立文件索引: {watcher.error}")
+            stop_watch(root)
+            return
+        if watcher.fallback_reason:
+            root.logger.write(f"inotify 不可用（{watcher.fallback_reason}），改为定期扫描")
+        root.logger.write(f"文件索引已建立（{watcher.mode}）: {len(watcher)} 个文件")
+
+    while True:
+        try:
+            root.watch_pending += root.watch_changes.get_nowait()
+        except queue.Empty:
+            break
+    auto_checkbox = getattr(root, "auto_repack_checkbox", None)
+    if not root.watch_pending or auto_checkbox is None or not auto_checkbox.isChecked():
+        root.watch_pending = []
+        return
+    if root.cancel_event is not None:
+        return  # 正在打包，结束后再处理积累的变化
+    changed, root.watch_pending = root.watch_pending, []
+    root.logger.write(f"{len(changed)} 个文件发生变化，自动重新打包")
+    on_package_button_click(root, root.watch_project, root.logger, auto=True)
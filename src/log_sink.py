@@ -0,0 +1,79 @@
+# log_sink.py
+
+import os
+import tempfile
+import threading
+from collections import deque
+
+DEFAULT_CAPACITY = 5000  # 界面中保留的日志行数
+# 文件名带进程号，同时运行的多个实例不会互相截断日志
+DEFAULT_SPILL_PATH = os.path.join(tempfile.gettempdir(), f"source_code_packer-{os.getpid()}.log")
+
+
+class LogSink:
+    """
+    有界的日志缓冲区，不依赖 PyQt5。
+
+    write 可以在任意线程中调用，只做追加，不触碰界面：
+    - 最近 capacity 行保存在环形缓冲区中，内存占用固定；
+    - 自上次 drain 以来的新日志暂存在待显示队列中（同样有上限，超出的行只计数），
+      由界面的定时器一次性取出批量显示；
+    - 指定 spill_path 时，全部日志同时写入磁盘文件，界面中被丢弃的行可以在文件中查看。
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, spill_path=None):
+        """
+        :param capacity: 环形缓冲区和待显示队列的最大行数
+        :param spill_path: 完整日志的保存路径，为空时不写入磁盘
+        """
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=capacity)
+        self._pending = deque(maxlen=capacity)
+        self._dropped = 0
+        self._spill = open(spill_path, 'w', encoding='utf-8') if spill_path else None
+
+    def write(self, message):
+        """追加一条日志，多行消息按行拆分。"""
+        lines = message.rstrip('\n').split('\n')
+        with self._lock:
+            overflow = len(self._pending) + len(lines) - self.capacity
+            if overflow > 0:
+                self._dropped += overflow
+            self._lines.extend(lines)
+            self._pending.extend(lines)
+            if self._spill:
+                self._spill.write('\n'.join(lines) + '\n')
+
+    def drain(self):
+        """
+        取出自上次调用以来的新日志，并将完整日志刷新到磁盘。
+
+        :return: (新日志行列表, 因超出上限未能显示的行数)
+        """
+        with self._lock:
+            lines = list(self._pending)
+            dropped = self._dropped
+            self._pending.clear()
+            self._dropped = 0
+            if self._spill:
+                self._spill.flush()
+        return lines, dropped
+
+    def lines(self):
+        """返回环形缓冲区中保留的最近日志。"""
+        with self._lock:
+            return list(self._lines)
+
+    def clear(self):
+        """清空缓冲区；磁盘上的完整日志不受影响。"""
+        with self._lock:
+            self._lines.clear()
+            self._pending.clear()
+            self._dropped = 0
+
+    def close(self):
+        with self._lock:
+            if self._spill:
+                self._spill.close()
+                self._spill = None
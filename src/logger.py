@@ -1,15 +1,31 @@
 # logger.py
 
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QFont
 
+from log_sink import LogSink, DEFAULT_CAPACITY, DEFAULT_SPILL_PATH
+
+FLUSH_INTERVAL_MS = 100  # 批量刷新日志显示的间隔
+
+
 class ConsoleLogger:
     """
     自定义日志记录器，用于将日志输出到 GUI 中的文本框。
+
+    write 只把消息追加到 LogSink，由定时器每 FLUSH_INTERVAL_MS 毫秒将新日志合并为一次更新，
+    文本框最多保留 capacity 行，大量日志输出时界面仍能保持响应。
     """
-    def __init__(self, text_widget):
+    def __init__(self, text_widget, capacity=DEFAULT_CAPACITY, spill_path=DEFAULT_SPILL_PATH):
+        """
+        :param text_widget: 显示日志的 QTextEdit
+        :param capacity: 文本框中保留的最大行数
+        :param spill_path: 完整日志的保存路径，为空时不写入磁盘
+        """
         self.text_widget = text_widget
         self.text_widget.setReadOnly(True)
-        self.log_queue = []
+        # 超出的旧行由 QTextDocument 自动丢弃
+        self.text_widget.document().setMaximumBlockCount(capacity)
+        self.sink = LogSink(capacity, spill_path)
 
         # 设置字体，确保支持树形结构字符
         font = QFont()
@@ -17,19 +33,33 @@ class ConsoleLogger:
         font.setFamily("Courier New, Courier, Monospace")
         self.text_widget.setFont(font)
 
+        self.timer = QTimer(text_widget)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(FLUSH_INTERVAL_MS)
+
     def write(self, message):
         if message != '\n':  # 排除多余的换行
-            self.log_queue.append(message)
-            self.text_widget.setReadOnly(False)
-            self.text_widget.append(message)
-            self.text_widget.verticalScrollBar().setValue(self.text_widget.verticalScrollBar().maximum())
-            self.text_widget.setReadOnly(True)
+            self.sink.write(message)
 
     def flush(self):
-        pass
+        """将积压的日志一次性追加到文本框。"""
+        lines, dropped = self.sink.drain()
+        if not lines:
+            return
+        if dropped:
+            note = f"...已省略 {dropped} 行"
+            if self.sink.spill_path:
+                note += f"，完整日志见 {self.sink.spill_path}"
+            lines.insert(0, note + "...")
+
+        scroll_bar = self.text_widget.verticalScrollBar()
+        # 用户向上翻看日志时不强制滚动到底部
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum() - 4
+        self.text_widget.append("\n".join(lines))
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
 
     def clear(self):
         """清空日志显示区域。"""
-        self.text_widget.setReadOnly(False)
+        self.sink.clear()
         self.text_widget.clear()
-        self.text_widget.setReadOnly(True)
@@ -0,0 +1,132 @@
+# manifest.py
+
+import hashlib
+import json
+import os
+
+MANIFEST_SUFFIX = '.manifest.json'
+MANIFEST_VERSION = 1
+
+
+def manifest_path(archive_path):
+    """返回压缩包对应的清单文件路径（与压缩包放在一起）。"""
+    return archive_path + MANIFEST_SUFFIX
+
+
+def file_entry(file, project_path):
+    """
+    记录单个文件的元数据，只调用 lstat，不读取文件内容。
+
+    :param file: 文件路径
+    :param project_path: 项目目录的路径
+    :return: [包内路径, 大小, mtime_ns, inode]
+    """
+    st = os.lstat(file)
+    return [os.path.relpath(file, start=project_path), st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def compute_fingerprint(entries, settings, presorted=False):
+    """
+    根据文件元数据和打包设置计算指纹，与文件的遍历顺序无关。
+
+    :param entries: file_entry 返回的条目列表
+    :param settings: 影响压缩包内容的打包设置
+    :param presorted: entries 已按包内路径排序（如排序后的 PathStore.entries()），不再复制排序，可以是生成器
+    :return: 十六进制的指纹字符串
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    for entry in (entries if presorted else sorted(entries)):
+        digest.update(json.dumps(entry).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def load_manifest(archive_path):
+    """
+    读取压缩包的清单，清单不存在或已损坏时返回 None。
+
+    :param archive_path: 压缩包路径
+    :return: 清单字典或 None
+    """
+    try:
+        with open(manifest_path(archive_path), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def write_manifest(archive_path, project_path, entries, settings, skipped=(), digest=None, fingerprint=None):
+    """
+    在压缩包旁写入清单，记录每个文件的元数据、指纹以及压缩包本身的状态。
+
+    文件条目逐条写入，不在内存中构建完整的清单字符串。
+
+    :param archive_path: 压缩包路径
+    :param project_path: 项目目录的路径
+    :param entries: file_entry 返回的条目列表（遍历到的全部文件，用于计算指纹）
+    :param settings: 影响压缩包内容的打包设置
+    :param skipped: 按大小上限或二进制检测未打包的文件（包内路径）
+    :param digest: 压缩包的 sha256 摘要（确定性模式下生成）
+    :param fingerprint: 已计算的指纹；给出时 entries 须已按包内路径排序，可以是生成器（如 PathStore.entries()）
+    :return: 清单字典（不含文件列表，文件列表可由 load_manifest 读取）
+    """
+    if fingerprint is None:
+        entries = sorted(entries)
+        fingerprint = compute_fingerprint(entries, settings, presorted=True)
+    st = os.stat(archive_path)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "project_path": project_path,
+        "settings": settings,
+        "fingerprint": fingerprint,
+        "archive": {"size": st.st_size, "mtime_ns": st.st_mtime_ns},
+    }
+    if skipped:
+        manifest["skipped"] = sorted(skipped)
+    if digest:
+        manifest["archive"]["sha256"] = digest
+    tmp_path = manifest_path(archive_path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        # 先写其余字段，再逐条写入 "files"，结果与 json.dump 整个清单等价
+        file.write(json.dumps(manifest, ensure_ascii=False)[:-1] + ', "files": [')
+        for i, entry in enumerate(entries):
+            file.write((', ' if i else '') + json.dumps(entry, ensure_ascii=False))
+        file.write(']}')
+    os.replace(tmp_path, manifest_path(archive_path))
+    return manifest
+
+
+def packed_entries(manifest):
+    """
+    返回清单中实际写入压缩包的文件条目（去掉未打包的文件）。
+
+    :param manifest: load_manifest 返回的清单
+    :return: 条目列表
+    """
+    skipped = set(manifest.get("skipped", ()))
+    if not skipped:
+        return manifest["files"]
+    return [entry for entry in manifest["files"] if entry[0] not in skipped]
+
+
+def is_archive_current(archive_path, manifest, fingerprint):
+    """
+    判断已有压缩包是否可以直接复用：指纹一致，且压缩包自写入清单后未被改动。
+
+    :param archive_path: 压缩包路径
+    :param manifest: load_manifest 返回的清单
+    :param fingerprint: 本次遍历计算出的指纹
+    :return: 是否可以复用
+    """
+    if not manifest or manifest.get("fingerprint") != fingerprint:
+        return False
+    try:
+        st = os.stat(archive_path)
+    except OSError:
+        return False
+    archive = manifest.get("archive", {})
+    return st.st_size == archive.get("size") and st.st_mtime_ns == archive.get("mtime_ns")
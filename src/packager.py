@@ -1,47 +1,229 @@
 # packager.py
 
+import hashlib
 import os
-import tarfile
-from pathlib import Path
+import queue
+import threading
 import tempfile
+from contextlib import nullcontext
 
-def gather_files(project_path, extensions, exclude_dirs):
+from backends import get_backend, check_level, choose_backend, file_sha256, DEFAULT_FORMAT, AUTO_FORMAT, DEFAULT_AUTO_MIN_MBPS
+from cancellation import PackagingCancelled
+from file_tree import FileTree, iter_tree_lines, tree_preview
+from parallel_gzip import DEFAULT_BLOCK_SIZE
+from profiling import PackagingProfile
+from progress import as_reporter
+from manifest import compute_fingerprint, load_manifest, write_manifest, is_archive_current, manifest_path
+from path_store import PathStore
+from rules import RuleSet, IGNORE_FILES, GITIGNORE
+from scan_index import indexed_gather_files
+from sinks import CountingWriter, open_sink, sink_name
+from walker import scan_files, DEFAULT_WALK_WORKERS
+
+def gather_files(project_path, extensions, exclude_dirs, walk_workers=DEFAULT_WALK_WORKERS, ignore_files=IGNORE_FILES,
+                 cancel=None, with_stat=False):
     """
     收集项目路径中符合给定后缀的所有文件，排除指定的子目录。
 
     :param project_path: 项目目录的路径
-    :param extensions: 要包含的文件后缀列表
-    :param exclude_dirs: 要排除的子目录列表
-    :return: 要打包的文件路径列表
+    :param extensions: 要包含的文件后缀列表，也可以是通配模式（如 "src/**/*.h"）
+    :param exclude_dirs: 要排除的子目录列表，也可以是 .gitignore 风格的规则（如 "**/node_modules"）
+    :param walk_workers: 并行扫描目录的线程数，1 表示顺序扫描
+    :param ignore_files: 遍历时读取的忽略文件名列表
+    :param cancel: 可选的 threading.Event，设置后遍历抛出 PackagingCancelled
+    :param with_stat: 产出 (文件路径, os.stat_result) 而不是文件路径
+    :return: 逐个产出要打包的文件路径的生成器
+    """
+    rules = RuleSet(extensions, exclude_dirs, ignore_files)
+    return scan_files(project_path, rules, workers=walk_workers, cancel=cancel, with_stat=with_stat)
+
+_STREAM_DONE = object()
+
+def stream_files(files, maxsize=1024):
+    """
+    在后台线程中遍历 files，并通过有界队列逐个产出，使目录遍历与压缩并行进行。
+
+    队列满时遍历线程会阻塞等待，内存占用不会随文件数增长；
+    消费方提前退出时，遍历线程也会随之停止。
+
+    :param files: 文件路径的可迭代对象（通常是 gather_files 的生成器）
+    :param maxsize: 队列中最多缓存的文件数
+    :return: 逐个产出文件路径的生成器
     """
-    exclude_dirs_full = [os.path.join(project_path, exclude_dir) for exclude_dir in exclude_dirs]
-    files_to_package = []
-    for root, dirs, files in os.walk(project_path):
-        # 检查并排除子目录
-        dirs[:] = [d for d in dirs if os.path.join(root, d) not in exclude_dirs_full]
-        for file in files:
-            # 只收集指定扩展名的文件
-            if any(file.lower().endswith(ext) for ext in extensions):
-                files_to_package.append(os.path.join(root, file))
-    return files_to_package
+    file_queue = queue.Queue(maxsize)
+    stop = threading.Event()
+    error = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                file_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def walk():
+        try:
+            for file in files:
+                if not put(file):
+                    return
+        except Exception as e:
+            error.append(e)
+        put(_STREAM_DONE)
 
-def package_files(project_path, files, output_dir):
+    walker = threading.Thread(target=walk, name="gather-files", daemon=True)
+    walker.start()
+    try:
+        while True:
+            file = file_queue.get()
+            if file is _STREAM_DONE:
+                break
+            yield file
+        if error:
+            raise error[0]
+    finally:
+        stop.set()
+
+def archive_path(project_path, output_dir, suffix='.tar.gz', unique_name=False):
     """
-    将收集到的文件打包成一个 .tar.gz 压缩包。
+    返回项目压缩包的输出路径。
 
     :param project_path: 项目目录的路径
-    :param files: 要包含在包中的文件路径列表
     :param output_dir: 保存输出包的目录
-    :return: 创建的包的路径
+    :param suffix: 压缩包后缀，由压缩格式决定
+    :param unique_name: 在文件名中加入项目完整路径的短哈希，避免同名项目互相覆盖
+    :return: 压缩包路径
     """
     project_name = os.path.basename(os.path.normpath(project_path))
-    output_path = os.path.join(output_dir, f"{project_name}.tar.gz")
-    with tarfile.open(output_path, "w:gz") as tar:
-        for file in files:
-            arcname = os.path.relpath(file, start=project_path)
-            tar.add(file, arcname=arcname)
+    if unique_name:
+        path_hash = hashlib.sha1(os.path.abspath(project_path).encode('utf-8')).hexdigest()[:8]
+        project_name = f"{project_name}-{path_hash}"
+    return os.path.join(output_dir, f"{project_name}{suffix}")
+
+def package_files(project_path, files, output_dir, workers=1, block_size=DEFAULT_BLOCK_SIZE,
+                  output_path=None, extra_members=(), dedupe=True, stats=None,
+                  archive_format=DEFAULT_FORMAT, level=None, progress=None, cancel=None,
+                  max_file_size=None, skip_binary=False, deterministic=False, sink=None):
+    """
+    将收集到的文件打包成压缩包。
+
+    压缩包先写入同目录下的临时文件，成功后才原子地重命名为最终路径，
+    其他程序不会读到写了一半的压缩包；失败或取消时删除临时文件，原有的压缩包保持不变。
+    指定 sink 时压缩包边生成边写入 sink，不经过磁盘。
+
+    :param project_path: 项目目录的路径
+    :param files: 要包含在包中的文件路径（可以是生成器，边遍历边打包），也可以是 (文件路径, 包内路径)，
+                  或 path_store.PathStore（包内路径直接由目录前缀和文件名拼接，确定性模式下就地排序）
+    :param output_dir: 保存输出包的目录
+    :param workers: 压缩线程数，1 为单线程，0 表示使用全部 CPU 核心（仅 tar.gz）
+    :param block_size: 多线程压缩时每个压缩块的大小（字节）
+    :param output_path: 指定压缩包路径，默认为 output_dir 下的 <项目名><格式后缀>
+    :param extra_members: 额外写入包内的 (包内路径, 字节内容) 列表
+    :param dedupe: 内容完全相同的文件只保存第一份，其余写为指向它的硬链接（zip 不支持）
+    :param stats: 可选的字典，用于返回打包统计（去重的文件数与节省的字节数、未打包的文件）
+    :param archive_format: 压缩格式名，如 "tar.gz"、"tar.xz"、"tar.zst"、"zip"、"tar"
+    :param level: 压缩级别，None 表示使用该格式的默认级别
+    :param progress: 可选的 ProgressReporter，逐个文件汇报读取进度
+    :param cancel: 可选的 threading.Event，设置后在下一个检查点抛出 PackagingCancelled
+    :param max_file_size: 文件大小上限（字节），超过的文件不打包，None 表示不限制
+    :param skip_binary: 跳过二进制文件（开头 8000 字节中含 NUL 字节）
+    :param deterministic: 确定性模式：成员按路径排序，统一时间戳、属主和权限，相同的源文件得到逐字节相同的压缩包
+    :param sink: 可写的二进制文件对象（标准输出、socket、sinks.HttpUploadSink 等），只需 write 方法；
+                 写入阻塞时打包随之等待，内存占用不随压缩包大小增长。stats 中会写入 "archive_bytes"，
+                 确定性模式下还有 "sha256"
+    :return: 创建的包的路径，写入 sink 时为 None
+    """
+    backend = get_backend(archive_format)
+    if sink is not None:
+        return _package_to_sink(project_path, files, sink, backend, workers, block_size, extra_members, dedupe,
+                                stats, level, progress, cancel, max_file_size, skip_binary, deterministic)
+    if output_path is None:
+        output_path = archive_path(project_path, output_dir, backend.suffix)
+    temp_path = f"{output_path}.{os.getpid()}-{threading.get_ident()}.part"
+    if progress is not None:
+        progress.output_path = temp_path
+    files = _ordered_files(project_path, files, deterministic)
+    writer = backend.writer_class(project_path, dedupe, progress, cancel, max_file_size, skip_binary, deterministic)
+    try:
+        with backend.open(temp_path, level=level, workers=workers, block_size=block_size,
+                          deterministic=deterministic) as archive:
+            writer.add_all(archive, files, extra_members)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if progress is not None:
+        progress.output_path = output_path
+    _writer_stats(writer, stats)
     return output_path
 
+def _package_to_sink(project_path, files, sink, backend, workers, block_size, extra_members, dedupe, stats,
+                     level, progress, cancel, max_file_size, skip_binary, deterministic):
+    """package_files 写入文件对象的情形，参数同 package_files。"""
+    files = _ordered_files(project_path, files, deterministic)
+    output = CountingWriter(sink, hashing=deterministic)
+    if progress is not None:
+        progress.output_counter = output
+    writer = backend.writer_class(project_path, dedupe, progress, cancel, max_file_size, skip_binary, deterministic)
+    with backend.open(output, level=level, workers=workers, block_size=block_size,
+                      deterministic=deterministic) as archive:
+        writer.add_all(archive, files, extra_members)
+    output.flush()
+    _writer_stats(writer, stats)
+    if stats is not None:
+        stats["archive_bytes"] = output.bytes_written
+        if deterministic:
+            stats["sha256"] = output.hexdigest()
+    return None
+
+def _arcname(item, project_path):
+    return item[1] if isinstance(item, tuple) else os.path.relpath(item, start=project_path)
+
+def _ordered_files(project_path, files, deterministic):
+    """返回交给写入器的文件序列，确定性模式下按包内路径排序。"""
+    if isinstance(files, PathStore):
+        if deterministic:
+            files.sort()
+        return files.pairs()
+    if deterministic:
+        # 排序需要完整的文件列表，遍历与压缩不再并行
+        return sorted(files, key=lambda item: _arcname(item, project_path))
+    return files
+
+def _writer_stats(writer, stats):
+    if stats is not None:
+        stats["dedup_files"] = writer.dedup_files
+        stats["dedup_saved_bytes"] = writer.dedup_saved_bytes
+        stats["skipped_large"] = writer.skipped_large
+        stats["skipped_binary"] = writer.skipped_binary
+        stats["skipped_special"] = writer.skipped_special
+
+def digest_path(archive_path):
+    """返回压缩包对应的 sha256 摘要文件路径。"""
+    return archive_path + '.sha256'
+
+def write_digest(archive_path):
+    """
+    计算压缩包的 sha256 摘要，并以 sha256sum 的格式写入压缩包旁的摘要文件，
+    下游只需比较摘要即可判断缓存是否命中，无需传输压缩包本身。
+
+    :param archive_path: 压缩包路径
+    :return: 十六进制的摘要
+    """
+    digest = file_sha256(archive_path)
+    with open(digest_path(archive_path), 'w', encoding='utf-8') as file:
+        file.write(f"{digest}  {os.path.basename(archive_path)}\n")
+    return digest
+
+def format_size(num_bytes):
+    """将字节数格式化为便于阅读的字符串。"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(num_bytes) < 1024 or unit == 'GB':
+            return f"{num_bytes:.1f} {unit}" if unit != 'B' else f"{num_bytes} B"
+        num_bytes /= 1024
+
 def print_tree(files, project_path):
     """
     以树形结构打印打包的文件结构。
@@ -50,33 +232,56 @@ def print_tree(files, project_path):
     :param project_path: 项目目录的路径
     :return: 打包文件的树形结构字符串
     """
-    tree = {}
-    for file in files:
-        parts = Path(file).relative_to(project_path).parts
-        d = tree
-        for part in parts[:-1]:
-            d = d.setdefault(part, {})
-        d.setdefault(parts[-1], None)
-    
-    output = []
-    def print_dict(d, prefix=''):
-        """
-        递归打印目录结构。
-
-        :param d: 表示目录结构的字典
-        :param prefix: 当前的前缀，用于打印竖线
-        """
-        pointers = ['├── '] * (len(d) - 1) + ['└── ']
-        for pointer, (key, value) in zip(pointers, sorted(d.items())):
-            output.append(prefix + pointer + key)
-            if isinstance(value, dict):
-                extension = '│   ' if pointer == '├── ' else '    '
-                print_dict(value, prefix + extension)
-
-    print_dict(tree)
-    return '\n'.join(output)
-
-def run_packaging(project_path, extensions, exclude_dirs, result_queue):
+    return '\n'.join(iter_tree_lines(FileTree.from_paths(files, project_path)))
+
+def packaging_options(project):
+    """
+    将 config.json 中的项目配置转换为 run_packaging 的关键字参数，未配置的项使用默认值。
+
+    :param project: 项目配置字典
+    :return: 关键字参数字典
+    """
+    return {
+        "workers": project.get("compress_workers", 1),
+        "block_size": project.get("compress_block_kb", DEFAULT_BLOCK_SIZE // 1024) * 1024,
+        "walk_workers": project.get("walk_workers", DEFAULT_WALK_WORKERS),
+        "ignore_files": _ignore_files(project),
+        "reuse_unchanged": project.get("reuse_unchanged", True),
+        "dedupe": project.get("dedupe", True),
+        "archive_format": project.get("format", DEFAULT_FORMAT),
+        "level": project.get("compression_level"),
+        "auto_min_mbps": project.get("auto_min_mbps", DEFAULT_AUTO_MIN_MBPS),
+        "max_file_size": int(project["max_file_size_mb"] * 1024 * 1024) if project.get("max_file_size_mb") else None,
+        "skip_binary": project.get("skip_binary", False),
+        "deterministic": project.get("deterministic", False),
+        "profile": project.get("profile", False),
+        "profile_tools": tuple(project.get("profile_tools", ())),
+        "scan_index": project.get("scan_index", False),
+        "sink": project.get("upload_url"),
+        "tree_lines": project.get("tree_preview_lines"),
+    }
+
+def _ignore_files(project):
+    """项目配置中的忽略文件列表，开启 use_gitignore 时再加上 .gitignore。"""
+    ignore_files = list(project.get("ignore_files", IGNORE_FILES))
+    if project.get("use_gitignore") and GITIGNORE not in ignore_files:
+        ignore_files.insert(0, GITIGNORE)
+    return ignore_files
+
+def _index_note(walk_stats):
+    """目录索引命中情况的说明，写入结果消息。"""
+    return f"目录索引: {walk_stats['cached_dirs']}/{walk_stats['dirs']} 个目录未变化，未重新列出"
+
+def _phase(profiler, name):
+    """未开启性能统计时返回空的上下文管理器。"""
+    return profiler.phase(name) if profiler else nullcontext()
+
+def run_packaging(project_path, extensions, exclude_dirs, result_queue, workers=1, block_size=DEFAULT_BLOCK_SIZE,
+                  walk_workers=DEFAULT_WALK_WORKERS, ignore_files=IGNORE_FILES, reuse_unchanged=True, dedupe=True,
+                  archive_format=DEFAULT_FORMAT, level=None, auto_min_mbps=DEFAULT_AUTO_MIN_MBPS, output_dir=None,
+                  unique_name=False, progress=None, cancel=None, max_file_size=None, skip_binary=False,
+                  deterministic=False, profile=False, profile_tools=(), file_source=None, scan_index=False,
+                  sink=None, tree_lines=None):
     """
     执行打包过程，并将结果放入队列。
 
@@ -84,20 +289,212 @@ def run_packaging(project_path, extensions, exclude_dirs, result_queue):
     :param extensions: 要打包的文件扩展名列表
     :param exclude_dirs: 要排除的目录列表
     :param result_queue: 用于传递打包结果的队列
+    :param workers: 压缩线程数，1 为单线程，0 表示使用全部 CPU 核心
+    :param block_size: 多线程压缩时每个压缩块的大小（字节）
+    :param walk_workers: 并行扫描目录的线程数，1 表示顺序扫描
+    :param ignore_files: 遍历时读取的忽略文件名列表
+    :param reuse_unchanged: 文件与上次打包时完全一致时直接复用已有的压缩包
+    :param dedupe: 内容相同的文件只保存一份，其余写为硬链接
+    :param archive_format: 压缩格式名，"auto" 表示抽样比较后自动选择
+    :param level: 压缩级别，None 表示使用该格式的默认级别
+    :param auto_min_mbps: auto 模式下可接受的最低压缩速度 (MB/s)
+    :param output_dir: 保存压缩包的目录，默认为系统临时目录
+    :param unique_name: 在压缩包文件名中加入项目路径的短哈希，避免同名项目互相覆盖
+    :param progress: 进度订阅回调（参数为事件字典）或 ProgressReporter，见 progress.py
+    :param cancel: 可选的 threading.Event，设置后遍历、读取和压缩会尽快停止，不留下不完整的压缩包
+    :param max_file_size: 文件大小上限（字节），超过的文件不打包，None 表示不限制
+    :param skip_binary: 跳过二进制文件
+    :param deterministic: 生成可复现的压缩包，并在压缩包旁写入 sha256 摘要文件
+    :param profile: 统计各阶段的耗时和最慢的文件，写入压缩包旁的 .profile.json，并在结果消息中给出摘要
+    :param profile_tools: 同时启用的分析工具，可包含 "cprofile" 和 "tracemalloc"（需开启 profile）
+    :param file_source: 可选的无参函数，返回要打包的文件路径列表（如 ProjectWatcher.files），代替遍历目录
+    :param scan_index: 通过持久化的目录索引遍历，未变化的目录不再列出内容（见 scan_index.py）
+    :param sink: 压缩包的输出目标，不写入磁盘："-"（标准输出）、"tcp://主机:端口"、"http(s)://..."（分块上传），
+                 或可写的二进制文件对象，见 sinks.open_sink。此时不复用已有的压缩包，也不写清单和摘要文件，
+                 结果中的路径为目标的名称
+    :param tree_lines: 结果消息中文件树的最大行数，超出的部分以一行说明代替；None 表示完整的文件树
     """
+    profiler = None
     try:
-        files_to_package = gather_files(project_path, extensions, exclude_dirs)
-        
-        if not files_to_package:
+        if profile:
+            profiler = PackagingProfile(profile_tools)
+            profiler.start_tools()
+        output_dir = output_dir or tempfile.gettempdir()  # 默认使用临时目录
+        os.makedirs(output_dir, exist_ok=True)
+        reporter = as_reporter(progress)
+        walk_stats = {}
+        if file_source is not None:
+            # 监视模式：文件列表来自内存中的索引，无需遍历目录
+            files = file_source()
+        elif scan_index:
+            files = indexed_gather_files(project_path, extensions, exclude_dirs, walk_workers=walk_workers,
+                                         ignore_files=ignore_files, cancel=cancel, stats=walk_stats)
+        else:
+            files = gather_files(project_path, extensions, exclude_dirs, walk_workers=walk_workers,
+                                 ignore_files=ignore_files, cancel=cancel)
+        if profiler:
+            files = profiler.track_walk(files)
+        if reporter:
+            files = reporter.track_discovery(files)
+        # 遍历到的文件只保存在 PathStore 中：目录共享，文件名和元数据紧凑存放，供打包、清单、文件树和性能报告共用
+        store = PathStore(project_path)
+        add_file = profiler.timed("stat", store.add) if profiler else store.add
+        complete = False  # store 中是否已有完整的文件列表
+        stats = {}
+        notes = []
+
+        if archive_format == AUTO_FORMAT or file_source is not None:
+            # 需要完整的文件列表用于抽样，因此先完成遍历；来自索引的文件列表本身就是完整的
+            for file in files:
+                try:
+                    add_file(file)
+                except OSError:
+                    # 监视索引最后一次更新之后被删除的文件，与遍历时一样跳过
+                    continue
+            complete = True
+        if archive_format == AUTO_FORMAT:
+            backend, results = choose_backend(store.paths(), min_mbps=auto_min_mbps, workers=workers, level=level)
+            summary = ", ".join(f"{r['format']} {r['ratio']:.0%} {r['mbps']:.0f}MB/s" for r in results)
+            notes.append(f"自动选择压缩格式: {backend.name}（抽样结果: {summary}）")
+        else:
+            backend = get_backend(archive_format)
+            check_level(backend, level)
+        output_path = archive_path(project_path, output_dir, backend.suffix, unique_name=unique_name)
+
+        # 只有影响压缩包内容的设置才参与指纹计算
+        settings = {
+            "project_path": os.path.abspath(project_path),
+            "extensions": list(extensions),
+            "exclude_dirs": list(exclude_dirs),
+            "ignore_files": list(ignore_files),
+            "format": backend.name,
+            "level": level,
+            "dedupe": dedupe,
+            "max_file_size": max_file_size,
+            "skip_binary": skip_binary,
+            "deterministic": deterministic,
+        }
+        pack_options = {"workers": workers, "block_size": block_size, "dedupe": dedupe, "stats": stats,
+                        "archive_format": backend.name, "level": level, "output_path": output_path,
+                        "progress": reporter, "cancel": cancel,
+                        "max_file_size": max_file_size, "skip_binary": skip_binary,
+                        "deterministic": deterministic}
+
+        # 写入 sink 时接收方需要完整的压缩包，不复用磁盘上已有的
+        manifest = load_manifest(output_path) if reuse_unchanged and sink is None else None
+
+        def pack(files):
+            with _phase(profiler, "pack"):
+                if profiler:
+                    files = profiler.track_files(files.pairs() if isinstance(files, PathStore) else files)
+                if sink is None:
+                    package_files(project_path, files, output_dir, **pack_options)
+                    return
+                sink_file = open_sink(sink)
+                try:
+                    package_files(project_path, files, output_dir, sink=sink_file, **pack_options)
+                except BaseException:
+                    sink_file.abort()
+                    raise
+                sink_file.close()
+        if not complete and (deterministic or (manifest and os.path.exists(output_path))):
+            # 确定性模式需要按路径排序，复用检查需要指纹，都要先完成遍历
+            for file in files:
+                add_file(file)
+            complete = True
+        if complete:
+            store.sort()
+            # 已有完整文件列表时先计算指纹，未变化则不读取任何文件内容
+            if manifest and is_archive_current(output_path, manifest,
+                                               compute_fingerprint(store.entries(), settings, presorted=True)):
+                result_message = f"项目文件未变化，复用已有压缩包: {output_path}\n"
+                if walk_stats:
+                    result_message += _index_note(walk_stats) + "\n"
+                if manifest["archive"].get("sha256"):
+                    result_message += f"内容摘要 (sha256): {manifest['archive']['sha256']}\n"
+                if profiler:
+                    profiler.stop_tools()
+                    report_file, report = profiler.write(project_path, output_path, store)
+                    result_message += f"{PackagingProfile.summary(report)}\n性能报告: {report_file}\n"
+                file_tree = tree_preview(FileTree.from_store(store, manifest.get("skipped", ())), tree_lines)
+                result_message += f"打包的文件列表:\n{file_tree}"
+                if reporter:
+                    reporter.finish(output_path)
+                result_queue.put((result_message, output_path))
+                return
+            if store:
+                pack(store)
+        else:
+            def record(files):
+                # 在读取文件内容前记录元数据，供生成清单和文件树；包内路径随之交给写入器，不再重新计算
+                for file in files:
+                    yield file, store.rel_path(add_file(file))
+
+            # 遍历与压缩流水线并行：遍历线程找到文件后立即交给写入器
+            pack(record(stream_files(files)))
+
+        if not store:
+            if sink is None:
+                for path in (output_path, manifest_path(output_path), digest_path(output_path)):
+                    if os.path.exists(path):
+                        os.remove(path)
             result_queue.put(("没有文件需要打包。", None))
             return
-        
-        output_dir = tempfile.gettempdir()  # 获取临时目录
-        output_path = package_files(project_path, files_to_package, output_dir)
-        
-        file_tree = print_tree(files_to_package, project_path)
-        result_message = f"压缩包创建在: {output_path}\n打包的文件列表:\n{file_tree}"
-        
-        result_queue.put((result_message, output_path))
+
+        skipped = stats.get("skipped_large", []) + stats.get("skipped_binary", []) + stats.get("skipped_special", [])
+        digest = None
+        if sink is not None:
+            # 压缩包不在磁盘上，摘要在写入时计算，不写清单和摘要文件
+            digest = stats.get("sha256")
+            result_path = sink_name(sink)
+            result_message = f"压缩包已写入: {result_path}（{format_size(stats['archive_bytes'])}）\n"
+        else:
+            if deterministic:
+                with _phase(profiler, "digest"):
+                    digest = write_digest(output_path)
+            elif os.path.exists(digest_path(output_path)):
+                os.remove(digest_path(output_path))  # 旧的摘要文件已与新的压缩包不符
+            with _phase(profiler, "manifest"):
+                # 流水线打包时文件按遍历顺序加入，清单按包内路径排序后逐条写入
+                store.sort()
+                write_manifest(output_path, project_path, store.entries(), settings, skipped, digest,
+                               fingerprint=compute_fingerprint(store.entries(), settings, presorted=True))
+            result_path = output_path
+            result_message = f"压缩包创建在: {output_path}\n"
+        if reporter:
+            reporter.finish(result_path)
+        # 文件树直接由 PathStore 按目录构建；设置了 tree_lines 时只取前几行放入结果消息，完整的树可由清单重新生成
+        with _phase(profiler, "tree"):
+            file_tree = tree_preview(FileTree.from_store(store, skipped), tree_lines)
+        if walk_stats:
+            notes.append(_index_note(walk_stats))
+        for note in notes:
+            result_message += note + "\n"
+        if stats.get("dedup_files"):
+            result_message += f"重复文件去重: {stats['dedup_files']} 个，节省 {format_size(stats['dedup_saved_bytes'])}\n"
+        if digest:
+            result_message += f"内容摘要 (sha256): {digest}\n"
+        if skipped:
+            reasons = f"超过大小上限 {len(stats['skipped_large'])} 个，二进制文件 {len(stats['skipped_binary'])} 个"
+            if stats['skipped_special']:
+                reasons += f"，不支持的文件类型（如 socket）{len(stats['skipped_special'])} 个"
+            result_message += f"未打包 {len(skipped)} 个文件（{reasons}）\n"
+        if profiler:
+            profiler.stop_tools()
+            if sink is None:
+                report_file, report = profiler.write(project_path, output_path, store)
+                result_message += f"{PackagingProfile.summary(report)}\n性能报告: {report_file}\n"
+            else:
+                # 本地没有压缩包，报告不写入文件，只把摘要放入结果消息
+                report = profiler.report(project_path, None, store)
+                result_message += f"{PackagingProfile.summary(report)}\n"
+        result_message += f"打包的文件列表:\n{file_tree}"
+
+        result_queue.put((result_message, result_path))
+    except PackagingCancelled:
+        result_queue.put(("打包已取消。", None))
     except Exception as e:
         result_queue.put((f"打包过程中出现错误: {e}", None))
+    finally:
+        if profiler:
+            profiler.stop_tools()
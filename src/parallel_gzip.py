@@ -0,0 +1,149 @@
+# parallel_gzip.py
+
+import os
+import struct
+import time
+import zlib
+from collections import deque
+
+DEFAULT_BLOCK_SIZE = 128 * 1024  # 与 pigz 默认的分块大小一致
+MIN_BLOCK_SIZE = 32 * 1024
+WINDOW_SIZE = 32 * 1024  # deflate 的回溯窗口大小
+
+
+def resolve_workers(workers):
+    """
+    将配置中的线程数转换为实际使用的线程数。
+
+    :param workers: 配置的线程数，0 或 None 表示使用全部 CPU 核心
+    :return: 实际使用的线程数（至少为 1）
+    """
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _compress_block(block, dictionary, level, last):
+    """
+    在工作线程中压缩一个数据块，输出原始 deflate 数据（不含 gzip 头尾）。
+
+    :param block: 待压缩的数据块
+    :param dictionary: 上一块末尾 32KB 数据，作为预设字典以保持压缩率
+    :param level: 压缩级别
+    :param last: 是否为最后一块
+    :return: 压缩后的字节串
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    data = compressor.compress(block)
+    # 非最后一块以同步刷新结束，保证字节对齐，便于直接拼接
+    data += compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return data
+
+
+class ParallelGzipWriter:
+    """
+    仿照 pigz 的多线程 gzip 写入器。
+
+    数据按块切分后交给线程池并行压缩，再按顺序拼接成一个标准 gzip 流，
+    可以直接用 `tar -xzf` 或 `gzip -d` 解压。zlib 在压缩时会释放 GIL，
+    因此线程池即可利用多核。
+    """
+    def __init__(self, fileobj, workers=0, block_size=DEFAULT_BLOCK_SIZE, level=6, mtime=None):
+        """
+        :param fileobj: 输出的文件路径或可写的二进制文件对象
+        :param workers: 压缩线程数，0 表示使用全部 CPU 核心
+        :param block_size: 每个压缩块的大小（字节）
+        :param level: 压缩级别 (1-9)
+        :param mtime: 写入 gzip 头的时间戳，默认为当前时间
+        """
+        if isinstance(fileobj, (str, bytes, os.PathLike)):
+            self.fileobj = open(fileobj, 'wb')
+            self._owns_fileobj = True
+        else:
+            self.fileobj = fileobj
+            self._owns_fileobj = False
+
+        self.workers = resolve_workers(workers)
+        self.block_size = max(MIN_BLOCK_SIZE, int(block_size))
+        self.level = level
+        self.closed = False
+
+        # 延迟导入：concurrent.futures 会连带导入 logging，拖慢命令行启动
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pgzip")
+        self._pending = deque()
+        self._max_pending = self.workers * 2  # 限制在途块数量，避免内存无限增长
+        self._buffer = bytearray()
+        self._window = b''
+        self._crc = 0
+        self._size = 0
+
+        self._write_header(int(time.time()) if mtime is None else int(mtime))
+
+    def _write_header(self, mtime):
+        # 魔数、deflate 方法、无标志位、时间戳、额外标志、操作系统未知
+        self.fileobj.write(b'\x1f\x8b\x08\x00' + struct.pack('<I', mtime & 0xffffffff) + b'\x00\xff')
+
+    def _submit(self, block, last):
+        self._crc = zlib.crc32(block, self._crc)
+        self._size += len(block)
+        future = self._executor.submit(_compress_block, block, self._window, self.level, last)
+        self._pending.append(future)
+        self._window = (self._window + block)[-WINDOW_SIZE:]
+        while len(self._pending) > self._max_pending:
+            self.fileobj.write(self._pending.popleft().result())
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed ParallelGzipWriter")
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            block = bytes(self._buffer[:self.block_size])
+            del self._buffer[:self.block_size]
+            self._submit(block, last=False)
+        return len(data)
+
+    def tell(self):
+        """返回已写入的未压缩字节数（供 tarfile 使用）。"""
+        return self._size + len(self._buffer)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._submit(bytes(self._buffer), last=True)
+            self._buffer = bytearray()
+            while self._pending:
+                self.fileobj.write(self._pending.popleft().result())
+            self.fileobj.write(struct.pack('<II', self._crc & 0xffffffff, self._size & 0xffffffff))
+        finally:
+            self._executor.shutdown(wait=True)
+            if self._owns_fileobj:
+                self.fileobj.close()
+
+    def abort(self):
+        """放弃写入：取消尚未开始的压缩块，不再写出 gzip 尾部。"""
+        if self.closed:
+            return
+        self.closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._pending.clear()
+        if self._owns_fileobj:
+            self.fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,239 @@
+# path_store.py
+
+import os
+import sys
+from array import array
+
+_ENCODING = sys.getfilesystemencoding()
+_ERRORS = sys.getfilesystemencodeerrors()  # 与 os.fsencode 相同，无法解码的文件名也能原样保存
+_INO_MASK = (1 << 64) - 1  # Windows ReFS 的文件 ID 可能超过 64 位，只保存低 64 位
+
+
+class DirNode:
+    """PathStore 中的一个目录。同一目录只保存一次，文件只记录所在目录的编号和自己的文件名。"""
+    __slots__ = ('id', 'name', 'parent', 'rel_prefix', 'abs_prefix')
+
+    def __init__(self, dir_id, name, parent, rel_prefix, abs_prefix):
+        self.id = dir_id
+        self.name = name
+        self.parent = parent
+        self.rel_prefix = rel_prefix  # 相对路径加末尾的分隔符，根目录为空串
+        self.abs_prefix = abs_prefix
+
+    @property
+    def rel_path(self):
+        return self.rel_prefix[:-1]
+
+
+class FileRecord:
+    """PathStore 中一个文件的视图，各字段在访问时才从数组中取出。"""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def dir(self):
+        return self.store.dirs[self.store._file_dirs[self.index]]
+
+    @property
+    def name(self):
+        return self.store.name(self.index)
+
+    @property
+    def rel_path(self):
+        return self.store.rel_path(self.index)
+
+    @property
+    def path(self):
+        return self.store.path(self.index)
+
+    @property
+    def size(self):
+        return self.store._sizes[self.index]
+
+    @property
+    def mtime_ns(self):
+        return self.store._mtimes[self.index]
+
+    @property
+    def ino(self):
+        return self.store._inodes[self.index]
+
+    def entry(self):
+        """返回与 manifest.file_entry 相同格式的条目。"""
+        return self.store.entry(self.index)
+
+
+class PathStore:
+    """
+    紧凑的文件列表，供百万级文件的项目使用。
+
+    目录只保存一次（DirNode），文件只保存所在目录的编号和文件名；文件名编码后连续存放在一个 bytearray 中，
+    大小、mtime 和 inode 存放在 array 中。每个文件约占 36 字节加文件名长度，
+    而 [相对路径, 大小, mtime, inode] 列表每个文件约占 180 字节，还不含绝对路径字符串本身
+    （见 benchmarks/bench_memory.py）。
+    相对路径和绝对路径在需要时由目录前缀和文件名拼接，不再对每个文件调用 os.path.relpath。
+    """
+    def __init__(self, project_path):
+        """
+        :param project_path: 项目目录的路径，文件的相对路径都相对于它
+        """
+        self.project_path = project_path
+        self._prefix = os.path.join(project_path, '')
+        self.dirs = [DirNode(0, '', None, '', self._prefix)]
+        self._dir_ids = {'': 0}  # 目录相对路径 -> 编号
+        self._file_dirs = array('I')
+        self._name_ends = array('Q')  # 第 i 个文件名在 _names 中的结束位置
+        self._names = bytearray()
+        self._sizes = array('q')
+        self._mtimes = array('q')
+        self._inodes = array('Q')
+        self._sorted = True  # 是否已按相对路径排序，重复调用 sort 时直接返回
+
+    def __len__(self):
+        return len(self._file_dirs)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return FileRecord(self, index % len(self))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield FileRecord(self, index)
+
+    def _dir_id(self, rel_dir):
+        """返回目录的编号，缺失的目录及其上级目录逐级创建。"""
+        missing = []
+        while rel_dir not in self._dir_ids:
+            rel_dir, _, name = rel_dir.rpartition(os.sep)
+            missing.append(name)
+        parent = self.dirs[self._dir_ids[rel_dir]]
+        for name in reversed(missing):
+            rel_dir = parent.rel_prefix + name
+            node = DirNode(len(self.dirs), name, parent, rel_dir + os.sep, parent.abs_prefix + name + os.sep)
+            self.dirs.append(node)
+            self._dir_ids[rel_dir] = node.id
+            parent = node
+        return parent.id
+
+    def add(self, path, st=None):
+        """
+        添加一个文件。
+
+        :param path: 文件路径（通常是遍历得到的绝对路径）
+        :param st: 文件的 os.stat_result，为空时调用 lstat
+        :return: 文件的编号
+        """
+        if path.startswith(self._prefix):
+            rel_path = path[len(self._prefix):]
+        else:
+            rel_path = os.path.relpath(path, start=self.project_path)
+        if st is None:
+            st = os.lstat(path)
+        return self.add_entry(rel_path, st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def add_entry(self, rel_path, size, mtime_ns, ino):
+        """按清单条目的各字段添加一个文件，返回文件的编号。"""
+        rel_dir, _, name = rel_path.rpartition(os.sep)
+        dir_id = self._dir_ids.get(rel_dir)
+        if dir_id is None:
+            dir_id = self._dir_id(rel_dir)
+        self._file_dirs.append(dir_id)
+        self._names += name.encode(_ENCODING, _ERRORS)
+        self._name_ends.append(len(self._names))
+        self._sizes.append(size)
+        self._mtimes.append(mtime_ns)
+        self._inodes.append(ino & _INO_MASK)
+        self._sorted = False
+        return len(self._file_dirs) - 1
+
+    def name(self, index):
+        start = self._name_ends[index - 1] if index else 0
+        return self._names[start:self._name_ends[index]].decode(_ENCODING, _ERRORS)
+
+    def rel_path(self, index):
+        return self.dirs[self._file_dirs[index]].rel_prefix + self.name(index)
+
+    def path(self, index):
+        return self.dirs[self._file_dirs[index]].abs_prefix + self.name(index)
+
+    def entry(self, index):
+        """返回与 manifest.file_entry 相同格式的条目：[相对路径, 大小, mtime_ns, inode]。"""
+        return [self.rel_path(index), self._sizes[index], self._mtimes[index], self._inodes[index]]
+
+    def entries(self):
+        """按当前顺序逐个产出清单条目，不会一次生成全部条目。"""
+        for index in range(len(self)):
+            yield self.entry(index)
+
+    def pairs(self):
+        """逐个产出 (绝对路径, 相对路径)，供 package_files 使用，写入器不必再计算包内路径。"""
+        for index in range(len(self)):
+            dir_node = self.dirs[self._file_dirs[index]]
+            name = self.name(index)
+            yield dir_node.abs_prefix + name, dir_node.rel_prefix + name
+
+    def iter_names(self):
+        """逐个产出 (目录节点, 文件名, 大小)，供文件树直接按目录插入。"""
+        for index in range(len(self)):
+            yield self.dirs[self._file_dirs[index]], self.name(index), self._sizes[index]
+
+    def paths(self):
+        """返回绝对路径的只读序列视图（支持 len 和下标），不复制路径。"""
+        return _PathView(self)
+
+    def total_size(self):
+        return sum(self._sizes)
+
+    def sort(self):
+        """按相对路径就地排序，与 sorted(清单条目) 的顺序一致。"""
+        if self._sorted:
+            return
+        order = sorted(range(len(self)), key=self.rel_path)
+        names = bytearray()
+        name_ends = array('Q')
+        for index in order:
+            start = self._name_ends[index - 1] if index else 0
+            names += self._names[start:self._name_ends[index]]
+            name_ends.append(len(names))
+        self._names = names
+        self._name_ends = name_ends
+        for attr in ('_file_dirs', '_sizes', '_mtimes', '_inodes'):
+            values = getattr(self, attr)
+            setattr(self, attr, array(values.typecode, (values[index] for index in order)))
+        self._sorted = True
+
+    def nbytes(self):
+        """文件列表占用的大致字节数（数组和文件名，不含目录节点）。"""
+        arrays = (self._file_dirs, self._name_ends, self._sizes, self._mtimes, self._inodes)
+        return len(self._names) + sum(len(a) * a.itemsize for a in arrays)
+
+    @classmethod
+    def from_entries(cls, project_path, entries):
+        """
+        由清单条目构建。
+
+        :param project_path: 项目目录的路径
+        :param entries: manifest.file_entry 格式的条目
+        """
+        store = cls(project_path)
+        for entry in entries:
+            store.add_entry(*entry)
+        return store
+
+
+class _PathView:
+    """PathStore 中绝对路径的序列视图。"""
+    __slots__ = ('store',)
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index):
+        return self.store.path(index)
@@ -0,0 +1,216 @@
+# preview.py
+
+import os
+import stat
+import tarfile
+import time
+from collections import defaultdict
+
+from backends import get_backend, choose_backend, is_binary, TarBackend, AUTO_FORMAT, DEFAULT_FORMAT, BINARY_SNIFF_BYTES
+from cancellation import check_cancelled
+from packager import gather_files, format_size
+from rules import IGNORE_FILES
+from walker import DEFAULT_WALK_WORKERS
+
+SAMPLE_BYTES = 4 * 1024 * 1024  # 抽样读取的总字节数，决定预估的耗时
+SAMPLE_FILE_BYTES = 64 * 1024  # 每个抽样文件最多读取的字节数
+SAMPLE_CHUNKS = 4  # 大文件分几段读取
+MIN_SAMPLES_PER_EXTENSION = 2
+MAX_SAMPLES_PER_EXTENSION = 256
+DIR_DEPTH = 2  # 目录统计按前两级目录汇总
+DEFAULT_TOP_N = 10
+NO_EXTENSION = "(无扩展名)"
+
+
+def _member_bytes(backend, size):
+    """文件在未压缩的归档流中占用的字节数：tar 成员带 512 字节的头并补齐到 512 字节。"""
+    if isinstance(backend, TarBackend):
+        return tarfile.BLOCKSIZE + -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+    return size
+
+
+def _member_image(backend, arcname, data):
+    """构造抽样文件在归档流中的样子，使 tar 头和补齐的字节也计入压缩率。"""
+    if not isinstance(backend, TarBackend):
+        return data
+    tarinfo = tarfile.TarInfo(arcname)
+    tarinfo.size = len(data)
+    tarinfo.mtime = int(time.time())
+    padding = -len(data) % tarfile.BLOCKSIZE
+    return tarinfo.tobuf() + data + b'\0' * padding
+
+
+def _stratified(files, count):
+    """
+    按文件大小分层抽样：文件按大小排序后取等间隔的分位点，小文件和大文件都有代表。
+
+    :param files: [(大小, 路径)] 列表
+    :param count: 抽取的文件数
+    """
+    files = sorted(files)
+    count = min(count, len(files))
+    return [files[int((i + 0.5) * len(files) / count)] for i in range(count)]
+
+
+def _read_sample(path, size):
+    """读取抽样数据；大文件的开头往往不具代表性，改为从均匀分布的几个位置各读取一段。"""
+    try:
+        with open(path, 'rb') as f:
+            if size <= SAMPLE_FILE_BYTES:
+                return f.read(SAMPLE_FILE_BYTES)
+            chunk = SAMPLE_FILE_BYTES // SAMPLE_CHUNKS
+            parts = []
+            for i in range(SAMPLE_CHUNKS):
+                f.seek((size - chunk) * i // (SAMPLE_CHUNKS - 1))
+                parts.append(f.read(chunk))
+            return b''.join(parts)
+    except OSError:
+        return None
+
+
+def _sample_counts(extensions, total_bytes):
+    """按各扩展名的字节数占比分配抽样字节数，再按该扩展名的平均文件大小折算为抽样文件数。"""
+    counts = {}
+    for ext, stats in extensions.items():
+        share = SAMPLE_BYTES * stats["bytes"] / total_bytes if total_bytes else 0
+        per_file = min(SAMPLE_FILE_BYTES, max(1, stats["bytes"] // len(stats["files"])))
+        count = max(MIN_SAMPLES_PER_EXTENSION, min(MAX_SAMPLES_PER_EXTENSION, round(share / per_file)))
+        counts[ext] = min(len(stats["files"]), count)
+    return counts
+
+
+def _dir_key(rel_path):
+    parts = rel_path.split(os.sep)[:-1]
+    return '/'.join(parts[:DIR_DEPTH]) or '.'
+
+
+def preview_project(project_path, extensions, exclude_dirs, archive_format=DEFAULT_FORMAT, level=None,
+                    walk_workers=DEFAULT_WALK_WORKERS, ignore_files=IGNORE_FILES, max_file_size=None,
+                    skip_binary=False, cancel=None, top_n=DEFAULT_TOP_N):
+    """
+    不压缩，只遍历一次项目并抽样，预估打包的文件数、原始大小和压缩包大小。
+
+    文件大小直接取自遍历时的 stat 结果；压缩率按扩展名分别估算：每种扩展名按文件大小分层抽取少量文件，
+    用目标格式压缩抽样数据，再按该扩展名的总字节数折算。重复文件去重未计入，实际压缩包可能更小。
+
+    :param project_path: 项目目录的路径
+    :param extensions: 要包含的文件后缀列表
+    :param exclude_dirs: 要排除的子目录列表
+    :param archive_format: 压缩格式名，"auto" 时先按抽样数据选择格式
+    :param level: 压缩级别，None 表示使用该格式的默认级别
+    :param walk_workers: 并行扫描目录的线程数
+    :param ignore_files: 遍历时读取的忽略文件名列表
+    :param max_file_size: 文件大小上限（字节），超过的文件不计入
+    :param skip_binary: 跳过二进制文件；二进制文件的比例按抽样结果估算
+    :param cancel: 可选的 threading.Event，设置后抛出 PackagingCancelled
+    :param top_n: 结果中列出的最大目录数
+    :return: 预估结果字典
+    """
+    start = time.perf_counter()
+    prefix = os.path.join(project_path, '')
+    by_ext = defaultdict(lambda: {"files": [], "bytes": 0})
+    dirs = defaultdict(lambda: [0, 0])  # 目录 -> [文件数, 字节数]
+    skipped_large = 0
+    for path, st in gather_files(project_path, extensions, exclude_dirs, walk_workers=walk_workers,
+                                 ignore_files=ignore_files, cancel=cancel, with_stat=True):
+        size = st.st_size if stat.S_ISREG(st.st_mode) else 0
+        if max_file_size is not None and size > max_file_size:
+            skipped_large += 1
+            continue
+        rel_path = path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, start=project_path)
+        name = os.path.basename(rel_path)
+        ext = os.path.splitext(name)[1].lower() or NO_EXTENSION
+        stats = by_ext[ext]
+        stats["files"].append((size, rel_path))
+        stats["bytes"] += size
+        totals = dirs[_dir_key(rel_path)]
+        totals[0] += 1
+        totals[1] += size
+    scan_seconds = time.perf_counter() - start
+
+    total_bytes = sum(stats["bytes"] for stats in by_ext.values())
+    samples = {}
+    for ext, count in _sample_counts(by_ext, total_bytes).items():
+        check_cancelled(cancel)
+        samples[ext] = [(size, rel_path, _read_sample(os.path.join(project_path, rel_path), size))
+                        for size, rel_path in _stratified(by_ext[ext]["files"], count)]
+
+    if archive_format == AUTO_FORMAT:
+        sample_paths = [os.path.join(project_path, rel_path) for items in samples.values() for _, rel_path, _ in items]
+        backend, _ = choose_backend(sample_paths, level=level)
+    else:
+        backend = get_backend(archive_format)
+
+    result_extensions = []
+    skipped_binary = 0
+    sampled_bytes = 0
+    for ext, stats in by_ext.items():
+        check_cancelled(cancel)
+        items = [(size, rel_path, data) for size, rel_path, data in samples[ext] if data is not None]
+        if skip_binary and items:
+            text_items = [item for item in items if not is_binary(item[2][:BINARY_SNIFF_BYTES])]
+            text_share = len(text_items) / len(items)
+            items = text_items
+        else:
+            text_share = 1.0
+        files = round(len(stats["files"]) * text_share)
+        raw_bytes = round(stats["bytes"] * text_share)
+        skipped_binary += len(stats["files"]) - files
+        member_bytes = sum(_member_bytes(backend, size) for size, _ in stats["files"]) * text_share
+        images = [_member_image(backend, rel_path, data) for _, rel_path, data in items]
+        image_bytes = sum(len(image) for image in images)
+        sampled_bytes += image_bytes
+        ratio = backend.estimate(images, level) / image_bytes if image_bytes else 1.0
+        result_extensions.append({"extension": ext, "files": files, "bytes": raw_bytes,
+                                  "estimated_bytes": round(member_bytes * ratio), "ratio": ratio,
+                                  "sampled_files": len(items)})
+    result_extensions.sort(key=lambda item: item["bytes"], reverse=True)
+
+    files = sum(item["files"] for item in result_extensions)
+    raw_bytes = sum(item["bytes"] for item in result_extensions)
+    estimated = sum(item["estimated_bytes"] for item in result_extensions)
+    biggest_dirs = sorted(dirs.items(), key=lambda item: item[1][1], reverse=True)[:top_n]
+    return {
+        "project_path": project_path,
+        "format": backend.name,
+        "files": files,
+        "bytes": raw_bytes,
+        "estimated_bytes": estimated,
+        "ratio": estimated / raw_bytes if raw_bytes else 1.0,
+        "skipped_large": skipped_large,
+        "skipped_binary": skipped_binary,
+        "sampled_files": sum(item["sampled_files"] for item in result_extensions),
+        "sampled_bytes": sampled_bytes,
+        "scan_seconds": scan_seconds,
+        "seconds": time.perf_counter() - start,
+        "extensions": result_extensions,
+        "dirs": [{"path": path, "files": count, "bytes": size} for path, (count, size) in biggest_dirs],
+    }
+
+
+def format_preview(preview, top_n=DEFAULT_TOP_N):
+    """
+    将预估结果格式化为多行文字。
+
+    :param preview: preview_project 返回的字典
+    :param top_n: 列出的最大扩展名和目录数
+    """
+    lines = [
+        f"文件数: {preview['files']}，原始大小: {format_size(preview['bytes'])}",
+        f"预估压缩包大小 ({preview['format']}): {format_size(preview['estimated_bytes'])}"
+        f"（压缩率 {preview['ratio']:.1%}）",
+    ]
+    if preview["skipped_large"]:
+        lines.append(f"超过大小上限而不打包的文件: {preview['skipped_large']} 个")
+    if preview["skipped_binary"]:
+        lines.append(f"预计跳过的二进制文件: 约 {preview['skipped_binary']} 个")
+    lines.append(f"抽样 {preview['sampled_files']} 个文件（{format_size(preview['sampled_bytes'])}），"
+                 f"耗时 {preview['seconds']:.2f}s（遍历 {preview['scan_seconds']:.2f}s）")
+    lines.append("最大的扩展名:")
+    for item in preview["extensions"][:top_n]:
+        lines.append(f"  {item['extension']:<12}{item['files']:>8} 个文件  {format_size(item['bytes']):>10}"
+                     f"  -> {format_size(item['estimated_bytes']):>10}（{item['ratio']:.1%}）")
+    lines.append("最大的目录:")
+    for item in preview["dirs"][:top_n]:
+        lines.append(f"  {item['path']:<40}{item['files']:>8} 个文件  {format_size(item['bytes']):>10}")
+    return "\n".join(lines)
@@ -0,0 +1,251 @@
+# profiling.py
+
+import heapq
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+REPORT_SUFFIX = '.profile.json'
+CPROFILE_SUFFIX = '.prof'
+DEFAULT_TOP_N = 10
+PROFILE_TOOLS = ('cprofile', 'tracemalloc')
+
+# 阶段名称及其在结果消息中的显示名称
+PHASE_LABELS = {
+    "walk": "遍历",
+    "stat": "元数据",
+    "pack": "读取与压缩",
+    "digest": "摘要",
+    "manifest": "清单",
+    "tree": "文件树",
+}
+
+
+def report_path(archive_path):
+    """返回压缩包对应的性能报告路径。"""
+    return archive_path + REPORT_SUFFIX
+
+
+class PackagingProfile:
+    """
+    记录一次打包中各个阶段的墙钟时间、CPU 时间和字节数，以及耗时最多的文件和目录。
+
+    遍历与压缩以流水线方式并行时，各阶段的时间会有重叠：遍历阶段只统计遍历线程在产出文件时花费的时间，
+    读取与压缩阶段的 CPU 时间为整个进程的 CPU 时间（包含压缩线程）。
+    """
+    def __init__(self, tools=(), top_n=DEFAULT_TOP_N):
+        """
+        :param tools: 额外启用的分析工具，可包含 "cprofile"（打包线程的函数级耗时）和 "tracemalloc"（内存分配）
+        :param top_n: 报告中列出的最慢文件和目录数
+        """
+        unknown = set(tools) - set(PROFILE_TOOLS)
+        if unknown:
+            raise ValueError(f"不支持的分析工具: {', '.join(sorted(unknown))}")
+        self.tools = tuple(tools)
+        self.top_n = top_n
+        self.phases = {}
+        self._slowest = []  # (耗时, 文件路径) 的小顶堆，只保留 top_n 个
+        self._dir_times = defaultdict(float)
+        self._profiler = None
+        self._tracemalloc = None
+        self._owns_tracemalloc = False  # tracemalloc 是否由 start_tools 启动（而非已在运行，如 python -X tracemalloc）
+        self._snapshot = None
+        self._traced_memory = None
+        self._start = time.perf_counter()
+
+    def add(self, name, wall, cpu, files=0, num_bytes=0):
+        """累加一个阶段的统计。"""
+        phase = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0, "files": 0, "bytes": 0})
+        phase["wall"] += wall
+        phase["cpu"] += cpu
+        phase["files"] += files
+        phase["bytes"] += num_bytes
+
+    @contextmanager
+    def phase(self, name, files=0, num_bytes=0):
+        """统计一段代码的墙钟时间和进程 CPU 时间。"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, files, num_bytes)
+
+    def track_walk(self, files):
+        """
+        包装遍历生成器，只统计产出每个文件所花的时间，不包括下游处理文件的时间。
+
+        :param files: 文件路径的可迭代对象
+        :return: 逐个产出文件路径的生成器
+        """
+        iterator = iter(files)
+        wall = cpu = 0.0
+        count = 0
+        try:
+            while True:
+                start, start_cpu = time.perf_counter(), time.thread_time()
+                try:
+                    file = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    wall += time.perf_counter() - start
+                    cpu += time.thread_time() - start_cpu
+                count += 1
+                yield file
+        finally:
+            self.add("walk", wall, cpu, count)
+
+    def timed(self, name, func):
+        """
+        返回计时版本的 func，每次调用的耗时累加到 name 阶段。
+
+        :param name: 阶段名称
+        :param func: 要计时的函数
+        """
+        def wrapper(*args, **kwargs):
+            start, start_cpu = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start, time.thread_time() - start_cpu, 1)
+        return wrapper
+
+    def track_files(self, files):
+        """
+        包装交给写入器的文件序列：写入器取下一个文件时，上一个文件已经处理完毕，两次取文件的间隔即该文件的耗时。
+
+        :param files: 文件路径或 (文件路径, 包内路径) 的可迭代对象
+        :return: 原样逐个产出的生成器
+        """
+        for item in files:
+            file = item[0] if isinstance(item, tuple) else item
+            start = time.perf_counter()
+            yield item
+            elapsed = time.perf_counter() - start
+            self._dir_times[os.path.dirname(file)] += elapsed
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, (elapsed, file))
+            elif elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (elapsed, file))
+
+    def start_tools(self):
+        """启动 cProfile / tracemalloc（如已配置）。"""
+        if "cprofile" in self.tools:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if "tracemalloc" in self.tools:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            self._owns_tracemalloc = not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start()
+
+    def stop_tools(self):
+        """停止分析工具，可以重复调用。"""
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._tracemalloc is not None and self._snapshot is None and self._tracemalloc.is_tracing():
+            self._snapshot = self._tracemalloc.take_snapshot()
+            self._traced_memory = self._tracemalloc.get_traced_memory()
+            # 打包前已在运行的 tracemalloc 属于调用方，保持运行
+            if self._owns_tracemalloc:
+                self._tracemalloc.stop()
+
+    def _cprofile_report(self, archive_path):
+        import pstats
+
+        dump_path = None
+        if archive_path is not None:
+            dump_path = archive_path + CPROFILE_SUFFIX
+            self._profiler.dump_stats(dump_path)
+        stats = pstats.Stats(self._profiler)
+        functions = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            functions.append({"function": f"{os.path.basename(filename)}:{line}({name})", "calls": calls,
+                              "tottime": tottime, "cumtime": cumtime})
+        functions.sort(key=lambda f: f["cumtime"], reverse=True)
+        return {"stats_file": dump_path, "top_functions": functions[:self.top_n * 2]}
+
+    def _tracemalloc_report(self):
+        if self._snapshot is None:
+            return None
+        current, peak = self._traced_memory
+        top = self._snapshot.statistics('lineno')[:self.top_n]
+        return {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top_allocations": [{"location": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                                for stat in top],
+        }
+
+    def report(self, project_path, archive_path, store):
+        """
+        生成性能报告字典。
+
+        :param project_path: 项目目录的路径
+        :param archive_path: 压缩包路径，为 None 时（压缩包写入 sink，不在本地）不保存 cProfile 原始数据
+        :param store: 本次遍历到的文件（path_store.PathStore），用于统计文件数和大小
+        """
+        if "pack" in self.phases:
+            self.phases["pack"]["files"] = len(store)
+            self.phases["pack"]["bytes"] = store.total_size()
+        slowest_files = []
+        for elapsed, file in sorted(self._slowest, reverse=True):
+            # 只有最慢的几个文件需要大小，直接 lstat，不为全部文件建立路径到大小的字典
+            try:
+                size = os.lstat(file).st_size
+            except OSError:
+                size = 0
+            slowest_files.append({"path": os.path.relpath(file, start=project_path), "seconds": elapsed,
+                                  "bytes": size})
+        slowest_dirs = [{"path": os.path.relpath(d, start=project_path), "seconds": t}
+                        for d, t in heapq.nlargest(self.top_n, self._dir_times.items(), key=lambda item: item[1])]
+        report = {
+            "project_path": project_path,
+            "archive": archive_path,
+            "total_seconds": time.perf_counter() - self._start,
+            "phases": self.phases,
+            "slowest_files": slowest_files,
+            "slowest_dirs": slowest_dirs,
+        }
+        if self._profiler is not None:
+            report["cprofile"] = self._cprofile_report(archive_path)
+        if self._tracemalloc is not None:
+            report["tracemalloc"] = self._tracemalloc_report()
+        return report
+
+    def write(self, project_path, archive_path, store):
+        """
+        将性能报告写入压缩包旁的 JSON 文件。
+
+        :return: (报告路径, 报告字典)
+        """
+        report = self.report(project_path, archive_path, store)
+        path = report_path(archive_path)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        return path, report
+
+    @staticmethod
+    def summary(report):
+        """
+        将性能报告概括为结果消息中的几行文字。
+
+        :param report: report() 返回的字典
+        """
+        parts = []
+        for name, phase in report["phases"].items():
+            text = f"{PHASE_LABELS.get(name, name)} {phase['wall']:.2f}s"
+            if phase["cpu"] >= 0.01:
+                text += f" (CPU {phase['cpu']:.2f}s)"
+            parts.append(text)
+        lines = [f"阶段耗时: {'，'.join(parts)}"]
+        if report["slowest_files"]:
+            slowest = report["slowest_files"][0]
+            lines.append(f"最慢的文件: {slowest['path']} ({slowest['seconds']:.2f}s)")
+        if report.get("tracemalloc"):
+            lines.append(f"内存峰值: {report['tracemalloc']['peak_bytes'] / (1024 * 1024):.1f} MB")
+        return "\n".join(lines)
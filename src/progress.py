@@ -0,0 +1,162 @@
+# progress.py
+
+import os
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.25  # 进度事件的最小间隔（秒）
+
+# 事件类型
+WALK_STARTED = "walk_started"
+FILES_DISCOVERED = "files_discovered"
+WALK_FINISHED = "walk_finished"
+PROGRESS = "progress"
+FINISHED = "finished"
+
+
+class ProgressReporter:
+    """
+    打包进度的事件流。
+
+    遍历线程和写入线程都会向它汇报进度，订阅者收到的是普通字典，
+    其中 "event" 为事件类型。阶段性事件（开始/结束遍历、完成）总是立即发出，
+    计数类事件（files_discovered、progress）按 interval 限流，避免淹没订阅者。
+    订阅者在汇报进度的线程中被调用，GUI 应将事件转交到主线程处理。
+    """
+    def __init__(self, subscribers=(), interval=DEFAULT_INTERVAL):
+        """
+        :param subscribers: 订阅者回调列表，参数为事件字典
+        :param interval: 计数类事件的最小间隔（秒）
+        """
+        self.subscribers = list(subscribers)
+        self.interval = interval
+        self.output_path = None
+        self.output_counter = None  # 写入 sink 时的 sinks.CountingWriter，已写入的字节数从其计数中获取
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last_emit = {}
+        self.walk_done = False
+        self.files_discovered = 0
+        self.files_done = 0
+        self.bytes_read = 0
+        self.current_file = None
+
+    def subscribe(self, callback):
+        """添加订阅者。"""
+        self.subscribers.append(callback)
+
+    def _due(self, event):
+        """判断该类事件是否已超过限流间隔，先判断再组装事件，被限流时几乎没有开销。"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_emit.get(event, 0.0) < self.interval:
+                return False
+            self._last_emit[event] = now
+        return True
+
+    def _send(self, event, **data):
+        data["event"] = event
+        data["elapsed"] = time.monotonic() - self._start
+        for callback in self.subscribers:
+            callback(data)
+
+    def _bytes_written(self):
+        if self.output_counter is not None:
+            return self.output_counter.bytes_written
+        if not self.output_path:
+            return 0
+        try:
+            return os.stat(self.output_path).st_size
+        except OSError:
+            return 0
+
+    def snapshot(self):
+        """返回当前的进度统计，包括吞吐量和预计剩余时间。"""
+        elapsed = max(time.monotonic() - self._start, 1e-6)
+        eta = None
+        if self.walk_done and self.files_done:
+            # 遍历完成后总文件数已知，按已处理文件的平均耗时估算剩余时间
+            eta = elapsed * (self.files_discovered - self.files_done) / self.files_done
+        return {
+            "files_discovered": self.files_discovered,
+            "files_done": self.files_done,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self._bytes_written(),
+            "current_file": self.current_file,
+            "mb_per_s": self.bytes_read / elapsed / (1024 * 1024),
+            "eta": eta,
+            "walk_done": self.walk_done,
+        }
+
+    def track_discovery(self, files):
+        """
+        包装遍历生成器，统计已发现的文件数，并在遍历开始和结束时发出事件。
+
+        :param files: 文件路径的可迭代对象
+        :return: 逐个产出文件路径的生成器
+        """
+        self._send(WALK_STARTED)
+        for file in files:
+            with self._lock:
+                self.files_discovered += 1
+            if self._due(FILES_DISCOVERED):
+                self._send(FILES_DISCOVERED, count=self.files_discovered)
+            yield file
+        self.walk_done = True
+        self._send(WALK_FINISHED, count=self.files_discovered)
+
+    def start_file(self, arcname):
+        """写入器开始处理一个文件。"""
+        self.current_file = arcname
+        if self._due(PROGRESS):
+            self._send(PROGRESS, **self.snapshot())
+
+    def file_done(self, size):
+        """写入器处理完一个文件。"""
+        with self._lock:
+            self.files_done += 1
+            self.bytes_read += size
+        if self._due(PROGRESS):
+            self._send(PROGRESS, **self.snapshot())
+
+    def finish(self, output_path=None):
+        """打包结束，发出最终统计。"""
+        self.current_file = None
+        self._send(FINISHED, output_path=output_path, **self.snapshot())
+
+
+def as_reporter(progress):
+    """
+    将 progress 参数统一为 ProgressReporter：可以传入已有的 reporter、单个回调或 None。
+    """
+    if progress is None or isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter([progress])
+
+
+def format_event(event):
+    """
+    将进度事件格式化为一行文字，供日志和命令行使用。
+
+    :param event: 事件字典
+    :return: 文字描述，不需要显示的事件返回 None
+    """
+    kind = event["event"]
+    if kind == WALK_STARTED:
+        return "开始遍历目录..."
+    if kind == WALK_FINISHED:
+        return f"遍历完成，共 {event['count']} 个文件"
+    if kind == FILES_DISCOVERED:
+        return f"已发现 {event['count']} 个文件..."
+    if kind in (PROGRESS, FINISHED):
+        total = event["files_discovered"] if event["walk_done"] else f"{event['files_discovered']}+"
+        text = (f"已处理 {event['files_done']}/{total} 个文件，"
+                f"读取 {event['bytes_read'] / (1024 * 1024):.1f} MB，"
+                f"写入 {event['bytes_written'] / (1024 * 1024):.1f} MB，"
+                f"{event['mb_per_s']:.1f} MB/s")
+        if event["eta"] is not None and kind == PROGRESS:
+            text += f"，预计剩余 {event['eta']:.0f}s"
+        if kind == PROGRESS and event["current_file"]:
+            text += f"，当前: {event['current_file']}"
+        return text
+    return None
@@ -0,0 +1,288 @@
+# rules.py
+
+import os
+import re
+
+GITIGNORE = '.gitignore'
+# 遍历时自动读取的忽略文件，语义与 .gitignore 相同；.gitignore 需要通过 use_gitignore（命令行 --gitignore）开启，
+# 以免已有配置打包的内容在不知情的情况下发生变化
+IGNORE_FILES = ('.packerignore',)
+
+_GLOB_CHARS = ('*', '?', '[')
+
+
+def is_pattern(entry):
+    """
+    判断排除项是否为通配/忽略规则，而非普通的相对目录路径。
+
+    :param entry: config.json 中 exclude_dirs 的一项
+    :return: 是否为规则
+    """
+    return entry.startswith('!') or any(c in entry for c in _GLOB_CHARS)
+
+
+def _translate_body(pattern):
+    """将通配模式主体（不含前缀）翻译为正则表达式。"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                j = i + 2
+                whole_segment = (i == 0 or pattern[i - 1] == '/') and (j == n or pattern[j] == '/')
+                if whole_segment and j == n:
+                    out.append('.*')  # 末尾的 /** 匹配其下所有内容
+                    i = j
+                    continue
+                if whole_segment:
+                    out.append('(?:.*/)?')  # 中间的 /**/ 匹配零或多层目录
+                    i = j + 1
+                    continue
+                i = j
+            else:
+                i += 1
+            out.append('[^/]*')
+            continue
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            start = i + 2 if pattern[i + 1:i + 2] in ('!', '^') else i + 1
+            j = pattern.find(']', start + 1 if start < n else start)
+            if j == -1:
+                out.append('\\[')
+            else:
+                content = pattern[i + 1:j].replace('\\', '\\\\')
+                if content.startswith('!'):
+                    content = '^' + content[1:]
+                out.append('[' + content + ']')
+                i = j + 1
+                continue
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def parse_rule(line):
+    """
+    按 .gitignore 语义解析一条规则。
+
+    :param line: 规则文本
+    :return: (主体, 是否否定, 是否仅匹配目录, 是否锚定到基准目录)，空行和注释返回 None
+    """
+    line = line.rstrip('\r\n')
+    while line.endswith(' ') and not line.endswith('\\ '):
+        line = line[:-1]
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith(('\\!', '\\#')):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    anchored = '/' in line
+    line = line.lstrip('/')
+    while line.startswith('**/'):
+        line = line[3:]
+        anchored = False
+    if not line:
+        return None
+    return line, negate, dir_only, anchored
+
+
+def _is_literal(body):
+    return '\\' not in body and not any(c in body for c in _GLOB_CHARS)
+
+
+def _rule_regex(body, anchored):
+    return ('' if anchored else '(?:.*/)?') + _translate_body(body)
+
+
+class IgnoreMatcher:
+    """
+    一组忽略规则（一个 .gitignore 文件或 exclude_dirs 配置）编译后的匹配器。
+
+    没有否定规则时，字面量名称/路径放入集合查找，其余规则合并为一个正则；
+    有否定规则时，所有规则按倒序合并为一个带命名分组的正则，
+    匹配到的第一个分组即为最后定义的规则，从而实现“后定义者优先”。
+    子目录中的忽略文件会生成新的匹配器，并通过 parent 串联。
+    """
+    __slots__ = ('base', 'parent', '_ordered', '_negated', '_sets', '_regex', '_active')
+
+    def __init__(self, patterns, base='', parent=None):
+        """
+        :param patterns: 规则文本列表
+        :param base: 规则所在目录相对于项目根目录的路径（posix 风格，根目录为空串）
+        :param parent: 上级目录的匹配器
+        """
+        self.base = base
+        self.parent = parent
+        rules = [rule for rule in (parse_rule(p) for p in patterns) if rule]
+        self._ordered = any(negate for _, negate, _, _ in rules)
+        self._negated = {}
+        # 下标 0 为文件使用的规则，1 为目录使用的规则
+        self._sets = ((set(), set()), (set(), set()))
+        self._regex = [None, None]
+
+        pieces = ([], [])
+        for index in reversed(range(len(rules))):
+            body, negate, dir_only, anchored = rules[index]
+            kinds = (1,) if dir_only else (0, 1)
+            if not self._ordered and _is_literal(body):
+                for kind in kinds:
+                    names, paths = self._sets[kind]
+                    if anchored:
+                        paths.add(body)
+                    elif '/' in body:
+                        pieces[kind].append(_rule_regex(body, anchored))
+                    else:
+                        names.add(body)
+                continue
+            group = f"r{index}"
+            self._negated[group] = negate
+            for kind in kinds:
+                pieces[kind].append(f"(?P<{group}>{_rule_regex(body, anchored)})")
+        for kind in (0, 1):
+            if pieces[kind]:
+                self._regex[kind] = re.compile('|'.join(pieces[kind]), re.DOTALL)
+        # 没有任何规则作用于该类路径时直接跳过
+        self._active = tuple(bool(pieces[kind] or self._sets[kind][0] or self._sets[kind][1]) for kind in (0, 1))
+
+    def match(self, rel_path, is_dir):
+        """
+        仅用本匹配器判断路径。
+
+        :param rel_path: 相对于项目根目录的 posix 路径
+        :param is_dir: 是否为目录
+        :return: True 表示排除，False 表示被否定规则重新包含，None 表示没有规则命中
+        """
+        kind = 1 if is_dir else 0
+        if not self._active[kind]:
+            return None
+        if self.base:
+            rel_path = rel_path[len(self.base) + 1:]
+        regex = self._regex[kind]
+        if self._ordered:
+            m = regex.fullmatch(rel_path) if regex is not None else None
+            return None if m is None else not self._negated[m.lastgroup]
+        names, paths = self._sets[kind]
+        if rel_path.rpartition('/')[2] in names or rel_path in paths:
+            return True
+        if regex is not None and regex.fullmatch(rel_path):
+            return True
+        return None
+
+    def is_excluded(self, rel_path, is_dir):
+        """
+        沿匹配器链从最深的忽略文件开始判断，较深目录中的规则优先。
+
+        :param rel_path: 相对于项目根目录的 posix 路径
+        :param is_dir: 是否为目录
+        :return: 是否排除
+        """
+        matcher = self
+        while matcher is not None:
+            result = matcher.match(rel_path, is_dir)
+            if result is not None:
+                return result
+            matcher = matcher.parent
+        return False
+
+
+class RuleSet:
+    """
+    编译后的包含/排除规则。
+
+    - file_extensions 中的普通后缀放入集合，按文件名中每个 "." 的位置查找；
+      含通配符的项（如 "src/**/*.h"）合并为一个正则。
+    - exclude_dirs 中的普通路径保持原有含义（相对于项目根目录的目录），
+      含通配符或以 "!" 开头的项按 .gitignore 语义处理，如 "**/node_modules"、"*.min.js"。
+    - 遍历到的每个目录中的忽略文件（默认为 .packerignore）会在该目录下生效。
+    """
+    def __init__(self, extensions, exclude_dirs=(), ignore_files=IGNORE_FILES):
+        """
+        :param extensions: 要包含的文件后缀或通配模式列表
+        :param exclude_dirs: 要排除的子目录或忽略规则列表
+        :param ignore_files: 要读取的忽略文件名列表
+        """
+        dot_suffixes = set()
+        other_suffixes = []
+        include_pieces = []
+        for ext in extensions:
+            ext = ext.strip()
+            if not ext:
+                continue
+            if any(c in ext for c in _GLOB_CHARS):
+                rule = parse_rule(ext)
+                if rule:
+                    body, _, _, anchored = rule
+                    include_pieces.append(_rule_regex(body, anchored))
+            elif ext.startswith('.'):
+                dot_suffixes.add(ext.lower())
+            else:
+                other_suffixes.append(ext.lower())
+        self.dot_suffixes = frozenset(dot_suffixes)
+        self.other_suffixes = tuple(other_suffixes)
+        self.include_regex = re.compile('|'.join(include_pieces), re.DOTALL | re.IGNORECASE) if include_pieces else None
+
+        patterns = []
+        for entry in exclude_dirs:
+            entry = entry.strip()
+            if not entry:
+                continue
+            if is_pattern(entry):
+                patterns.append(entry)
+            else:
+                # 普通路径沿用原有语义：锚定到项目根目录的目录
+                patterns.append('/' + entry.replace('\\', '/').strip('/') + '/')
+        self.root_matcher = IgnoreMatcher(patterns)
+        self.ignore_files = tuple(ignore_files)
+
+    def wants_file(self, name, rel_path):
+        """
+        判断文件是否符合包含规则，开销只与文件名中 "." 的个数有关。
+
+        :param name: 文件名
+        :param rel_path: 相对于项目根目录的 posix 路径
+        :return: 是否包含
+        """
+        lower = name.lower()
+        i = lower.find('.')
+        while i != -1:
+            if lower[i:] in self.dot_suffixes:
+                return True
+            i = lower.find('.', i + 1)
+        if self.other_suffixes and lower.endswith(self.other_suffixes):
+            return True
+        return self.include_regex is not None and self.include_regex.fullmatch(rel_path) is not None
+
+    def dir_matcher(self, dir_path, rel_dir, parent, names):
+        """
+        返回在某个目录中生效的匹配器：目录中有忽略文件时派生新的匹配器，否则沿用上级。
+
+        :param dir_path: 目录的完整路径
+        :param rel_dir: 目录相对于项目根目录的 posix 路径
+        :param parent: 上级目录生效的匹配器
+        :param names: 目录中的文件名集合
+        :return: 匹配器
+        """
+        patterns = []
+        for ignore_file in self.ignore_files:
+            if ignore_file in names:
+                try:
+                    with open(os.path.join(dir_path, ignore_file), 'r', encoding='utf-8', errors='replace') as file:
+                        patterns.extend(file.read().splitlines())
+                except OSError:
+                    continue
+        if not patterns:
+            return parent
+        return IgnoreMatcher(patterns, base=rel_dir, parent=parent)
@@ -0,0 +1,242 @@
+# scan_index.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from rules import RuleSet, IGNORE_FILES
+from walker import scan_dir, walk_tasks, join_rel, DEFAULT_WALK_WORKERS
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.scan-index.sqlite'
+DEFAULT_INDEX_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'source_code_packer')
+# 目录修改时间距扫描开始不足此时长时不写入索引：同一时间戳内的后续修改无法从 mtime 上区分
+RACY_WINDOW_NS = 2 * 1000 ** 3
+_SEP = '\0'  # 文件名中不可能出现的分隔符
+
+
+def index_path(project_path, index_dir=None):
+    """
+    返回项目的目录索引文件路径，文件名包含项目完整路径的短哈希。
+
+    :param project_path: 项目目录的路径
+    :param index_dir: 保存索引的目录，默认为 ~/.cache/source_code_packer
+    """
+    abs_path = os.path.abspath(project_path)
+    name = os.path.basename(os.path.normpath(abs_path)) or 'root'
+    path_hash = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(index_dir or DEFAULT_INDEX_DIR, f"{name}-{path_hash}{INDEX_SUFFIX}")
+
+
+def _settings_key(project_path, extensions, exclude_dirs, ignore_files):
+    """包含/排除配置的摘要，配置变化时整个索引作废。"""
+    settings = [INDEX_VERSION, os.path.abspath(project_path), list(extensions), list(exclude_dirs), list(ignore_files)]
+    return hashlib.sha1(json.dumps(settings, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _split(text):
+    return text.split(_SEP) if text else []
+
+
+class _DirRecord:
+    """索引中的一个目录：修改时间、忽略文件的状态，以及其中匹配的文件名和未被排除的子目录名。"""
+    __slots__ = ('mtime_ns', 'ignore_sig', 'files', 'subdirs')
+
+    def __init__(self, mtime_ns, ignore_sig, files, subdirs):
+        self.mtime_ns = mtime_ns
+        self.ignore_sig = ignore_sig
+        self.files = files
+        self.subdirs = subdirs
+
+
+class ScanIndex:
+    """
+    持久化的目录索引，保存在 SQLite 文件中。
+
+    记录每个目录的 mtime 及其中匹配的文件和子目录。再次遍历时，mtime 未变化、忽略文件也未修改的目录
+    直接使用索引中的结果，不再列出目录内容，每个目录只需一次 stat。目录中的文件增删、改名都会更新目录的 mtime；
+    忽略文件的内容变化不会更新目录的 mtime，因此单独比较忽略文件的 mtime 和大小，变化时其整棵子树重新扫描。
+    包含/排除配置变化时整个索引作废。
+    """
+    def __init__(self, project_path, extensions, exclude_dirs, ignore_files=IGNORE_FILES, index_dir=None):
+        """
+        :param project_path: 项目目录的路径
+        :param extensions: 要包含的文件后缀列表
+        :param exclude_dirs: 要排除的子目录列表
+        :param ignore_files: 遍历时读取的忽略文件名列表
+        :param index_dir: 保存索引的目录，默认为 ~/.cache/source_code_packer
+        """
+        self.project_path = project_path
+        self.rules = RuleSet(extensions, exclude_dirs, ignore_files)
+        self.path = index_path(project_path, index_dir)
+        self.settings_key = _settings_key(project_path, extensions, exclude_dirs, ignore_files)
+        self._records = {}
+        self._updates = {}  # 相对路径 -> 本次扫描得到的新记录
+        self._visited = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def _connect(self):
+        """打开索引数据库，在一个事务中执行，结束时关闭连接。"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.execute("CREATE TABLE IF NOT EXISTS dirs (rel_dir TEXT PRIMARY KEY, mtime_ns INTEGER, "
+                             "ignore_sig TEXT, files TEXT, subdirs TEXT)")
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self):
+        """读取索引；配置不一致或索引文件损坏时从空索引开始。"""
+        self._records = {}
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+                if row is None or row[0] != self.settings_key:
+                    return
+                for rel_dir, mtime_ns, ignore_sig, files, subdirs in conn.execute("SELECT * FROM dirs"):
+                    self._records[rel_dir] = _DirRecord(mtime_ns, ignore_sig, _split(files), _split(subdirs))
+        except sqlite3.DatabaseError:
+            self._records = {}
+            self.clear()
+        except (OSError, sqlite3.Error):
+            # 索引目录不可写等情况下按没有索引处理
+            self._records = {}
+
+    def save(self, complete=True):
+        """
+        写回本次扫描更新的目录。
+
+        :param complete: 遍历是否完整，只有完整遍历后才能删除已不存在的目录
+        """
+        removed = set(self._records) - self._visited if complete else set()
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+                if row is None or row[0] != self.settings_key:
+                    conn.execute("DELETE FROM dirs")
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('settings', ?)", (self.settings_key,))
+                conn.executemany("DELETE FROM dirs WHERE rel_dir = ?", ((rel_dir,) for rel_dir in removed))
+                conn.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)",
+                                 ((rel_dir, r.mtime_ns, r.ignore_sig, _SEP.join(r.files), _SEP.join(r.subdirs))
+                                  for rel_dir, r in self._updates.items()))
+        except (OSError, sqlite3.Error):
+            # 索引只是缓存，写入失败（如另一个进程长时间占用）不影响本次遍历的结果
+            pass
+
+    def clear(self):
+        """删除索引文件。"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _ignore_signature(path, names):
+        """目录中忽略文件的名称、mtime 和大小，没有忽略文件时为空串。"""
+        parts = []
+        for name in names:
+            try:
+                st = os.stat(os.path.join(path, name))
+            except OSError:
+                continue
+            parts.append(f"{name}:{st.st_mtime_ns}:{st.st_size}")
+        return _SEP.join(parts)
+
+    def _scan(self, path, rel_dir, parent_matcher, trusted, with_stat, scan_start_ns):
+        """
+        扫描单个目录，索引中的记录有效时不列出目录内容。
+
+        :param trusted: 上级目录的忽略规则没有变化，索引中本目录的记录可以使用
+        :return: (文件列表, 子目录任务列表)
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns  # 先取 mtime 再列目录，列目录期间的修改会在下次被发现
+        except OSError:
+            return [], []
+        with self._lock:
+            self._visited.add(rel_dir)
+        record = self._records.get(rel_dir)
+        if trusted and record is not None and record.mtime_ns == mtime_ns:
+            # 目录的 mtime 未变，说明没有增删忽略文件，只需检查记录中的忽略文件是否被修改
+            names = [entry.split(':', 1)[0] for entry in _split(record.ignore_sig)]
+            ignore_sig = self._ignore_signature(path, names)
+            subtree_trusted = ignore_sig == record.ignore_sig
+        else:
+            ignore_sig = self._ignore_signature(path, self.rules.ignore_files)
+            subtree_trusted = trusted and record is not None and ignore_sig == record.ignore_sig
+
+        if subtree_trusted and record.mtime_ns == mtime_ns:
+            with self._lock:
+                self.hits += 1
+            matcher = self.rules.dir_matcher(path, rel_dir, parent_matcher, set(names))
+            files = [os.path.join(path, name) for name in record.files]
+            if with_stat:
+                files = [(file, st) for file, st in ((file, _lstat(file)) for file in files) if st is not None]
+            subtasks = [(os.path.join(path, name), join_rel(rel_dir, name), matcher, True) for name in record.subdirs]
+            return files, subtasks
+
+        with self._lock:
+            self.misses += 1
+        files, subdirs = scan_dir(path, rel_dir, parent_matcher, self.rules, with_stat)
+        file_names = [os.path.basename(file[0] if with_stat else file) for file in files]
+        # 刚修改过的目录不写入有效的 mtime，下次仍重新扫描
+        recorded_mtime = mtime_ns if mtime_ns < scan_start_ns - RACY_WINDOW_NS else -1
+        with self._lock:
+            self._updates[rel_dir] = _DirRecord(recorded_mtime, ignore_sig, file_names,
+                                                [os.path.basename(subdir[0]) for subdir in subdirs])
+        return files, [subdir + (subtree_trusted,) for subdir in subdirs]
+
+    def scan(self, workers=DEFAULT_WALK_WORKERS, cancel=None, with_stat=False):
+        """
+        遍历项目目录，完整遍历结束后将变化写回索引。
+
+        :return: 逐个产出文件路径（或 (路径, os.stat_result)）的生成器
+        """
+        self.load()
+        scan_start_ns = time.time_ns()
+
+        def scan(path, rel_dir, parent_matcher, trusted):
+            return self._scan(path, rel_dir, parent_matcher, trusted, with_stat, scan_start_ns)
+
+        complete = False
+        try:
+            yield from walk_tasks((self.project_path, '', self.rules.root_matcher, True), scan, workers, cancel)
+            complete = True
+        finally:
+            self.save(complete)
+
+
+def _lstat(path):
+    try:
+        return os.lstat(path)
+    except OSError:
+        return None
+
+
+def indexed_gather_files(project_path, extensions, exclude_dirs, walk_workers=DEFAULT_WALK_WORKERS,
+                         ignore_files=IGNORE_FILES, cancel=None, with_stat=False, index_dir=None, stats=None):
+    """
+    与 packager.gather_files 参数和结果相同，但通过持久化的目录索引跳过未变化的目录。
+
+    :param stats: 可选的字典，遍历结束后写入 "dirs"（目录总数）和 "cached_dirs"（直接使用索引的目录数）
+    :param index_dir: 保存索引的目录，默认为 ~/.cache/source_code_packer
+    :return: 逐个产出要打包的文件路径的生成器
+    """
+    index = ScanIndex(project_path, extensions, exclude_dirs, ignore_files, index_dir)
+    try:
+        yield from index.scan(walk_workers, cancel, with_stat)
+    finally:
+        if stats is not None:
+            stats["dirs"] = index.hits + index.misses
+            stats["cached_dirs"] = index.hits
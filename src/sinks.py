@@ -0,0 +1,267 @@
+# sinks.py
+
+import base64
+import hashlib
+import http.client
+import socket
+import struct
+import sys
+import urllib.parse
+
+DEFAULT_CHUNK_SIZE = 256 * 1024  # HTTP 分块上传时每块的大小，也是缓冲的上限
+DEFAULT_TIMEOUT = 60  # 网络写入阻塞超过此秒数时放弃
+STDOUT = '-'
+
+
+class UploadError(Exception):
+    """压缩包上传失败。"""
+
+
+class CountingWriter:
+    """
+    包装输出目标，统计写入的字节数，可选地同时计算 sha256。
+
+    tell 返回已写入的字节数，因此 tarfile 和 zipfile 可以直接写入管道、socket 等无法 seek 的目标。
+    """
+    def __init__(self, fileobj, hashing=False):
+        """
+        :param fileobj: 可写的二进制文件对象
+        :param hashing: 是否计算写入内容的 sha256
+        """
+        self.fileobj = fileobj
+        self.bytes_written = 0
+        self._digest = hashlib.sha256() if hashing else None
+
+    def write(self, data):
+        self.fileobj.write(data)
+        self.bytes_written += len(data)
+        if self._digest is not None:
+            self._digest.update(data)
+        return len(data)
+
+    def tell(self):
+        return self.bytes_written
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def hexdigest(self):
+        return self._digest.hexdigest() if self._digest is not None else None
+
+
+class HttpUploadSink:
+    """
+    以 HTTP 分块传输编码（Transfer-Encoding: chunked）流式上传，不需要预先知道压缩包大小。
+
+    写入的数据攒满一块后同步发送，服务器接收慢时 write 阻塞，打包随之放慢，内存中最多缓冲一块。
+    close 发送结束块并检查响应状态；abort 直接断开连接，服务器会收到不完整的请求体。
+    """
+    def __init__(self, url, method='PUT', chunk_size=DEFAULT_CHUNK_SIZE, timeout=DEFAULT_TIMEOUT):
+        """
+        :param url: 上传地址，http:// 或 https://，可以包含 user:password@ 用于基本认证
+        :param method: 请求方法
+        :param chunk_size: 每块的大小（字节）
+        :param timeout: 连接和发送的超时（秒）
+        """
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"不支持的上传地址: {url}")
+        self.name = sink_name(url)
+        self.chunk_size = chunk_size
+        self.status = None
+        self.response_body = None
+        self._buffer = bytearray()
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._conn = connection_class(parts.hostname, parts.port, timeout=timeout)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        try:
+            self._conn.putrequest(method, path)
+            self._conn.putheader('Content-Type', 'application/octet-stream')
+            self._conn.putheader('Transfer-Encoding', 'chunked')
+            if parts.username is not None:
+                credentials = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+                self._conn.putheader('Authorization', 'Basic ' + base64.b64encode(credentials.encode()).decode())
+            self._conn.endheaders()
+        except OSError as e:
+            self._conn.close()
+            raise UploadError(f"无法连接上传地址 {parts.netloc}: {e}") from e
+
+    def _send_chunk(self, data):
+        try:
+            self._conn.send(b'%x\r\n' % len(data))
+            self._conn.send(data)
+            self._conn.send(b'\r\n')
+        except OSError as e:
+            # 服务器提前拒绝（如 413、401）时连接会被关闭，尽量取回其响应说明原因
+            raise UploadError(f"上传中断: {e}{self._early_response()}") from e
+
+    def _early_response(self):
+        try:
+            response = self._conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            return ''
+        return f"（HTTP {response.status} {response.reason}）"
+
+    def write(self, data):
+        if len(self._buffer) + len(data) < self.chunk_size:
+            self._buffer += data
+            return len(data)
+        if self._buffer:
+            self._buffer += data
+            data, self._buffer = self._buffer, bytearray()
+        view = memoryview(data)
+        # 超过一块的数据直接切片发送，不复制到缓冲区
+        full = len(view) - len(view) % self.chunk_size
+        for start in range(0, full, self.chunk_size):
+            self._send_chunk(view[start:start + self.chunk_size])
+        self._buffer += view[full:]
+        return len(view)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """发送剩余数据和结束块，等待服务器响应；状态码不是 2xx 时抛出 UploadError。"""
+        try:
+            if self._buffer:
+                self._send_chunk(self._buffer)
+                self._buffer = bytearray()
+            try:
+                self._conn.send(b'0\r\n\r\n')
+                response = self._conn.getresponse()
+                self.status = response.status
+                self.response_body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                raise UploadError(f"上传失败: {e}") from e
+        finally:
+            self._conn.close()
+        if not 200 <= self.status < 300:
+            detail = self.response_body[:200].decode('utf-8', 'replace').strip()
+            raise UploadError(f"上传失败: HTTP {self.status} {response.reason}{'：' + detail if detail else ''}")
+
+    def abort(self):
+        self._conn.close()
+
+
+class SocketSink:
+    """
+    写入 TCP 连接，发送完毕后关闭写方向，接收方读到 EOF 即表示压缩包结束。
+
+    数据攒满一块后同步发送，接收方读取慢时 write 阻塞。
+    """
+    def __init__(self, host, port, chunk_size=DEFAULT_CHUNK_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.name = f"tcp://{host}:{port}"
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+        try:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+        except OSError as e:
+            raise UploadError(f"无法连接 {self.name}: {e}") from e
+
+    def _send(self, data):
+        try:
+            self._sock.sendall(data)
+        except OSError as e:
+            raise UploadError(f"发送中断: {e}") from e
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            self._send(self._buffer)
+            self._buffer = bytearray()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        try:
+            if self._buffer:
+                self._send(self._buffer)
+                self._buffer = bytearray()
+            self._sock.shutdown(socket.SHUT_WR)
+        finally:
+            self._sock.close()
+
+    def abort(self):
+        # 以 RST 断开连接，接收方得到连接重置而不是 EOF，不会把不完整的数据当作完整的压缩包
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class _StdoutSink:
+    """标准输出，不关闭，结束时只刷新缓冲区。"""
+    name = '<stdout>'
+
+    def __init__(self):
+        self._file = sys.stdout.buffer
+
+    def write(self, data):
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.flush()
+
+    def abort(self):
+        self._file.flush()
+
+
+class _ExternalSink:
+    """调用方传入的文件对象，由调用方负责关闭。"""
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self.name = getattr(fileobj, 'name', repr(fileobj))
+
+    def write(self, data):
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.flush()
+
+    def abort(self):
+        pass
+
+
+def open_sink(target, chunk_size=DEFAULT_CHUNK_SIZE, timeout=DEFAULT_TIMEOUT):
+    """
+    打开压缩包的输出目标。
+
+    :param target: "-" 表示标准输出；"tcp://主机:端口"；"http://..." 或 "https://..." 表示分块上传；
+                   也可以是可写的二进制文件对象（管道、socket.makefile 等），使用后不关闭
+    :param chunk_size: 网络发送的缓冲大小（字节）
+    :param timeout: 网络连接和发送的超时（秒）
+    :return: 有 write、flush、close 和 abort 方法的对象；出错时应调用 abort 而不是 close
+    """
+    if not isinstance(target, str):
+        return _ExternalSink(target)
+    if target == STDOUT:
+        return _StdoutSink()
+    parts = urllib.parse.urlsplit(target)
+    if parts.scheme in ('http', 'https'):
+        return HttpUploadSink(target, chunk_size=chunk_size, timeout=timeout)
+    if parts.scheme == 'tcp' and parts.hostname and parts.port:
+        return SocketSink(parts.hostname, parts.port, chunk_size=chunk_size, timeout=timeout)
+    raise ValueError(f"不支持的输出目标: {target}（可用 -、tcp://主机:端口、http(s)://...）")
+
+
+def sink_name(target):
+    """输出目标的显示名称，用于结果消息。"""
+    if not isinstance(target, str):
+        return getattr(target, 'name', repr(target))
+    if target == STDOUT:
+        return _StdoutSink.name
+    parts = urllib.parse.urlsplit(target)
+    if parts.password is not None:
+        # 不在日志中显示密码
+        netloc = f"{parts.username}:***@{parts.netloc.rpartition('@')[2]}"
+        return urllib.parse.urlunsplit(parts._replace(netloc=netloc))
+    return target
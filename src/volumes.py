@@ -0,0 +1,298 @@
+# volumes.py
+
+import json
+import math
+import os
+import stat
+import tarfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from backends import get_backend, choose_backend, DEFAULT_FORMAT, AUTO_FORMAT, DEFAULT_AUTO_MIN_MBPS
+from packager import gather_files, package_files, write_digest, digest_path
+from parallel_gzip import DEFAULT_BLOCK_SIZE
+from rules import IGNORE_FILES
+from walker import DEFAULT_WALK_WORKERS
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.volumes.json'
+# tar 结尾的两个空块加上补齐到记录大小（10240 字节）的填充，每卷最多多出这么多
+TAR_TRAILER_BYTES = 2 * tarfile.BLOCKSIZE + tarfile.RECORDSIZE
+# zip 每个成员的本地头 (30) 与中央目录项 (46)，加上两处可能出现的 zip64 扩展字段 (20、28)，不含文件名
+ZIP_ENTRY_BYTES = 30 + 46 + 20 + 28
+# zip 结尾的中央目录结束记录 (22)，以及 zip64 结束记录 (56) 与其定位记录 (20)
+ZIP_TRAILER_BYTES = 22 + 56 + 20
+
+
+def volume_path(project_path, output_dir, number, suffix):
+    """返回第 number 卷（从 1 开始）的路径，如 <项目名>.vol002.tar.gz。"""
+    project_name = os.path.basename(os.path.normpath(project_path))
+    return os.path.join(output_dir, f"{project_name}.vol{number:03d}{suffix}")
+
+
+def volume_index_path(project_path, output_dir):
+    """返回分卷索引文件的路径。"""
+    project_name = os.path.basename(os.path.normpath(project_path))
+    return os.path.join(output_dir, f"{project_name}{INDEX_SUFFIX}")
+
+
+def load_volume_index(index_file):
+    """读取分卷索引，不存在或已损坏时返回 None。"""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def _padded(size):
+    """按 tar 的 512 字节块补齐后的大小。"""
+    return -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+
+
+def _pax_bytes(arcname):
+    """
+    成员名需要 pax 扩展头时扩展头的大小：名称超过 100 个字符或含非 ASCII 字符时，
+    tarfile 在成员头之前写入一个头块和补齐到整块的 "<长度> path=<名称>\n" 记录。
+    """
+    name = arcname.replace(os.sep, '/')
+    if len(name) <= 100 and name.isascii():
+        return 0
+    record = len(name.encode('utf-8')) + len(' path=\n') + 5  # 5 位足够写下记录长度
+    return tarfile.BLOCKSIZE + _padded(record)
+
+
+def _deflate_bound(size):
+    """deflate 压缩后大小的上限（与 zlib 的 deflateBound 相同），数据无法压缩时输出会略大于输入。"""
+    return size + (size >> 12) + (size >> 14) + (size >> 25) + 13
+
+
+def member_cost(arcname, size, archive_format, link_bytes=0):
+    """
+    估算一个文件在卷中占用的字节数上限（未压缩的 tar 或 zip 中）。
+
+    :param arcname: 包内路径
+    :param size: 文件大小
+    :param archive_format: 压缩格式名
+    :param link_bytes: 去重时该文件可能被写为硬链接，链接目标名称的 pax 扩展头大小上限
+    :return: 字节数
+    """
+    if archive_format == 'zip':
+        return ZIP_ENTRY_BYTES + 2 * len(arcname.encode('utf-8')) + _deflate_bound(size)
+    # 写为硬链接时没有数据块，但链接目标的名称过长时多一个 pax 扩展头
+    return tarfile.BLOCKSIZE + _pax_bytes(arcname) + max(_padded(size), link_bytes)
+
+
+def volume_bytes(member_bytes, archive_format):
+    """
+    由一卷中各成员的 member_cost 之和估算该卷压缩包大小的上限。
+
+    tar 加上结尾块和记录填充；压缩的 tar 再按无法压缩的数据计入压缩格式的开销
+    （gzip、多线程 gzip、xz 和 zstd 的膨胀都小于 0.1%，另加 4KB 的头尾）。
+    """
+    if archive_format == 'zip':
+        return member_bytes + ZIP_TRAILER_BYTES
+    total = member_bytes + TAR_TRAILER_BYTES
+    if archive_format != 'tar':
+        total += (total >> 10) + 4096
+    return total
+
+
+def _split(files, weights, count):
+    """
+    把有序的文件列表切成 count 段：每开始一卷，都把剩余的大小平均分给剩余的卷数作为本卷的目标，
+    切点选在离目标最近的文件边界上。
+    """
+    remaining = sum(weights)
+    volumes = [[]]
+    chunk_weights = [[]]
+    target = remaining / count
+    current = 0
+    for item, weight in zip(files, weights):
+        # 文件有一半以上超出本卷的目标时，从它开始新的一卷
+        if volumes[-1] and len(volumes) < count and current + weight / 2 > target:
+            remaining -= current
+            target = remaining / (count - len(volumes))
+            volumes.append([])
+            chunk_weights.append([])
+            current = 0
+        volumes[-1].append(item)
+        chunk_weights[-1].append(weight)
+        current += weight
+    return volumes, chunk_weights
+
+
+def plan_volumes(files, max_volume_bytes, archive_format=DEFAULT_FORMAT, dedupe=True):
+    """
+    把文件列表切分为大小均衡、且都不超过上限的几卷。
+
+    文件按包内路径排序后切成连续的几段：相邻的文件（通常是同一目录、同一类型）留在同一卷中，压缩率更好，
+    也便于按目录找到所在的卷。卷数从 总大小/上限 开始，有卷超出上限时再增加。
+    每个文件按它在 tar 或 zip 中的实际占用计入（成员头、补齐到整块、长名称的 pax 扩展头），每卷再加上结尾和
+    压缩格式的开销（见 member_cost 和 volume_bytes），即使文件内容无法压缩，卷也不会超过上限。
+    单个文件超过上限时单独成卷，排在最后。
+
+    :param files: [(包内路径, 大小)] 列表
+    :param max_volume_bytes: 每卷的大小上限（字节）
+    :param archive_format: 压缩格式名
+    :param dedupe: 是否去重（tar 中重复的文件写为硬链接）
+    :return: 卷列表，每卷为 [(包内路径, 大小)] 列表
+    """
+    files = sorted(files)
+    link_bytes = 0
+    if dedupe and archive_format != 'zip':
+        link_bytes = max((_pax_bytes(rel_path) for rel_path, _ in files), default=0)
+    weights = [member_cost(rel_path, size, archive_format, link_bytes) for rel_path, size in files]
+
+    def fits(member_bytes):
+        return volume_bytes(member_bytes, archive_format) <= max_volume_bytes
+
+    oversized = [[item] for item, weight in zip(files, weights) if not fits(weight)]
+    normal = [(item, weight) for item, weight in zip(files, weights) if fits(weight)]
+    if not normal:
+        return oversized
+    files = [item for item, _ in normal]
+    weights = [weight for _, weight in normal]
+    count = math.ceil(volume_bytes(sum(weights), archive_format) / max_volume_bytes)
+    while True:
+        volumes, chunk_weights = _split(files, weights, count)
+        if all(fits(sum(chunk)) for chunk in chunk_weights):
+            return volumes + oversized
+        count += 1
+
+
+def _pack_volume(project_path, files, output_path, options, deterministic):
+    """在工作进程中打包一卷，返回该卷的统计。"""
+    start = time.perf_counter()
+    stats = {}
+    package_files(project_path, [os.path.join(project_path, rel_path) for rel_path, _ in files],
+                  os.path.dirname(output_path), output_path=output_path, stats=stats,
+                  deterministic=deterministic, **options)
+    if deterministic:
+        digest = write_digest(output_path)
+    else:
+        digest = None
+        if os.path.exists(digest_path(output_path)):
+            os.remove(digest_path(output_path))  # 旧的摘要文件已与新的卷不符
+    skipped = set(stats["skipped_binary"] + stats["skipped_special"])
+    packed = [(rel_path, size) for rel_path, size in files if rel_path not in skipped]
+    return {
+        "file": os.path.basename(output_path),
+        "path": output_path,
+        "files": len(packed),
+        "bytes": sum(size for _, size in packed),
+        "archive_bytes": os.path.getsize(output_path),
+        "sha256": digest,
+        "skipped": stats["skipped_binary"] + stats["skipped_special"],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _remove_stale_volumes(index_file, output_dir, keep):
+    """删除上一次分卷打包留下、本次不再使用的卷（如卷数变少时）。"""
+    old_index = load_volume_index(index_file)
+    if old_index is None:
+        return
+    for volume in old_index["volumes"]:
+        if volume["file"] in keep:
+            continue
+        for path in (os.path.join(output_dir, volume["file"]), digest_path(os.path.join(output_dir, volume["file"]))):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def package_volumes(project_path, extensions, exclude_dirs, output_dir, max_volume_bytes,
+                    archive_format=DEFAULT_FORMAT, level=None, max_workers=None, workers=1,
+                    block_size=DEFAULT_BLOCK_SIZE, walk_workers=DEFAULT_WALK_WORKERS, ignore_files=IGNORE_FILES,
+                    dedupe=True, max_file_size=None, skip_binary=False, deterministic=False,
+                    auto_min_mbps=DEFAULT_AUTO_MIN_MBPS, on_volume=None):
+    """
+    分卷打包：把项目文件按大小切分为若干卷，用进程池同时压缩，并写入记录每个文件所在卷的索引。
+
+    每一卷都是完整独立的压缩包，可以单独解压；重复文件去重只在卷内进行，硬链接不会指向其他卷。
+    索引 <项目名>.volumes.json 的 "volumes" 列出各卷的文件名、文件数和大小，"files" 把包内路径映射到卷的下标。
+
+    :param project_path: 项目目录的路径
+    :param extensions: 要打包的文件扩展名列表
+    :param exclude_dirs: 要排除的目录列表
+    :param output_dir: 保存分卷和索引的目录
+    :param max_volume_bytes: 每卷的大小上限（字节）
+    :param archive_format: 压缩格式名，"auto" 表示抽样比较后自动选择
+    :param level: 压缩级别，None 表示使用该格式的默认级别
+    :param max_workers: 同时压缩的卷数上限，默认为 CPU 核心数
+    :param workers: 每一卷的压缩线程数（仅 tar.gz）
+    :param block_size: 多线程压缩时每个压缩块的大小（字节）
+    :param walk_workers: 并行扫描目录的线程数
+    :param ignore_files: 遍历时读取的忽略文件名列表
+    :param dedupe: 卷内内容相同的文件只保存一份
+    :param max_file_size: 文件大小上限（字节），超过的文件不打包
+    :param skip_binary: 跳过二进制文件
+    :param deterministic: 生成可复现的分卷，并在每卷旁写入 sha256 摘要文件
+    :param auto_min_mbps: auto 模式下可接受的最低压缩速度 (MB/s)
+    :param on_volume: 每一卷完成时的回调，参数为该卷的统计字典
+    :return: (索引文件路径, 索引字典)，没有文件需要打包时为 (None, None)
+    """
+    prefix = os.path.join(project_path, '')
+    files = []
+    skipped = []
+    for path, st in gather_files(project_path, extensions, exclude_dirs, walk_workers=walk_workers,
+                                 ignore_files=ignore_files, with_stat=True):
+        size = st.st_size if stat.S_ISREG(st.st_mode) else 0
+        rel_path = path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, start=project_path)
+        if max_file_size is not None and size > max_file_size:
+            skipped.append(rel_path)
+            continue
+        files.append((rel_path, size))
+    if not files:
+        return None, None
+
+    if archive_format == AUTO_FORMAT:
+        backend, _ = choose_backend([os.path.join(project_path, rel_path) for rel_path, _ in files],
+                                    min_mbps=auto_min_mbps, level=level)
+    else:
+        backend = get_backend(archive_format)
+    plan = plan_volumes(files, max_volume_bytes, backend.name, dedupe)
+    paths = [volume_path(project_path, output_dir, i + 1, backend.suffix) for i in range(len(plan))]
+    options = {"workers": workers, "block_size": block_size, "dedupe": dedupe, "archive_format": backend.name,
+               "level": level, "skip_binary": skip_binary}
+
+    os.makedirs(output_dir, exist_ok=True)
+    results = [None] * len(plan)
+    with ProcessPoolExecutor(max_workers=min(max_workers or os.cpu_count() or 1, len(plan))) as pool:
+        futures = {pool.submit(_pack_volume, project_path, volume, path, options, deterministic): i
+                   for i, (volume, path) in enumerate(zip(plan, paths))}
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if on_volume:
+                    on_volume(results[i])
+        except BaseException:
+            # 一卷失败时不再开始其余的卷；已在进行的卷结束后由 with 等待其退出
+            for future in futures:
+                future.cancel()
+            raise
+
+    index_file = volume_index_path(project_path, output_dir)
+    _remove_stale_volumes(index_file, output_dir, {os.path.basename(path) for path in paths})
+    skipped_in_volumes = {rel_path for result in results for rel_path in result.pop("skipped")}
+    index = {
+        "version": INDEX_VERSION,
+        "project_path": project_path,
+        "format": backend.name,
+        "max_volume_bytes": max_volume_bytes,
+        "volumes": [{key: result[key] for key in ("file", "files", "bytes", "archive_bytes", "sha256")}
+                    for result in results],
+        "files": {rel_path: i for i, volume in enumerate(plan) for rel_path, _ in volume
+                  if rel_path not in skipped_in_volumes},
+    }
+    if skipped or skipped_in_volumes:
+        index["skipped"] = sorted(skipped + list(skipped_in_volumes))
+    tmp_path = index_file + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(index, file, ensure_ascii=False)
+    os.replace(tmp_path, index_file)
+    return index_file, index
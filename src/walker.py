@@ -0,0 +1,123 @@
+# walker.py
+
+import os
+
+from cancellation import check_cancelled
+
+DEFAULT_WALK_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def join_rel(rel_dir, name):
+    """拼接相对于项目根目录的 posix 路径。"""
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def scan_dir(path, rel_dir, parent_matcher, rules, with_stat=False):
+    """
+    扫描单个目录，返回其中匹配的文件和需要继续遍历的子目录。
+
+    直接使用 DirEntry 自带的类型信息，绝大多数文件系统上无需额外的 stat 调用；
+    被排除的目录在这里即被剪枝，不会再进入其子树。
+
+    :param path: 要扫描的目录
+    :param rel_dir: 目录相对于项目根目录的 posix 路径
+    :param parent_matcher: 上级目录生效的忽略规则匹配器
+    :param rules: 编译后的 RuleSet
+    :param with_stat: 文件以 (路径, os.stat_result) 的形式返回，与 lstat 相同，不跟随符号链接
+    :return: (文件路径列表, [(子目录路径, 相对路径, 匹配器)] 列表)
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        # 与 os.walk 一致：忽略无法读取的目录
+        return files, subdirs
+
+    matcher = rules.dir_matcher(path, rel_dir, parent_matcher, {entry.name for entry in entries})
+    for entry in entries:
+        rel_path = join_rel(rel_dir, entry.name)
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            # 与 os.walk 一致：不进入指向目录的符号链接
+            if not entry.is_symlink() and not matcher.is_excluded(rel_path, True):
+                subdirs.append((entry.path, rel_path, matcher))
+        elif rules.wants_file(entry.name, rel_path) and not matcher.is_excluded(rel_path, False):
+            if not with_stat:
+                files.append(entry.path)
+                continue
+            try:
+                files.append((entry.path, entry.stat(follow_symlinks=False)))
+            except OSError:
+                # 扫描后被删除的文件
+                continue
+    return files, subdirs
+
+
+def _walk_serial(task, scan, cancel=None):
+    stack = [task]
+    while stack:
+        check_cancelled(cancel)
+        files, subtasks = scan(*stack.pop())
+        yield from files
+        stack.extend(reversed(subtasks))
+
+
+def _walk_parallel(task, scan, workers, cancel=None):
+    # 延迟导入：concurrent.futures 会连带导入 logging，拖慢命令行启动
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scandir")
+    try:
+        pending = {pool.submit(scan, *task)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            check_cancelled(cancel)
+            for future in done:
+                files, subtasks = future.result()
+                # 先派发子目录再产出文件，让工作线程尽早开始下一层扫描
+                for subtask in subtasks:
+                    pending.add(pool.submit(scan, *subtask))
+                yield from files
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def walk_tasks(task, scan, workers=DEFAULT_WALK_WORKERS, cancel=None):
+    """
+    通用的目录遍历循环：scan(*task) 扫描一个目录，返回 (文件列表, 子目录任务列表)，
+    子目录任务再交给 scan，直到没有新的任务。workers 大于 1 时各目录在线程池中并行扫描。
+
+    :param task: 根目录的任务参数元组
+    :param scan: 扫描单个目录的函数
+    :param workers: 扫描线程数，1 表示在当前线程中顺序扫描
+    :param cancel: 可选的 threading.Event，设置后在扫描下一个目录前抛出 PackagingCancelled
+    :return: 逐个产出文件的生成器
+    """
+    if workers <= 1:
+        return _walk_serial(task, scan, cancel)
+    return _walk_parallel(task, scan, workers, cancel)
+
+
+def scan_files(project_path, rules, workers=DEFAULT_WALK_WORKERS, cancel=None, with_stat=False):
+    """
+    基于 os.scandir 的目录遍历器，子目录分发到线程池并行扫描。
+
+    包含/排除判断由编译后的 RuleSet 完成，被排除的目录整棵子树都会被剪枝。
+    并行模式下文件的产出顺序不固定。
+
+    :param project_path: 项目目录的路径
+    :param rules: 编译后的 RuleSet
+    :param workers: 扫描线程数，1 表示在当前线程中顺序扫描
+    :param cancel: 可选的 threading.Event，设置后在扫描下一个目录前抛出 PackagingCancelled
+    :param with_stat: 产出 (文件路径, os.stat_result)，供只需要文件大小等元数据的调用方使用
+    :return: 逐个产出匹配文件路径的生成器
+    """
+    def scan(path, rel_dir, parent_matcher):
+        return scan_dir(path, rel_dir, parent_matcher, rules, with_stat)
+
+    return walk_tasks((project_path, '', rules.root_matcher), scan, workers, cancel)
@@ -0,0 +1,371 @@
+# watcher.py
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from rules import RuleSet, IGNORE_FILES
+from walker import scan_dir
+
+DEFAULT_DEBOUNCE = 2.0  # 最后一次变化后等待多久才触发自动打包（秒）
+DEFAULT_POLL_INTERVAL = 2.0  # 轮询模式下两次扫描的间隔（秒）
+WATCH_INOTIFY = 'inotify'
+WATCH_POLLING = 'polling'
+
+# <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+# 这些事件改变目录中的文件列表，需要重新扫描该目录
+_STRUCTURE_EVENTS = _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+class _Inotify:
+    """通过 ctypes 调用 libc 的 inotify 接口，不依赖第三方库。"""
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify 仅在 Linux 上可用")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def add_watch(self, path):
+        """监视目录，返回 watch 描述符；超过 max_user_watches 等失败时抛出 OSError。"""
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd):
+        # 目录被删除时内核已自动移除 watch，此时的失败可以忽略
+        self._rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        """
+        等待并读取事件。
+
+        :param timeout: 最长等待时间（秒）
+        :return: [(wd, mask, 文件名)] 列表，超时返回空列表
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _DirState:
+    """索引中的一个目录：重新扫描所需的上下文和其中匹配的文件。"""
+    __slots__ = ('rel_dir', 'parent_matcher', 'files', 'subdirs', 'wd')
+
+    def __init__(self, rel_dir, parent_matcher):
+        self.rel_dir = rel_dir
+        self.parent_matcher = parent_matcher
+        self.files = {}  # 文件路径 -> (大小, mtime_ns)，inotify 模式下为 None
+        self.subdirs = set()
+        self.wd = None
+
+
+class ProjectWatcher:
+    """
+    监视项目目录，在内存中维护匹配的文件列表，打包时直接读取而无需重新遍历目录。
+
+    Linux 上通过 inotify 增量更新：目录中有文件增删时只重新扫描该目录，忽略文件变化时重新扫描其子树。
+    inotify 不可用或 watch 数量超过系统上限时退回轮询模式，定期重新扫描并比较文件的大小和修改时间。
+
+    匹配的文件发生变化后，等待 debounce 秒内不再有新的变化，再在监视线程中调用 on_change(变化的文件路径列表)。
+    """
+    def __init__(self, project_path, extensions, exclude_dirs, ignore_files=IGNORE_FILES, on_change=None,
+                 debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True):
+        """
+        :param project_path: 项目目录的路径
+        :param extensions: 要包含的文件后缀列表
+        :param exclude_dirs: 要排除的子目录列表
+        :param ignore_files: 遍历时读取的忽略文件名列表
+        :param on_change: 可选的回调，参数为变化的文件路径列表
+        :param debounce: 最后一次变化后等待的秒数
+        :param poll_interval: 轮询模式下的扫描间隔（秒）
+        :param use_inotify: 为 False 时总是使用轮询
+        """
+        self.project_path = project_path
+        self.settings = (os.path.abspath(project_path), tuple(extensions), tuple(exclude_dirs), tuple(ignore_files))
+        self.rules = RuleSet(extensions, exclude_dirs, ignore_files)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.mode = None
+        self.fallback_reason = None
+        self.version = 0  # 文件列表或内容每变化一次加一
+        self.error = None
+        self._dirs = {}
+        self._wds = {}  # watch 描述符 -> 目录路径
+        self._inotify = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = set()
+        self._last_change = 0.0
+
+    def matches(self, project_path, extensions, exclude_dirs, ignore_files=IGNORE_FILES):
+        """判断索引是否对应给定的项目设置，设置不同时不能代替遍历。"""
+        return self.settings == (os.path.abspath(project_path), tuple(extensions), tuple(exclude_dirs),
+                                 tuple(ignore_files))
+
+    def start(self):
+        """在后台线程中建立索引并开始监视。"""
+        self._thread = threading.Thread(target=self._run, name="project-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止监视。"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def wait_ready(self, timeout=None):
+        """等待初次扫描完成。"""
+        return self._ready.wait(timeout)
+
+    def files(self):
+        """
+        返回当前索引中的全部文件路径，可直接作为 run_packaging 的 file_source。
+        初次扫描尚未完成时等待其完成。
+        """
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        with self._lock:
+            return [file for state in self._dirs.values() for file in state.files]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(state.files) for state in self._dirs.values())
+
+    # 索引维护
+
+    def _scan_subtree(self, path, rel_dir, parent_matcher, dirs):
+        """扫描一棵子树，将其中的目录加入 dirs，返回扫描到的文件路径集合。"""
+        with_stat = self.mode == WATCH_POLLING
+        found = set()
+        stack = [(path, rel_dir, parent_matcher)]
+        while stack:
+            path, rel_dir, parent_matcher = stack.pop()
+            state = _DirState(rel_dir, parent_matcher)
+            if self._inotify is not None:
+                try:
+                    state.wd = self._inotify.add_watch(path)
+                    self._wds[state.wd] = path
+                except FileNotFoundError:
+                    continue  # 扫描期间被删除的目录
+            files, subdirs = scan_dir(path, rel_dir, parent_matcher, self.rules, with_stat)
+            if with_stat:
+                state.files = {file: (st.st_size, st.st_mtime_ns) for file, st in files}
+            else:
+                state.files = dict.fromkeys(files)
+            state.subdirs = {subdir[0] for subdir in subdirs}
+            dirs[path] = state
+            found.update(state.files)
+            stack.extend(subdirs)
+        return found
+
+    def _remove_subtree(self, path):
+        """从索引中移除一棵子树，返回其中的文件路径集合。"""
+        removed = set()
+        stack = [path]
+        while stack:
+            state = self._dirs.pop(stack.pop(), None)
+            if state is None:
+                continue
+            if state.wd is not None:
+                self._wds.pop(state.wd, None)
+                self._inotify.rm_watch(state.wd)
+            removed.update(state.files)
+            stack.extend(state.subdirs)
+        return removed
+
+    def _rescan_dir(self, path, subtree=False):
+        """
+        重新扫描一个目录，返回新增和删除的文件路径。
+
+        :param path: 目录路径
+        :param subtree: 同时重新扫描所有子目录（目录中的忽略文件变化时）
+        """
+        state = self._dirs.get(path)
+        if state is None:
+            return set()
+        if subtree:
+            removed = self._remove_subtree(path)
+            added = self._scan_subtree(path, state.rel_dir, state.parent_matcher, self._dirs)
+            return removed ^ added
+        files, subdirs = scan_dir(path, state.rel_dir, state.parent_matcher, self.rules)
+        new_files = dict.fromkeys(files)
+        changed = set(state.files).symmetric_difference(new_files)
+        state.files = new_files
+        new_subdirs = {subdir[0]: subdir for subdir in subdirs}
+        for gone in state.subdirs - set(new_subdirs):
+            changed |= self._remove_subtree(gone)
+        for added in set(new_subdirs) - state.subdirs:
+            changed |= self._scan_subtree(*new_subdirs[added], self._dirs)
+        state.subdirs = set(new_subdirs)
+        return changed
+
+    def _rebuild(self):
+        """重新扫描整个项目，返回与之前相比变化的文件路径。"""
+        dirs = {}
+        if self._inotify is not None:
+            for wd in self._wds:
+                self._inotify.rm_watch(wd)
+            self._wds.clear()
+        self._scan_subtree(self.project_path, '', self.rules.root_matcher, dirs)
+        old = {file: sig for state in self._dirs.values() for file, sig in state.files.items()}
+        new = {file: sig for state in dirs.values() for file, sig in state.files.items()}
+        with self._lock:
+            self._dirs = dirs
+        # 刚从 inotify 切换到轮询时旧索引没有文件的大小和修改时间，只能比较文件列表
+        changed = old.keys() ^ new.keys()
+        changed.update(file for file, sig in new.items() if old.get(file) not in (None, sig))
+        return changed
+
+    def _handle_events(self, events):
+        """根据一批 inotify 事件更新索引，返回变化的文件路径。"""
+        dirty = {}  # 目录路径 -> 是否需要重新扫描子树
+        changed = set()
+        for wd, mask, name in events:
+            if mask & _IN_Q_OVERFLOW:
+                # 事件队列溢出，已无法知道哪些目录变化了
+                return self._rebuild()
+            if mask & _IN_IGNORED:
+                self._wds.pop(wd, None)
+                continue
+            path = self._wds.get(wd)
+            if path is None:
+                continue
+            if name in self.rules.ignore_files:
+                dirty[path] = True
+            elif mask & _STRUCTURE_EVENTS:
+                dirty.setdefault(path, False)
+            else:
+                file = os.path.join(path, name)
+                state = self._dirs.get(path)
+                if state is not None and file in state.files:
+                    changed.add(file)
+        with self._lock:
+            for path, subtree in dirty.items():
+                if path in self._dirs:
+                    changed |= self._rescan_dir(path, subtree)
+        return changed
+
+    def _record(self, changed):
+        if changed:
+            self.version += 1
+            self._pending |= changed
+            self._last_change = time.monotonic()
+
+    def _notify(self):
+        """距最后一次变化已超过 debounce 秒时，将积累的变化交给 on_change。"""
+        if not self._pending or time.monotonic() - self._last_change < self.debounce:
+            return
+        changed, self._pending = sorted(self._pending), set()
+        if self.on_change is not None:
+            self.on_change(changed)
+
+    def _run(self):
+        try:
+            if self.use_inotify:
+                try:
+                    self._inotify = _Inotify()
+                    self.mode = WATCH_INOTIFY
+                    self._scan_subtree(self.project_path, '', self.rules.root_matcher, self._dirs)
+                except OSError as e:
+                    # 例如 watch 数量超过 fs.inotify.max_user_watches
+                    self.fallback_reason = str(e)
+                    self._close_inotify()
+            if self._inotify is None:
+                self.mode = WATCH_POLLING
+                self._dirs = {}
+                self._scan_subtree(self.project_path, '', self.rules.root_matcher, self._dirs)
+        except Exception as e:
+            self.error = e
+            return
+        finally:
+            self._ready.set()
+
+        try:
+            while not self._stop.is_set():
+                if self.mode == WATCH_INOTIFY:
+                    try:
+                        self._record(self._handle_events(self._inotify.read(0.2)))
+                    except OSError as e:
+                        # 子目录新增后超过 watch 上限，退回轮询模式
+                        self.fallback_reason = str(e)
+                        self._close_inotify()
+                        self.mode = WATCH_POLLING
+                        self._record(self._rebuild())
+                else:
+                    if self._stop.wait(self.poll_interval):
+                        break
+                    self._record(self._rebuild())
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._close_inotify()
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._wds.clear()
+            for state in self._dirs.values():
+                state.wd = None
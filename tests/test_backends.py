@@ -0,0 +1,44 @@
+# test_backends.py
+
+import queue
+
+from backends import BACKENDS, choose_backend, get_backend, resolve_level
+from packager import run_packaging
+
+
+def test_level_is_clamped_per_backend():
+    """同一个级别用于每一种格式时，按各格式的有效范围收窄。"""
+    assert resolve_level(get_backend('tar.gz'), 19) == 9
+    assert resolve_level(get_backend('tar.xz'), -3) == 0
+    assert resolve_level(get_backend('zip'), 19) == 9
+    assert resolve_level(get_backend('tar'), 19) is None
+    assert resolve_level(get_backend('tar.gz'), None) == 6
+
+
+def test_auto_accepts_level_valid_for_only_some_backends(tmp_path):
+    """对 zstd 有效的级别 19 超出了 gzip、xz 和 zip 的范围，auto 模式仍能比较并打包。"""
+    project = tmp_path / 'proj'
+    project.mkdir()
+    (project / 'a.py').write_text('value = 1\n' * 1000)
+
+    backend, results = choose_backend([str(project / 'a.py')], level=19)
+    assert len(results) == len(BACKENDS)
+
+    result_queue = queue.Queue()
+    run_packaging(str(project), ['.py'], [], result_queue, output_dir=str(tmp_path / 'out'),
+                  archive_format='auto', level=19)
+    message, output_path = result_queue.get()
+    assert output_path is not None, message
+
+
+def test_explicit_format_rejects_out_of_range_level(tmp_path):
+    project = tmp_path / 'proj'
+    project.mkdir()
+    (project / 'a.py').write_text('a = 1\n')
+
+    result_queue = queue.Queue()
+    run_packaging(str(project), ['.py'], [], result_queue, output_dir=str(tmp_path / 'out'),
+                  archive_format='tar.gz', level=19)
+    message, output_path = result_queue.get()
+    assert output_path is None
+    assert 'tar.gz 的压缩级别应在 0 到 9 之间' in message
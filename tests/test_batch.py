@@ -0,0 +1,44 @@
+# test_batch.py
+
+import os
+import tarfile
+
+from batch import run_batch, select_projects, format_summary
+
+
+def _project(path, files):
+    path.mkdir(parents=True)
+    for name, text in files.items():
+        (path / name).write_text(text)
+    return {"project_path": str(path), "file_extensions": [".py"], "exclude_dirs": []}
+
+
+def test_select_projects_by_path_or_name():
+    projects = [{"project_path": "/srv/user-service"}, {"project_path": "/srv/web"}, {"project_path": "/opt/tools"}]
+    assert select_projects(projects) == projects
+    assert select_projects(projects, ['*service*']) == projects[:1]
+    assert select_projects(projects, ['/srv/*', 'tools']) == projects
+
+
+def test_run_batch_packs_same_named_projects_separately(tmp_path):
+    """同名目录的项目各自生成压缩包（文件名带路径哈希），结果顺序与项目列表一致，失败的项目不影响其他项目。"""
+    projects = [
+        _project(tmp_path / 'a' / 'app', {"main.py": "a = 1\n", "util.py": "u = 1\n"}),
+        _project(tmp_path / 'b' / 'app', {"main.py": "b = 2\n"}),
+        _project(tmp_path / 'empty', {"readme.txt": "no python here\n"}),
+    ]
+    seen = []
+    results = run_batch(projects, max_workers=2, output_dir=str(tmp_path / 'out'), on_result=seen.append)
+
+    assert [r["project_path"] for r in results] == [p["project_path"] for p in projects]
+    assert len(seen) == 3
+    first, second, empty = results
+    assert first["output_path"] != second["output_path"]
+    assert (first["files"], second["files"]) == (2, 1)
+    assert first["raw_bytes"] == 12 and first["archive_bytes"] == os.path.getsize(first["output_path"])
+    with tarfile.open(second["output_path"]) as tar:
+        assert tar.extractfile('main.py').read() == b"b = 2\n"
+    assert empty["output_path"] is None and empty["message"] == "没有文件需要打包。"
+
+    summary = format_summary(results)
+    assert summary.splitlines()[-1].endswith("成功 2/3")
@@ -0,0 +1,14 @@
+# test_cli_import.py
+
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def test_cli_import_does_not_load_qt():
+    """命令行入口在导入时不能加载任何 Qt 模块，否则无法在没有显示环境的 CI 容器中使用。"""
+    code = "import cli, sys; print([m for m in sys.modules if m.startswith('PyQt')])"
+    result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
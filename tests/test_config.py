@@ -0,0 +1,69 @@
+# test_config.py
+
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import config
+from config import ConfigStore
+
+
+def _save_projects(config_path, worker, count):
+    store = ConfigStore(config_path)
+    for i in range(count):
+        store.save({"project_path": f"/proj/{worker}/{i}", "file_extensions": [".py"], "exclude_dirs": []})
+
+
+def test_concurrent_saves_from_several_processes_are_merged(tmp_path):
+    """多个实例同时保存时，每次写入都在文件锁内合并其他实例的修改，不会丢失项目。"""
+    config_path = str(tmp_path / 'config.json')
+    ConfigStore(config_path).ensure_exists()
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_save_projects, args=(config_path, worker, 20)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    with open(config_path, encoding='utf-8') as file:
+        paths = {project["project_path"] for project in json.load(file)["projects"]}
+    assert {f"/proj/{worker}/{i}" for worker in range(4) for i in range(20)} <= paths
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_cache_sees_changes_made_by_another_instance(tmp_path):
+    config_path = str(tmp_path / 'config.json')
+    first, second = ConfigStore(config_path), ConfigStore(config_path)
+    first.save({"project_path": "/a", "file_extensions": [".py"], "exclude_dirs": []})
+    assert second.get("/a")["file_extensions"] == [".py"]
+
+    second.save({"project_path": "/a", "file_extensions": [".md"], "exclude_dirs": []})
+    assert first.get("/a")["file_extensions"] == [".md"]
+    second.delete("/a")
+    assert first.get("/a") is None
+
+
+def test_failed_write_keeps_previous_config(tmp_path, monkeypatch):
+    """写入中途失败时原有的配置保持完整，临时文件被删除。"""
+    config_path = str(tmp_path / 'config.json')
+    store = ConfigStore(config_path)
+    store.save({"project_path": "/a", "file_extensions": [".py"], "exclude_dirs": []})
+    with open(config_path, 'rb') as file:
+        before = file.read()
+
+    def broken_dump(obj, file, **kwargs):
+        file.write('{"projects": [')
+        raise OSError("磁盘已满")
+
+    monkeypatch.setattr(config.json, 'dump', broken_dump)
+    with pytest.raises(OSError):
+        store.save({"project_path": "/b", "file_extensions": [".py"], "exclude_dirs": []})
+    monkeypatch.undo()
+
+    with open(config_path, 'rb') as file:
+        assert file.read() == before
+    assert sorted(os.listdir(tmp_path)) == ['config.json', 'config.json.lock']
+    assert ConfigStore(config_path).get("/b") is None
@@ -0,0 +1,87 @@
+# test_delta.py
+
+import json
+import os
+import queue
+import tarfile
+
+import pytest
+
+from delta import package_delta, apply_deltas, DeltaChainError
+from packager import run_packaging
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text)
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def test_apply_delta_does_not_rewrite_deduplicated_copies(tmp_path):
+    """基准中 a.py 和 b.py 内容相同、解压后互为硬链接，增量修改 a.py 后 b.py 应保持原内容。"""
+    project = tmp_path / 'proj'
+    project.mkdir()
+    _write(project / 'a.py', 'same = 1\n')
+    _write(project / 'b.py', 'same = 1\n')
+    output_dir = str(tmp_path / 'out')
+
+    results = queue.Queue()
+    run_packaging(str(project), ['.py'], [], results, output_dir=output_dir, dedupe=True)
+    base = results.get()[1]
+    with tarfile.open(base) as tar:
+        assert any(member.islnk() for member in tar.getmembers())
+
+    _write(project / 'a.py', 'changed = 2\n')
+    delta, changes = package_delta(str(project), ['.py'], [], base, output_dir)
+    assert changes["modified"] == ['a.py']
+
+    target = tmp_path / 'restored'
+    apply_deltas(base, [delta], str(target))
+    assert _read(target / 'a.py') == 'changed = 2\n'
+    assert _read(target / 'b.py') == 'same = 1\n'
+
+
+def test_delta_uses_base_format_and_requested_level(tmp_path):
+    """未指定格式时增量包沿用基准压缩包的格式；指定的格式和级别同样生效，并能按链应用。"""
+    project = tmp_path / 'proj'
+    project.mkdir()
+    _write(project / 'a.py', 'a = 1\n')
+    output_dir = str(tmp_path / 'out')
+
+    results = queue.Queue()
+    run_packaging(str(project), ['.py'], [], results, output_dir=output_dir, archive_format='tar.xz')
+    base = results.get()[1]
+
+    _write(project / 'b.py', 'b = 1\n')
+    delta, _ = package_delta(str(project), ['.py'], [], base, output_dir, level=1)
+    assert delta.endswith('.tar.xz')
+    with tarfile.open(delta, 'r:xz') as tar:
+        assert 'b.py' in tar.getnames()
+
+    _write(project / 'c.py', 'c = 1\n')
+    second, _ = package_delta(str(project), ['.py'], [], delta, output_dir, archive_format='tar')
+    assert second.endswith('.tar')
+
+    target = tmp_path / 'restored'
+    apply_deltas(base, [delta, second], str(target))
+    assert sorted(os.listdir(target)) == ['a.py', 'b.py', 'c.py']
+
+    with pytest.raises(ValueError):
+        package_delta(str(project), ['.py'], [], base, output_dir, archive_format='zip')
+    with pytest.raises(ValueError):
+        package_delta(str(project), ['.py'], [], base, output_dir, level=42)
+
+
+def test_json_manifest_base_checks_version(tmp_path):
+    project = tmp_path / 'proj'
+    project.mkdir()
+    _write(project / 'a.py', 'a = 1\n')
+    manifest = tmp_path / 'old.manifest.json'
+    manifest.write_text(json.dumps({"version": 0, "fingerprint": "x", "files": []}))
+
+    with pytest.raises(DeltaChainError):
+        package_delta(str(project), ['.py'], [], str(manifest), str(tmp_path / 'out'))
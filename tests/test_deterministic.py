@@ -0,0 +1,80 @@
+# test_deterministic.py
+
+import hashlib
+import os
+import queue
+import shutil
+import subprocess
+import tarfile
+
+import pytest
+
+from packager import run_packaging
+
+
+def _make_project(project, order):
+    """按给定顺序创建文件，并设置各不相同的 mtime 和权限，它们都不应影响可复现的压缩包。"""
+    names = ['pkg/b.py', 'a.py', 'pkg/sub/c.py', 'run.py']
+    for i in order:
+        path = project / names[i]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'# {names[i]}\n' + 'value = 1\n' * (i * 5000))
+        os.utime(path, ns=(1_600_000_000_000_000_000 + i, 1_600_000_000_000_000_000 + i * 1000))
+    (project / 'run.py').chmod(0o750)
+    (project / 'a.py').chmod(0o600)
+
+
+def _pack(project, output_dir, **options):
+    results = queue.Queue()
+    run_packaging(str(project), ['.py'], [], results, output_dir=str(output_dir), deterministic=True,
+                  reuse_unchanged=False, **options)
+    message, output_path = results.get()
+    assert output_path is not None, message
+    with open(output_path, 'rb') as f:
+        return f.read(), output_path
+
+
+@pytest.mark.parametrize('options, other_options', [
+    ({"walk_workers": 1}, {"walk_workers": 4}),
+    ({"workers": 2, "block_size": 32 * 1024}, {"workers": 4, "block_size": 32 * 1024}),
+])
+def test_output_is_byte_identical(tmp_path, monkeypatch, options, other_options):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    first, second = tmp_path / 'first' / 'proj', tmp_path / 'second' / 'proj'
+    _make_project(first, [0, 1, 2, 3])
+    _make_project(second, [3, 2, 1, 0])
+
+    data, output_path = _pack(first, tmp_path / 'out1', **options)
+    other, _ = _pack(second, tmp_path / 'out2', **other_options)
+    assert data == other
+
+    # 摘要文件与内容一致，可直接用 sha256sum -c 校验
+    with open(output_path + '.sha256', encoding='utf-8') as f:
+        digest, name = f.read().split()
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert name == os.path.basename(output_path)
+
+
+def test_members_are_normalized_and_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    project = tmp_path / 'proj'
+    _make_project(project, [2, 0, 3, 1])
+    data, output_path = _pack(project, tmp_path / 'out', workers=4)
+
+    # gzip 头：不记录文件名（标志位为 0），时间戳为 0
+    assert data[3] == 0 and data[4:8] == b'\0\0\0\0'
+    with tarfile.open(output_path) as tar:
+        members = tar.getmembers()
+        assert [m.name for m in members] == sorted(m.name for m in members)
+        for member in members:
+            assert (member.mtime, member.uid, member.gid, member.uname, member.gname) == (1700000000, 0, 0, '', '')
+            assert member.mode == (0o755 if member.name == 'run.py' else 0o644)
+            assert tar.extractfile(member).read() == (project / member.name).read_bytes()
+
+
+@pytest.mark.skipif(shutil.which('gzip') is None, reason='需要 gzip 命令')
+def test_multithreaded_archive_passes_gzip_t(tmp_path):
+    project = tmp_path / 'proj'
+    _make_project(project, [0, 1, 2, 3])
+    _, output_path = _pack(project, tmp_path / 'out', workers=4, block_size=32 * 1024)
+    subprocess.run(['gzip', '-t', output_path], check=True)
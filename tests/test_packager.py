@@ -0,0 +1,85 @@
+# test_packager.py
+
+import queue
+import socket
+import tarfile
+import zipfile
+
+import pytest
+
+from packager import run_packaging
+
+
+def _pack_result(project, output_dir, **options):
+    """打包并返回 (结果消息, 压缩包路径)。"""
+    results = queue.Queue()
+    run_packaging(str(project), ['.py'], [], results, output_dir=str(output_dir), **options)
+    return results.get()
+
+
+def _pack(project, output_dir, **options):
+    return _pack_result(project, output_dir, **options)[0]
+
+
+def test_changing_dedupe_does_not_reuse_archive(tmp_path):
+    """去重开关不同的压缩包内容不同（硬链接或普通文件），切换后不能复用已有的压缩包。"""
+    project = tmp_path / 'proj'
+    project.mkdir()
+    (project / 'a.py').write_text('same = 1\n')
+    (project / 'b.py').write_text('same = 1\n')
+    output_dir = tmp_path / 'out'
+
+    _pack(project, output_dir, dedupe=True)
+    assert '复用已有压缩包' in _pack(project, output_dir, dedupe=True)
+    assert '复用已有压缩包' not in _pack(project, output_dir, dedupe=False)
+
+
+@pytest.mark.parametrize('archive_format', ['tar.gz', 'zip'])
+def test_socket_in_project_is_skipped(tmp_path, archive_format):
+    """项目中扩展名匹配的 socket 不能让整个打包失败，只跳过它并在结果中说明。"""
+    project = tmp_path / 'proj'
+    project.mkdir()
+    (project / 'a.py').write_text('a = 1\n')
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(project / 'b.py'))
+    try:
+        message, output_path = _pack_result(project, tmp_path / 'out', archive_format=archive_format)
+    finally:
+        server.close()
+
+    assert output_path is not None, message
+    assert '不支持的文件类型' in message
+    if archive_format == 'zip':
+        with zipfile.ZipFile(output_path) as archive:
+            assert archive.namelist() == ['a.py']
+    else:
+        with tarfile.open(output_path) as archive:
+            assert archive.getnames() == ['a.py']
+
+
+def test_file_source_skips_vanished_files(tmp_path):
+    """监视模式下文件列表来自内存中的索引，其中已被删除的文件不能让整个打包失败。"""
+    project = tmp_path / 'proj'
+    project.mkdir()
+    (project / 'a.py').write_text('a = 1\n')
+    files = [str(project / 'a.py'), str(project / 'deleted.py')]
+
+    message, output_path = _pack_result(project, tmp_path / 'out', file_source=lambda: files)
+
+    assert output_path is not None, message
+    with tarfile.open(output_path) as archive:
+        assert archive.getnames() == ['a.py']
+
+
+def test_result_message_has_full_tree_unless_limited(tmp_path):
+    project = tmp_path / 'proj'
+    project.mkdir()
+    for i in range(250):
+        (project / f'm{i:03d}.py').write_text(f'value = {i}\n')
+
+    message = _pack(project, tmp_path / 'out')
+    assert 'm249.py' in message and '仅显示前' not in message
+
+    message = _pack(project, tmp_path / 'out', tree_lines=10)
+    assert 'm249.py' not in message
+    assert '仅显示前 10 行，共 250 个文件' in message
@@ -0,0 +1,57 @@
+# test_parallel_gzip.py
+
+import gzip
+import io
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from parallel_gzip import ParallelGzipWriter, MIN_BLOCK_SIZE
+
+
+def _data():
+    """可压缩的文本与无法压缩的随机数据交错，跨越多个压缩块。"""
+    text = b''.join(b'line %d: value = %d\n' % (i, i * 7) for i in range(40000))
+    return text[:300000] + os.urandom(200000) + text[300000:]
+
+
+def _compress(data, workers, write_size=12345, mtime=0):
+    out = io.BytesIO()
+    with ParallelGzipWriter(out, workers=workers, block_size=MIN_BLOCK_SIZE, mtime=mtime) as gz:
+        for i in range(0, len(data), write_size):
+            gz.write(data[i:i + write_size])
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_round_trip(workers):
+    data = _data()
+    assert gzip.decompress(_compress(data, workers)) == data
+
+
+def test_empty_stream_is_valid():
+    assert gzip.decompress(_compress(b'', 4)) == b''
+
+
+@pytest.mark.skipif(shutil.which('gzip') is None, reason='需要 gzip 命令')
+def test_gzip_t_accepts_output(tmp_path):
+    path = tmp_path / 'data.gz'
+    path.write_bytes(_compress(_data(), 4))
+    subprocess.run(['gzip', '-t', str(path)], check=True)
+
+
+def test_output_does_not_depend_on_thread_count():
+    """每块的压缩结果只取决于块内容和前一块的窗口，与线程数和写入的分段方式无关。"""
+    data = _data()
+    assert _compress(data, 2) == _compress(data, 4, write_size=MIN_BLOCK_SIZE * 3 + 1)
+
+
+def test_abort_does_not_write_trailer():
+    out = io.BytesIO()
+    gz = ParallelGzipWriter(out, workers=2, block_size=MIN_BLOCK_SIZE, mtime=0)
+    gz.write(b'x' * MIN_BLOCK_SIZE * 3)
+    gz.abort()
+    with pytest.raises(EOFError):
+        gzip.decompress(out.getvalue())
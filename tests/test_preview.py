@@ -0,0 +1,61 @@
+# test_preview.py
+
+import os
+import queue
+
+from packager import run_packaging
+from preview import preview_project, _stratified, _sample_counts, MAX_SAMPLES_PER_EXTENSION
+
+
+def test_stratified_sample_covers_all_sizes():
+    files = [(size, f'f{size}') for size in range(1, 101)]
+    picked = _stratified(list(reversed(files)), 4)
+    assert [size for size, _ in picked] == [13, 38, 63, 88]
+    assert _stratified(files[:3], 10) == files[:3]
+
+
+def test_sample_counts_are_bounded():
+    extensions = {
+        '.py': {"files": [(100, f'{i}.py') for i in range(100000)], "bytes": 100 * 100000},
+        '.md': {"files": [(10, 'a.md')], "bytes": 10},
+    }
+    counts = _sample_counts(extensions, 100 * 100000 + 10)
+    assert counts['.py'] == MAX_SAMPLES_PER_EXTENSION
+    assert counts['.md'] == 1  # 少于最少抽样数时全部抽取
+
+
+def _make_project(project):
+    (project / 'src').mkdir(parents=True)
+    (project / 'data').mkdir()
+    for i in range(300):
+        (project / 'src' / f'm{i:03d}.py').write_text(f'def func_{i}(x):\n    return x * {i}\n' * (i % 40 + 1))
+    for i in range(20):
+        (project / 'data' / f'blob{i}.bin').write_bytes(b'\0' + os.urandom(20000))
+    (project / 'data' / 'huge.bin').write_bytes(os.urandom(3 * 1024 * 1024))
+
+
+def test_preview_counts_and_estimate(tmp_path):
+    project = tmp_path / 'proj'
+    _make_project(project)
+    preview = preview_project(str(project), ['.py', '.bin'], [], max_file_size=1024 * 1024)
+
+    py_bytes = sum(os.path.getsize(project / 'src' / name) for name in os.listdir(project / 'src'))
+    assert preview["files"] == 320
+    assert preview["bytes"] == py_bytes + 20 * 20001
+    assert preview["skipped_large"] == 1
+    assert preview["sampled_files"] <= preview["files"]
+
+    results = queue.Queue()
+    run_packaging(str(project), ['.py', '.bin'], [], results, output_dir=str(tmp_path / 'out'),
+                  max_file_size=1024 * 1024, dedupe=False)
+    archive_bytes = os.path.getsize(results.get()[1])
+    # 抽样估算与实际压缩包大小相差不超过 20%
+    assert abs(preview["estimated_bytes"] - archive_bytes) <= archive_bytes * 0.2
+
+
+def test_preview_estimates_skipped_binary_files(tmp_path):
+    project = tmp_path / 'proj'
+    _make_project(project)
+    preview = preview_project(str(project), ['.py', '.bin'], [], skip_binary=True)
+    assert preview["skipped_binary"] == 21
+    assert preview["files"] == 300
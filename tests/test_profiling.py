@@ -0,0 +1,28 @@
+# test_profiling.py
+
+import tracemalloc
+
+from profiling import PackagingProfile
+
+
+def test_stop_tools_leaves_external_tracemalloc_running():
+    """打包前已在运行的 tracemalloc（如 python -X tracemalloc）在分析结束后应保持运行。"""
+    tracemalloc.start()
+    try:
+        profiler = PackagingProfile(("tracemalloc",))
+        profiler.start_tools()
+        profiler.stop_tools()
+        profiler.stop_tools()
+        assert tracemalloc.is_tracing()
+        assert profiler._snapshot is not None
+    finally:
+        tracemalloc.stop()
+
+
+def test_stop_tools_stops_tracemalloc_it_started():
+    assert not tracemalloc.is_tracing()
+    profiler = PackagingProfile(("tracemalloc",))
+    profiler.start_tools()
+    assert tracemalloc.is_tracing()
+    profiler.stop_tools()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,79 @@
+# test_rules.py
+
+from packager import gather_files, packaging_options
+from rules import IgnoreMatcher, RuleSet, parse_rule
+
+
+def _excluded(patterns, rel_path, is_dir=False):
+    return IgnoreMatcher(patterns).is_excluded(rel_path, is_dir)
+
+
+def test_parse_rule():
+    assert parse_rule('# 注释') is None
+    assert parse_rule('   ') is None
+    assert parse_rule('!keep.log') == ('keep.log', True, False, False)
+    assert parse_rule('build/') == ('build', False, True, False)
+    assert parse_rule('/dist') == ('dist', False, False, True)
+    assert parse_rule('docs/*.md') == ('docs/*.md', False, False, True)
+    assert parse_rule('**/node_modules') == ('node_modules', False, False, False)
+    assert parse_rule('\\#hash') == ('#hash', False, False, False)
+
+
+def test_negation_last_rule_wins():
+    patterns = ['*.log', '!keep.log']
+    assert _excluded(patterns, 'a/debug.log')
+    assert not _excluded(patterns, 'a/keep.log')
+    # 否定之后再次排除，以最后一条为准
+    assert _excluded(patterns + ['a/keep.log'], 'a/keep.log')
+    assert not _excluded(patterns + ['a/keep.log'], 'b/keep.log')
+
+
+def test_anchoring():
+    # 以 / 开头或中间含 / 的规则只相对于规则所在目录匹配
+    assert _excluded(['/dist'], 'dist', True)
+    assert not _excluded(['/dist'], 'pkg/dist', True)
+    assert _excluded(['docs/*.md'], 'docs/a.md')
+    assert not _excluded(['docs/*.md'], 'sub/docs/a.md')
+    # 不含 / 的规则匹配任意层级
+    assert _excluded(['dist'], 'pkg/dist', True)
+    assert _excluded(['**/cache/*.bin'], 'a/b/cache/x.bin')
+    assert not _excluded(['*.py'], 'a/b.pyc')
+
+
+def test_directory_only_rules():
+    assert _excluded(['build/'], 'build', True)
+    assert _excluded(['build/'], 'src/build', True)
+    assert not _excluded(['build/'], 'build', False)
+    assert not _excluded(['build/'], 'src/build', False)
+
+
+def test_nested_ignore_file_overrides_parent():
+    root = IgnoreMatcher(['*.txt'])
+    child = IgnoreMatcher(['!notes.txt'], base='docs', parent=root)
+    assert child.is_excluded('docs/other.txt', False)
+    assert not child.is_excluded('docs/notes.txt', False)
+    assert root.is_excluded('notes.txt', False)
+
+
+def test_plain_exclude_dirs_are_anchored_to_project_root():
+    rules = RuleSet(['.py'], ['build', '**/node_modules', '!keep.min.js'])
+    assert rules.root_matcher.is_excluded('build', True)
+    assert not rules.root_matcher.is_excluded('src/build', True)
+    assert rules.root_matcher.is_excluded('web/node_modules', True)
+
+
+def test_gitignore_is_opt_in(tmp_path):
+    """默认只读取 .packerignore；开启 use_gitignore 后才按 .gitignore 排除。"""
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / '.gitignore').write_text('generated.py\n')
+    (tmp_path / 'sub' / '.packerignore').write_text('local.py\n')
+    for name in ('main.py', 'generated.py', 'sub/local.py', 'sub/kept.py'):
+        (tmp_path / name).write_text('x = 1\n')
+
+    def packed(project):
+        ignore_files = packaging_options(project)["ignore_files"]
+        return sorted(path[len(str(tmp_path)) + 1:]
+                      for path in gather_files(str(tmp_path), ['.py'], [], ignore_files=ignore_files))
+
+    assert packed({}) == ['generated.py', 'main.py', 'sub/kept.py']
+    assert packed({"use_gitignore": True}) == ['main.py', 'sub/kept.py']
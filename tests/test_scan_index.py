@@ -0,0 +1,91 @@
+# test_scan_index.py
+
+import os
+import time
+
+import pytest
+
+from scan_index import indexed_gather_files
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'proj'
+    for name in ('main.py', 'a/one.py', 'a/deep/two.py', 'b/three.py', 'b/notes.txt'):
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('x = 1\n')
+    _age_dirs(root)
+    return root
+
+
+def _age_dirs(root, seconds=100):
+    """把目录的 mtime 设为过去的时间：刚修改过的目录不会写入索引（见 RACY_WINDOW_NS）。"""
+    when = time.time() - seconds
+    for dir_path, _, _ in os.walk(root):
+        os.utime(dir_path, (when, when))
+
+
+def _scan(project, tmp_path, ignore_files=('.gitignore',)):
+    stats = {}
+    files = sorted(os.path.relpath(path, project) for path in
+                   indexed_gather_files(str(project), ['.py'], [], walk_workers=2, ignore_files=ignore_files,
+                                        index_dir=str(tmp_path / 'index'), stats=stats))
+    return files, stats
+
+
+def test_unchanged_dirs_are_served_from_index(project, tmp_path):
+    files, stats = _scan(project, tmp_path)
+    assert files == ['a/deep/two.py', 'a/one.py', 'b/three.py', 'main.py']
+    assert (stats["dirs"], stats["cached_dirs"]) == (4, 0)
+
+    again, stats = _scan(project, tmp_path)
+    assert again == files
+    assert (stats["dirs"], stats["cached_dirs"]) == (4, 4)
+
+
+def test_dir_mtime_change_rescans_only_that_dir(project, tmp_path):
+    _scan(project, tmp_path)
+    (project / 'a' / 'new.py').write_text('y = 2\n')
+    os.remove(project / 'b' / 'three.py')
+    when = time.time() - 50
+    for changed in ('a', 'b'):
+        os.utime(project / changed, (when, when))
+
+    files, stats = _scan(project, tmp_path)
+    assert files == ['a/deep/two.py', 'a/new.py', 'a/one.py', 'main.py']
+    assert (stats["dirs"], stats["cached_dirs"]) == (4, 2)
+
+
+def test_recent_dir_mtime_is_not_trusted(project, tmp_path):
+    """扫描时刚修改过的目录不写入有效的 mtime，同一时间戳内的后续修改也能被发现。"""
+    (project / 'a' / 'new.py').write_text('y = 2\n')
+    _scan(project, tmp_path)
+    (project / 'a' / 'later.py').write_text('z = 3\n')
+
+    files, _ = _scan(project, tmp_path)
+    assert 'a/later.py' in files
+
+
+def test_ignore_file_change_rescans_subtree(project, tmp_path):
+    gitignore = project / 'a' / '.gitignore'
+    gitignore.write_text('two.py\n')
+    _age_dirs(project)
+    files, _ = _scan(project, tmp_path)
+    assert 'a/deep/two.py' not in files
+
+    # 改写忽略文件的内容不会改变目录的 mtime，只能通过忽略文件本身的状态发现
+    gitignore.write_text('one.py\n')
+    files, stats = _scan(project, tmp_path)
+    assert files == ['a/deep/two.py', 'b/three.py', 'main.py']
+    assert stats["cached_dirs"] == 2  # 根目录和 b 仍使用索引，a 及其子目录重新扫描
+
+
+def test_settings_change_invalidates_index(project, tmp_path):
+    (project / 'a' / '.gitignore').write_text('one.py\n')
+    _age_dirs(project)
+    _scan(project, tmp_path)
+
+    files, stats = _scan(project, tmp_path, ignore_files=())
+    assert 'a/one.py' in files
+    assert stats["cached_dirs"] == 0
@@ -0,0 +1,53 @@
+# test_volumes.py
+
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from volumes import package_volumes
+
+
+def _make_project(project, count, size, name_for, random_data=False):
+    for i in range(count):
+        path = project / name_for(i)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(size) if random_data else str(i % 10).encode() * size)
+
+
+@pytest.mark.parametrize('archive_format, count, size, name_for, random_data, dedupe', [
+    # 大量 1 字节的小文件：每个成员实际占用一个头块和一个补齐的数据块
+    ('tar', 3000, 1, lambda i: f'f{i:05d}.py', False, False),
+    # 超过 100 个字符的长路径和非 ASCII 路径需要额外的 pax 扩展头
+    ('tar', 1500, 1, lambda i: f"{'long_directory_name/' * 6}module_{i:05d}.py", False, False),
+    ('tar', 1500, 1, lambda i: f'模块/文件_{i:05d}.py', False, False),
+    # 去重写成的硬链接没有数据块，但链接目标的长名称同样需要 pax 扩展头
+    ('tar', 1500, 1, lambda i: f"{'long_directory_name/' * 6}module_{i:05d}.py", False, True),
+    # 无法压缩的数据：压缩后反而比原始数据略大
+    ('tar.gz', 60, 20000, lambda i: f'd{i % 3}/f{i:03d}.py', True, True),
+    ('zip', 6000, 1, lambda i: f'f{i:05d}.py', False, False),
+    ('zip', 60, 20000, lambda i: f'd{i % 3}/f{i:03d}.py', True, True),
+])
+def test_volumes_do_not_exceed_max_size(tmp_path, archive_format, count, size, name_for, random_data, dedupe):
+    """每一卷的实际大小都不能超过上限，且都能完整打开。"""
+    project = tmp_path / 'proj'
+    _make_project(project, count, size, name_for, random_data)
+    output_dir = tmp_path / 'out'
+    max_volume_bytes = 512 * 1024
+
+    _, index = package_volumes(str(project), ['.py'], [], str(output_dir), max_volume_bytes,
+                               archive_format=archive_format, max_workers=2, dedupe=dedupe)
+
+    assert len(index["volumes"]) > 1
+    assert sorted(index["files"]) == sorted(os.path.relpath(os.path.join(root, name), project)
+                                            for root, _, names in os.walk(project) for name in names)
+    for volume in index["volumes"]:
+        path = output_dir / volume["file"]
+        assert os.path.getsize(path) <= max_volume_bytes
+        if archive_format == 'zip':
+            with zipfile.ZipFile(path) as archive:
+                assert len(archive.namelist()) == volume["files"]
+        else:
+            with tarfile.open(path) as archive:
+                assert len(archive.getmembers()) == volume["files"]
@@ -0,0 +1,73 @@
+# test_watcher.py
+
+import os
+import queue
+
+import pytest
+
+from watcher import ProjectWatcher, WATCH_INOTIFY
+
+TIMEOUT = 10
+
+
+@pytest.fixture(params=['polling', 'inotify'])
+def watched(request, tmp_path):
+    project = tmp_path / 'proj'
+    (project / 'pkg').mkdir(parents=True)
+    (project / 'main.py').write_text('a = 1\n')
+    (project / 'pkg' / 'mod.py').write_text('b = 1\n')
+    (project / 'readme.txt').write_text('not packed\n')
+    changes = queue.Queue()
+    watcher = ProjectWatcher(str(project), ['.py'], [], ignore_files=('.packerignore',), on_change=changes.put,
+                             debounce=0.05, poll_interval=0.05, use_inotify=request.param == 'inotify')
+    with watcher:
+        assert watcher.wait_ready(TIMEOUT)
+        if request.param == 'inotify' and watcher.mode != WATCH_INOTIFY:
+            pytest.skip(f"inotify 不可用: {watcher.fallback_reason}")
+        yield project, watcher, changes
+
+
+def _files(project, watcher):
+    return sorted(os.path.relpath(file, project) for file in watcher.files())
+
+
+def test_initial_index(watched):
+    project, watcher, _ = watched
+    assert _files(project, watcher) == ['main.py', os.path.join('pkg', 'mod.py')]
+
+
+def test_added_and_removed_files(watched):
+    project, watcher, changes = watched
+    (project / 'pkg' / 'sub').mkdir()
+    (project / 'pkg' / 'sub' / 'new.py').write_text('c = 1\n')
+    (project / 'main.py').unlink()
+
+    changed = set()
+    while len(changed) < 2:
+        changed.update(changes.get(timeout=TIMEOUT))
+    assert changed == {str(project / 'pkg' / 'sub' / 'new.py'), str(project / 'main.py')}
+    assert _files(project, watcher) == [os.path.join('pkg', 'mod.py'), os.path.join('pkg', 'sub', 'new.py')]
+
+
+def test_modified_file_is_reported(watched):
+    project, _, changes = watched
+    path = project / 'pkg' / 'mod.py'
+    st = path.stat()
+    path.write_text('b = 2  # 内容和大小都变了\n')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))  # 轮询按大小和 mtime 判断
+    assert changes.get(timeout=TIMEOUT) == [str(path)]
+
+
+def test_ignore_file_change_updates_index(watched):
+    project, watcher, changes = watched
+    (project / 'pkg' / '.packerignore').write_text('mod.py\n')
+    assert changes.get(timeout=TIMEOUT) == [str(project / 'pkg' / 'mod.py')]
+    assert _files(project, watcher) == ['main.py']
+
+
+def test_unmatched_files_are_not_reported(watched):
+    project, _, changes = watched
+    (project / 'readme.txt').write_text('still not packed\n')
+    (project / 'notes.md').write_text('# notes\n')
+    with pytest.raises(queue.Empty):
+        changes.get(timeout=0.5)